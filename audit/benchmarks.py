@@ -0,0 +1,228 @@
+# benchmarks.py
+
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+import django
+from django.db import connection
+
+from .deletion import bulk_delete
+from .models import AuditDashboard, Sitemap, UploadedFile
+from .sitemaps import create_sitemap_urls
+from .synthetic import iter_synthetic_lines, write_synthetic_export
+from .views import process_csv_file, update_in_sitemap_status
+
+# Export types in the order they are imported: the crawl first, then the enrichments
+BENCHMARK_TYPES = ['screaming_frog', 'search_console', 'google_analytics', 'keyword_research', 'backlinks']
+BENCHMARK_SIZES = [1000, 10000, 100000, 1000000]
+
+# Share of the crawled URLs listed in the benchmark sitemap
+SITEMAP_SHARE = 2
+
+RSS_SAMPLE_INTERVAL = 0.01
+
+
+def current_rss():
+    """Resident set size of this process in bytes (Linux), or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def max_rss():
+    """Peak RSS of the whole process so far, in bytes, or None without the resource module."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+class PeakRSS:
+    """
+    Samples RSS in a background thread while the block runs, so each step gets its own
+    peak instead of the process-wide high-water mark. Falls back to ru_maxrss without
+    /proc, and to tracemalloc's peak of Python allocations where neither exists
+    (Windows). source says which one the peak came from.
+    """
+
+    def __enter__(self):
+        self.peak = current_rss() or 0
+        if current_rss() is not None:
+            self.source = 'rss'
+        elif resource is not None:
+            self.source = 'ru_maxrss'
+        else:
+            self.source = 'tracemalloc'
+            self._tracing = tracemalloc.is_tracing()
+            if not self._tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            rss = current_rss()
+            if rss is None:
+                return
+            self.peak = max(self.peak, rss)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if self.source == 'rss':
+            self.peak = max(self.peak, current_rss() or 0)
+        elif self.source == 'ru_maxrss':
+            self.peak = max_rss()
+        else:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            if not self._tracing:
+                tracemalloc.stop()
+
+
+class QueryCounter:
+    """Counts executed queries without keeping their SQL, unlike CaptureQueriesContext."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(step, csv_type, rows, func):
+    """Runs func() and returns (its result, a report entry with time, queries and peak RSS)."""
+    counter = QueryCounter()
+    with PeakRSS() as rss, connection.execute_wrapper(counter):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+
+    entry = {
+        'step': step,
+        'csv_type': csv_type,
+        'rows': rows,
+        'seconds': round(elapsed, 4),
+        'rows_per_second': round(rows / elapsed, 1) if elapsed > 0 else None,
+        'queries': counter.count,
+        'peak_rss_mb': round(rss.peak / 2 ** 20, 1),
+        'memory_source': rss.source,
+    }
+    return result, entry
+
+
+def run_size(user, rows, csv_types=BENCHMARK_TYPES, workdir=None, log=print):
+    """
+    Imports synthetic exports of one size into a fresh dashboard, then times the full
+    'In Sitemap' refresh and deleting the dashboard. Every SITEMAP_SHARE-th crawled URL
+    is listed in a sitemap, which is deleted afterwards. Returns the report entries.
+    """
+    entries = []
+    dashboard = AuditDashboard.objects.create(user=user, name=f'Benchmark {rows} rows')
+    sitemap = Sitemap.objects.create(url='https://www.example.com/benchmark-sitemap.xml')
+
+    try:
+        # The sitemap lists the same URLs the synthetic crawl contains
+        locs = (
+            {'loc': line.split(',', 1)[0]}
+            for index, line in enumerate(iter_synthetic_lines('screaming_frog', rows))
+            if index and index % SITEMAP_SHARE == 0
+        )
+        batch = []
+        for entry in locs:
+            batch.append(entry)
+            if len(batch) == 2000:
+                create_sitemap_urls(sitemap, batch)
+                batch = []
+        if batch:
+            create_sitemap_urls(sitemap, batch)
+
+        for csv_type in csv_types:
+            path = write_synthetic_export(os.path.join(workdir, f'{csv_type}-{rows}.csv'), csv_type, rows)
+            try:
+                with open(path, 'rb') as file:
+                    processed, entry = measure(
+                        'process_csv_file', csv_type, rows, lambda: process_csv_file(file, dashboard)
+                    )
+            finally:
+                os.remove(path)
+            entry['records_processed'] = processed
+            entries.append(entry)
+            log(entry)
+
+        updated, entry = measure(
+            'update_in_sitemap_status', 'sitemap', rows, lambda: update_in_sitemap_status(dashboard)
+        )
+        entry['records_processed'] = updated
+        entry['in_sitemap'] = UploadedFile.objects.filter(dashboard=dashboard, in_sitemap=True).count()
+        entries.append(entry)
+        log(entry)
+
+        _, entry = measure(
+            'delete_dashboard', 'dashboard', rows, lambda: bulk_delete(AuditDashboard.objects.filter(id=dashboard.id))
+        )
+        entries.append(entry)
+        log(entry)
+
+    finally:
+        bulk_delete(Sitemap.objects.filter(id=sitemap.id))
+        bulk_delete(AuditDashboard.objects.filter(id=dashboard.id))
+
+    return entries
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(user, sizes=BENCHMARK_SIZES, csv_types=BENCHMARK_TYPES, log=print):
+    """Runs every size and returns the JSON-serialisable report."""
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': git_commit(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in sizes:
+            report['results'].extend(run_size(user, rows, csv_types=csv_types, workdir=workdir, log=log))
+    return report
+
+
+def compare_reports(previous, current):
+    """
+    Yields (step, csv_type, rows, previous rows/s, current rows/s, % change) for every
+    result present in both reports.
+    """
+    baseline = {
+        (entry['step'], entry['csv_type'], entry['rows']): entry
+        for entry in previous.get('results', [])
+    }
+    for entry in current['results']:
+        old = baseline.get((entry['step'], entry['csv_type'], entry['rows']))
+        if not old or not old.get('rows_per_second') or not entry.get('rows_per_second'):
+            continue
+        change = (entry['rows_per_second'] - old['rows_per_second']) / old['rows_per_second'] * 100
+        yield entry['step'], entry['csv_type'], entry['rows'], old['rows_per_second'], entry['rows_per_second'], change
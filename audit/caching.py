@@ -0,0 +1,33 @@
+# caching.py
+
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import AuditDashboard
+
+
+def shared_dashboard_timeout():
+    """Seconds a rendered shared dashboard stays cached, settings.AUDIT_SHARED_DASHBOARD_CACHE_SECONDS."""
+    return getattr(settings, 'AUDIT_SHARED_DASHBOARD_CACHE_SECONDS', 15 * 60)
+
+
+def shared_dashboard_cache_key(dashboard, request):
+    """
+    Cache key of one rendering of a shared dashboard: its token and revision plus the
+    filter, hide and page parameters in a stable order. Bumping the revision makes all
+    earlier renderings unreachable, so nothing has to be deleted on writes.
+    """
+    params = urlencode(sorted((key, value) for key, values in request.GET.lists() for value in values))
+    digest = hashlib.md5(params.encode('utf-8')).hexdigest()
+    return f'audit:shared_dashboard:{dashboard.share_token}:{dashboard.revision}:{digest}'
+
+
+def invalidate_shared_dashboards(dashboard_ids=None):
+    """Bumps the revision of the given dashboards (all when None) after their rows change."""
+    dashboards = AuditDashboard.objects.all()
+    if dashboard_ids is not None:
+        dashboards = dashboards.filter(id__in=[dashboard_id for dashboard_id in dashboard_ids if dashboard_id])
+    return dashboards.update(revision=F('revision') + 1)
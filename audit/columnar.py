@@ -0,0 +1,132 @@
+# columnar.py
+
+import logging
+import math
+
+from django.conf import settings
+
+from .csv_schemas import UNICODE_MINUS
+from .ingest import iter_batches
+
+logger = logging.getLogger(__name__)
+
+# Rows converted per columnar pass
+COLUMNAR_CHUNK_SIZE = 1000
+
+
+def columnar_enabled():
+    """The columnar stage is on unless settings.AUDIT_COLUMNAR_CSV is False."""
+    return getattr(settings, 'AUDIT_COLUMNAR_CSV', True)
+
+
+class DerivedColumn:
+    """A column computed from another converted column, e.g. losing_traffic from sessions Δ."""
+
+    def __init__(self, name, source, classify):
+        self.name = name
+        self.source = source
+        self.classify = classify
+
+
+def classify_losing_traffic(percent_change_sessions):
+    if percent_change_sessions > 0:
+        return 'up'
+    if percent_change_sessions < 0:
+        return 'down'
+    return 'none'
+
+
+LOSING_TRAFFIC = DerivedColumn('losing_traffic', 'percent_change_sessions', classify_losing_traffic)
+
+
+def _fast_numeric_column(raw, type):
+    """
+    Converts a whole column of plain numbers ('1,234', '−3.5', '12%') in one comprehension.
+    Returns None if any cell is blank, unparsable or not finite, so the caller can fall
+    back to the per-cell converter and get exactly the row loop's values.
+    """
+    try:
+        if type == 'int':
+            return [int(float(value.replace(',', '').replace(UNICODE_MINUS, '-'))) for value in raw]
+        if type == 'percent':
+            values = [float(value.replace('%', '').replace(',', '').replace(UNICODE_MINUS, '-')) for value in raw]
+        else:
+            values = [float(value.replace(',', '').replace(UNICODE_MINUS, '-')) for value in raw]
+    except (ValueError, OverflowError):
+        return None
+    # inf/nan poison the sum; huge finite values may too, which only costs the fallback
+    return values if math.isfinite(sum(values)) else None
+
+
+def convert_column(column, raw):
+    """Converts one column's raw cells to typed values in a single pass."""
+    if column.type in ('int', 'float', 'percent'):
+        values = _fast_numeric_column(raw, column.type)
+        if values is not None:
+            return values
+    elif column.type == 'text':
+        return [value.strip() for value in raw]
+
+    convert, default = column.convert, column.default
+    return [convert(value, default) for value in raw]
+
+
+def _short_rows(rows, columns):
+    width = max((index for _, index in columns.resolved if index is not None), default=-1) + 1
+    return width, [row for row in rows if len(row) < width]
+
+
+def convert_chunk(rows, columns, derived=()):
+    """
+    Converts a list of csv rows into typed columns: {name: list of values}, one list per
+    schema column plus any derived columns. Rows too short for the resolved columns are
+    logged and dropped.
+    """
+    width, short = _short_rows(rows, columns)
+    if short:
+        for row in short:
+            logger.error(f"IndexError while processing row: {row} - list index out of range")
+        rows = [row for row in rows if len(row) >= width]
+
+    data = {}
+    for column, index in columns.resolved:
+        if index is None:
+            data[column.name] = [column.default] * len(rows)
+        else:
+            data[column.name] = convert_column(column, [row[index] for row in rows])
+
+    for column in derived:
+        classify = column.classify
+        data[column.name] = [classify(value) for value in data[column.source]]
+    return data
+
+
+def convert_rows(rows, columns, derived=()):
+    """The per-row equivalent of convert_chunk(), used when the columnar stage is off."""
+    data = {column.name: [] for column, _ in columns.resolved}
+    data.update((column.name, []) for column in derived)
+    for row in rows:
+        try:
+            values = columns.convert(row)
+        except IndexError as e:
+            logger.error(f"IndexError while processing row: {row} - {e}")
+            continue
+        for column in derived:
+            values[column.name] = column.classify(values[column.source])
+        for name, value in values.items():
+            data[name].append(value)
+    return data
+
+
+def iter_column_chunks(reader, columns, derived=(), chunk_size=COLUMNAR_CHUNK_SIZE, columnar=None):
+    """
+    Reads a csv reader in chunks of chunk_size non-empty rows and yields each chunk as
+    typed columns ({name: list}), so importers can zip() the columns they need instead
+    of building a dict per row. Only one chunk of raw rows is held in memory.
+    """
+    if columnar is None:
+        columnar = columnar_enabled()
+    convert = convert_chunk if columnar else convert_rows
+
+    for rows in iter_batches((row for row in reader if row), chunk_size):
+        yield convert(rows, columns, derived)
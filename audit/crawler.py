@@ -0,0 +1,413 @@
+# crawler.py
+
+import logging
+import queue
+import ssl
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import certifi
+import cloudscraper
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Define headers to mimic a real browser
+REQUEST_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/91.0.4472.124 Safari/537.36'
+    )
+}
+
+# Default crawl limits
+MAX_SITEMAP_DEPTH = 3         # How many levels of nested sitemap indexes are followed
+MAX_SITEMAPS = 500            # Sitemap documents fetched per pasted sitemap URL
+MAX_URLS = 500000             # Page URLs collected per pasted sitemap URL
+MAX_WORKERS = 8               # Concurrent sitemap downloads
+REQUEST_TIMEOUT = 10
+
+# Streaming sizes
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+ENTRY_BATCH_SIZE = 2000       # <url> entries handed to the consumer at a time
+
+SITEMAP_ENTRY_FIELDS = ('loc', 'lastmod', 'changefreq', 'priority')
+
+
+class SessionPool:
+    """
+    Keeps one cloudscraper session and one plain requests session per host for each
+    thread, so sitemaps on the same host reuse TCP/TLS connections across fetches.
+    Sessions are not thread-safe (cookie jar and adapter state), so crawler threads
+    never share one.
+    """
+
+    def __init__(self, pool_size=1):
+        self.pool_size = pool_size  # Connections kept per host by each thread's session
+        self._local = threading.local()
+
+    def get(self, url, fallback=False):
+        sessions = getattr(self._local, 'sessions', None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        key = (urlparse(url).netloc.lower(), fallback)
+        session = sessions.get(key)
+        if session is None:
+            session = sessions[key] = self._create_session(fallback)
+        return session
+
+    def _create_session(self, fallback):
+        if fallback:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            return session
+
+        # cloudscraper mounts its own TLS 1.2 adapter, so it is left untouched
+        return cloudscraper.create_scraper(ssl_context=ssl.SSLContext(ssl.PROTOCOL_TLSv1_2))
+
+
+# Shared across crawls in this process
+default_session_pool = SessionPool()
+
+
+def conditional_headers(validators):
+    """Builds If-None-Match / If-Modified-Since headers from a stored ETag and Last-Modified."""
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _parse_priority(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_sitemap_entries(chunks, sitemap_url):
+    """
+    Incrementally parses sitemap XML from an iterable of byte chunks, inflating
+    gzip'd (.xml.gz) documents on the fly. Yields (kind, entry) as soon as each
+    <url> or <sitemap> element closes, where kind is 'urlset' or 'sitemapindex' and
+    entry has loc, lastmod, changefreq and priority. Finished elements are cleared,
+    so memory use does not grow with the size of the document.
+    Raises ET.ParseError for malformed XML and zlib.error for corrupt gzip data.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    inflater = None
+    head = b''
+    root = None
+    kind = None
+
+    def drain():
+        nonlocal root, kind
+        for event, elem in parser.read_events():
+            if root is None:
+                root = elem
+                kind = _local_name(elem.tag)
+                if kind not in ('urlset', 'sitemapindex'):
+                    logger.warning(f"Unknown sitemap type for URL: {sitemap_url}")
+                    return
+                continue
+
+            if kind not in ('urlset', 'sitemapindex'):
+                return
+            if event != 'end' or elem not in root:
+                continue
+
+            entry = dict.fromkeys(SITEMAP_ENTRY_FIELDS)
+            for child in elem:
+                name = _local_name(child.tag)
+                if name in entry and child.text:
+                    entry[name] = child.text.strip()
+            root.remove(elem)
+
+            if entry['loc']:
+                entry['priority'] = _parse_priority(entry['priority'])
+                yield kind, entry
+
+    sniffed = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+
+        # Sniff the gzip magic bytes at the start of the body
+        if not sniffed:
+            head += chunk
+            if len(head) < 2:
+                continue
+            chunk, head, sniffed = head, b'', True
+            if chunk[:2] == b'\x1f\x8b':
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if not inflater:
+            parser.feed(chunk)
+            yield from drain()
+        else:
+            # Inflate in bounded pieces; a 64KB gzip chunk can expand to megabytes of XML
+            data = inflater.decompress(chunk, DOWNLOAD_CHUNK_SIZE)
+            while data:
+                parser.feed(data)
+                yield from drain()
+                data = inflater.decompress(inflater.unconsumed_tail, DOWNLOAD_CHUNK_SIZE)
+
+        if kind not in (None, 'urlset', 'sitemapindex'):
+            return
+
+    if head:
+        parser.feed(head)
+    if inflater:
+        parser.feed(inflater.flush())
+    parser.close()
+    yield from drain()
+
+
+class SitemapCrawler:
+    """
+    Crawls sitemaps concurrently, following sitemap indexes level by level up to
+    max_depth. Documents are streamed and parsed as they download; their <url>
+    entries reach the caller in batches through a bounded queue, so memory stays
+    flat no matter how large a sitemap is. Each pasted sitemap URL gets its own
+    URL and sitemap caps, and every fetched document is reported with timing stats.
+    """
+
+    def __init__(self, max_depth=MAX_SITEMAP_DEPTH, max_sitemaps=MAX_SITEMAPS, max_urls=MAX_URLS,
+                 max_workers=MAX_WORKERS, timeout=REQUEST_TIMEOUT, batch_size=ENTRY_BATCH_SIZE,
+                 session_pool=None):
+        self.max_depth = max_depth
+        self.max_sitemaps = max_sitemaps
+        self.max_urls = max_urls
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.session_pool = session_pool or default_session_pool
+
+    def open(self, sitemap_url, headers=None):
+        """
+        Opens a streaming response with cloudscraper first, falling back to requests
+        without SSL verification. Extra headers (e.g. conditional GET validators) are
+        sent along with REQUEST_HEADERS. Returns None if both fail.
+        """
+        request_headers = {**REQUEST_HEADERS, **(headers or {})}
+        for fallback in (False, True):
+            client = 'requests' if fallback else 'cloudscraper'
+            session = self.session_pool.get(sitemap_url, fallback=fallback)
+            try:
+                response = session.get(
+                    sitemap_url,
+                    headers=request_headers,
+                    timeout=self.timeout,
+                    verify=False if fallback else certifi.where(),
+                    stream=True,
+                )
+                response.raise_for_status()
+                logger.debug(f"Fetching sitemap with {client}: {sitemap_url} ({response.status_code})")
+                return response
+            except (ssl.SSLError, requests.exceptions.RequestException) as e:
+                logger.error(f"{client} failed for {sitemap_url}. Error: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected {client} error for {sitemap_url}. Error: {e}")
+
+        logger.warning(f"Both cloudscraper and requests failed to fetch the sitemap: {sitemap_url}")
+        return None
+
+    def _crawl_document(self, events, stopped, root, sitemap_url, depth, validators=None):
+        """
+        Worker task: streams one document and reports entries and stats to the events queue.
+        Each entry gets the document's URL as 'source'. validators ({'etag',
+        'last_modified', 'children'}) from an earlier crawl turn the request into a
+        conditional GET; a 304 response is reported as not_modified without parsing
+        anything, and the stored children are followed instead.
+        """
+        started = time.perf_counter()
+        validators = validators or {}
+        stats = {
+            'sitemap_url': sitemap_url, 'type': None, 'bytes': 0, 'url_count': 0, 'child_count': 0,
+            'error': None, 'not_modified': False, 'etag': None, 'last_modified': None,
+        }
+        children = []
+        batch = []
+
+        def counted(chunks):
+            for chunk in chunks:
+                stats['bytes'] += len(chunk)
+                yield chunk
+
+        try:
+            response = self.open(sitemap_url, headers=conditional_headers(validators))
+            if response is None:
+                stats['error'] = 'fetch failed'
+                return
+
+            with response:
+                stats['etag'] = response.headers.get('ETag')
+                stats['last_modified'] = response.headers.get('Last-Modified')
+                if response.status_code == 304:
+                    # A 304 may leave the validators out; the stored ones still apply
+                    stats['not_modified'] = True
+                    stats['etag'] = stats['etag'] or validators.get('etag')
+                    stats['last_modified'] = stats['last_modified'] or validators.get('last_modified')
+                    children = list(validators.get('children') or [])
+                    stats['child_count'] = len(children)
+                    return
+
+                chunks = counted(response.iter_content(DOWNLOAD_CHUNK_SIZE))
+                for kind, entry in iter_sitemap_entries(chunks, sitemap_url):
+                    if root in stopped:
+                        break
+                    stats['type'] = kind
+                    if kind == 'sitemapindex':
+                        children.append(entry['loc'])
+                        continue
+
+                    entry['source'] = sitemap_url
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        stats['url_count'] += len(batch)
+                        events.put(('entries', root, batch))
+                        batch = []
+
+            if batch and root not in stopped:
+                stats['url_count'] += len(batch)
+                events.put(('entries', root, batch))
+            stats['child_count'] = len(children)
+
+        except ET.ParseError as e:
+            logger.error(f"XML parsing error for sitemap: {sitemap_url}. Error: {e}")
+            stats['error'] = 'parse failed'
+        except zlib.error as e:
+            logger.error(f"Could not decompress sitemap: {sitemap_url}. Error: {e}")
+            stats['error'] = 'decompress failed'
+        except Exception as e:
+            logger.error(f"Error crawling sitemap: {sitemap_url}. Error: {e}")
+            stats['error'] = str(e)
+        finally:
+            stats['seconds'] = round(time.perf_counter() - started, 3)
+            events.put(('done', root, sitemap_url, depth, children, stats))
+
+    def crawl_many(self, sitemap_urls, on_entries=None, validators=None):
+        """
+        Crawls several sitemap URLs in a shared thread pool.
+
+        If on_entries is given, it is called in the calling thread as
+        on_entries(sitemap_url, entries) with batches of entry dicts, which keeps
+        database writes out of the worker threads. Otherwise the locs are collected
+        in each result's 'urls' list.
+        validators optionally maps sitemap URLs to the 'documents' of an earlier crawl
+        of them; every document listed there, top-level or child, is fetched with a
+        conditional GET, and the stored children of an unmodified index are followed.
+        Returns {sitemap_url: {'url_count': n, 'urls': [...], 'stats': [...], 'not_modified': bool,
+        'truncated': bool, 'documents': {...}}} in input order, where not_modified means
+        every fetched document answered 304 and documents maps each document fetched
+        without error to its {'etag', 'last_modified', 'children'}.
+        """
+        validators = validators or {}
+        results = {
+            url: {'url_count': 0, 'urls': [], 'stats': [], 'not_modified': False, 'truncated': False, 'documents': {}}
+            for url in sitemap_urls
+        }
+        seen = {url: {url} for url in sitemap_urls}
+        stopped = set()
+        # Bounded, so workers wait for the consumer instead of buffering whole sitemaps
+        events = queue.Queue(maxsize=self.max_workers * 2)
+        pending = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def submit(root, sitemap_url, depth):
+                nonlocal pending
+                pending += 1
+                document_validators = validators.get(root, {}).get(sitemap_url)
+                executor.submit(self._crawl_document, events, stopped, root, sitemap_url, depth, document_validators)
+
+            for url in sitemap_urls:
+                submit(url, url, 0)
+
+            try:
+                while pending:
+                    message = events.get()
+
+                    if message[0] == 'entries':
+                        _, root, entries = message
+                        result = results[root]
+                        room = self.max_urls - result['url_count']
+                        if room <= 0:
+                            continue
+                        if len(entries) >= room:
+                            if len(entries) > room:
+                                logger.warning(f"URL cap of {self.max_urls} reached for {root}")
+                            entries = entries[:room]
+                            stopped.add(root)
+                            result['truncated'] = True
+
+                        result['url_count'] += len(entries)
+                        if on_entries:
+                            on_entries(root, entries)
+                        else:
+                            result['urls'].extend(entry['loc'] for entry in entries)
+                        continue
+
+                    _, root, sitemap_url, depth, children, stats = message
+                    pending -= 1
+                    stats['depth'] = depth
+                    results[root]['stats'].append(stats)
+                    if not stats['error']:
+                        results[root]['documents'][sitemap_url] = {
+                            'etag': stats['etag'], 'last_modified': stats['last_modified'], 'children': children,
+                        }
+                    if stats['not_modified']:
+                        logger.info(f"Sitemap {sitemap_url} not modified since the last crawl")
+                    else:
+                        logger.info(
+                            f"Sitemap {sitemap_url} ({stats['type']}, depth {depth}): {stats['url_count']} URLs, "
+                            f"{stats['child_count']} child sitemaps, {stats['bytes']} bytes in {stats['seconds']}s"
+                        )
+
+                    if not children or root in stopped:
+                        continue
+                    # Skipped children leave the crawl incomplete, so nothing is removed on their account
+                    if depth >= self.max_depth:
+                        logger.warning(f"Max sitemap depth {self.max_depth} reached at {sitemap_url}; not following children")
+                        results[root]['truncated'] = True
+                        continue
+                    for loc in children:
+                        if loc in seen[root]:
+                            continue
+                        if len(seen[root]) >= self.max_sitemaps:
+                            logger.warning(f"Sitemap cap of {self.max_sitemaps} reached for {root}")
+                            results[root]['truncated'] = True
+                            break
+                        seen[root].add(loc)
+                        submit(root, loc, depth + 1)
+
+            except BaseException:
+                # Stop the workers and drain the queue so none stays blocked on put()
+                stopped.update(results)
+                while pending:
+                    if events.get()[0] == 'done':
+                        pending -= 1
+                raise
+
+        for result in results.values():
+            result['not_modified'] = all(stats['not_modified'] for stats in result['stats'])
+        return results
+
+    def crawl(self, sitemap_url, on_entries=None, validators=None):
+        """Crawls a single sitemap URL; validators is its 'documents' from an earlier crawl. See crawl_many()."""
+        validators = {sitemap_url: validators} if validators else None
+        return self.crawl_many([sitemap_url], on_entries=on_entries, validators=validators)[sitemap_url]
@@ -0,0 +1,199 @@
+# csv_schemas.py
+
+import math
+
+# Unicode minus used by some analytics exports for negative changes
+UNICODE_MINUS = '−'
+
+
+def normalize_header(header):
+    """Headers are matched case-insensitively, ignoring surrounding whitespace."""
+    return header.strip().lower()
+
+
+# Typed converters: each takes the raw cell and the column default, and returns
+# the default for blank or unparsable cells instead of raising.
+
+def parse_text(value, default=None):
+    return value.strip()
+
+
+def parse_float(value, default=0.0):
+    value = value.strip().replace(',', '').replace(UNICODE_MINUS, '-')
+    if not value:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        return default
+    return number if math.isfinite(number) else default
+
+
+def parse_int(value, default=0):
+    """Integers with thousands separators ('12,345'); '12.0' style floats are truncated."""
+    number = parse_float(value, None)
+    return int(number) if number is not None else default
+
+
+def parse_percent(value, default=0.0):
+    """Percentages like '12.5%' or '−3%', kept on the 0-100 scale."""
+    return parse_float(value.replace('%', ''), default)
+
+
+def parse_duration(value, default='0:00'):
+    """Durations ('0:01:23' or seconds) are stored as exported, for display."""
+    value = value.strip()
+    return value[:20] if value else default
+
+
+CONVERTERS = {
+    'text': parse_text,
+    'int': parse_int,
+    'float': parse_float,
+    'percent': parse_percent,
+    'duration': parse_duration,
+}
+
+
+class Column:
+    """
+    One logical column of an export: the header aliases it may appear under (in order
+    of preference), its value type and the default used when it is missing or blank.
+    """
+
+    def __init__(self, name, aliases, type='text', default=None, required=True):
+        self.name = name
+        self.aliases = [normalize_header(alias) for alias in aliases]
+        self.type = type
+        self.convert = CONVERTERS[type]
+        self.default = default
+        self.required = required
+
+
+class ColumnMap:
+    """
+    The columns of a schema resolved against one file's header row. convert(row)
+    turns a csv row into {column name: typed value} using the precompiled plan.
+    """
+
+    def __init__(self, schema, indexes):
+        self.schema = schema
+        self.indexes = indexes
+        self.resolved = [(column, indexes.get(column.name)) for column in schema.columns]
+        self._plan = [
+            (column.name, indexes.get(column.name), column.convert, column.default)
+            for column in schema.columns
+        ]
+
+    def __getitem__(self, name):
+        return self.indexes.get(name)
+
+    @property
+    def missing(self):
+        return [column.name for column in self.schema.columns if column.required and column.name not in self.indexes]
+
+    def convert(self, row):
+        """Raises IndexError for short rows, like indexing the row directly would."""
+        values = {}
+        for name, index, convert, default in self._plan:
+            values[name] = default if index is None else convert(row[index], default)
+        return values
+
+
+class CSVSchema:
+    """
+    A named export format. The alias -> (column, preference) map is compiled once, so
+    resolving a header row is one dict lookup per header.
+    """
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+        self.aliases = {}
+        for column in columns:
+            for rank, alias in enumerate(column.aliases):
+                self.aliases.setdefault(alias, (column.name, rank))
+
+    def resolve(self, headers):
+        """Maps column names to header indexes, preferring earlier aliases."""
+        indexes = {}
+        ranks = {}
+        for index, header in enumerate(headers):
+            match = self.aliases.get(normalize_header(header))
+            if match is None:
+                continue
+            name, rank = match
+            if name not in ranks or rank <= ranks[name]:
+                indexes[name] = index
+                ranks[name] = rank
+        return ColumnMap(self, indexes)
+
+
+class SchemaRegistry:
+    """Ordered set of schemas; the first one whose required columns are all present wins."""
+
+    def __init__(self, schemas=()):
+        self.schemas = []
+        for schema in schemas:
+            self.register(schema)
+
+    def register(self, schema):
+        self.schemas.append(schema)
+        return schema
+
+    def identify(self, headers):
+        """Returns (schema name, ColumnMap), or ('unknown', None) if no schema matches."""
+        for schema in self.schemas:
+            columns = schema.resolve(headers)
+            if not columns.missing:
+                return schema.name, columns
+        return 'unknown', None
+
+
+# Audit exports, checked in this order. Column names match the UploadedFile fields
+# they fill where there is one.
+SCREAMING_FROG = CSVSchema('screaming_frog', [
+    Column('url', ['address', 'url']),
+    Column('type', ['content type', 'type']),
+    Column('current_title', ['title 1', 'title']),
+    Column('meta', ['meta description 1', 'meta description']),
+    Column('h1', ['h1-1', 'h1']),
+    Column('word_count', ['word count'], 'int', 0),
+    Column('canonical_link', ['canonical link element 1', 'canonical link']),
+    Column('status_code', ['status code', 'status']),
+    Column('index_status', ['indexability']),
+    Column('inlinks', ['inlinks'], 'int', 0),
+    Column('outlinks', ['outlinks'], 'int', 0),
+    Column('crawl_depth', ['crawl depth'], 'int', 0),
+])
+
+SEARCH_CONSOLE = CSVSchema('search_console', [
+    Column('url', ['top pages', 'page', 'url']),
+    Column('impressions', ['impressions', 'total impressions'], 'int', 0),
+    Column('ctr', ['ctr', 'click through rate'], 'percent', 0.0),
+])
+
+GOOGLE_ANALYTICS = CSVSchema('google_analytics', [
+    Column('page_path', ['page path and screen class', 'page path']),
+    Column('sessions', ['sessions'], 'int', 0),
+    Column('bounce_rate', ['bounce rate', 'bounce rate (%)'], 'percent', 0.0),
+    Column('avg_session_duration', ['average session duration', 'avg. session duration'], 'duration', '0:00'),
+    Column('percent_change_sessions', [
+        'sessions Δ', 'sessions delta', 'sessions δ', 'sessions Δ (%)', 'sessions delta (%)',
+        'sessions change (%)', 'sessions change',
+    ], 'percent', 0.0),
+])
+
+KEYWORD_RESEARCH = CSVSchema('keyword_research', [
+    Column('keyword', ['keyword']),
+    Column('search_vol', ['search vol.'], 'int', 0),
+    Column('position', ['position'], 'int', None),  # Unranked keywords have no position
+    Column('url', ['url']),
+])
+
+BACKLINKS = CSVSchema('backlinks', [
+    Column('backlink_url', ['backlink url']),
+    Column('destination_url', ['destination url']),
+])
+
+audit_schemas = SchemaRegistry([SCREAMING_FROG, SEARCH_CONSOLE, GOOGLE_ANALYTICS, KEYWORD_RESEARCH, BACKLINKS])
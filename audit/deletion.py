@@ -0,0 +1,80 @@
+# deletion.py
+
+import logging
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import ProtectedError
+
+logger = logging.getLogger(__name__)
+
+
+def _stored_files(queryset):
+    """(storage, name) of every file a FileField of the queryset rows points to."""
+    files = []
+    for field in queryset.model._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            names = queryset.filter(**{f'{field.name}__gt': ''}).values_list(field.name, flat=True)
+            files.extend((field.storage, name) for name in names)
+    return files
+
+
+def _delete_stored_files(files):
+    for storage, name in files:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.exception(f"Could not delete {name} from storage.")
+
+
+def _cascade(queryset, deleted, files):
+    """
+    Deletes everything that depends on `queryset` children first, each relation as one
+    DELETE ... WHERE fk IN (subquery) or UPDATE ... SET fk = NULL, then the queryset
+    itself with a single DELETE. Only the names in FileFields (of upload jobs) are
+    loaded into Python; they are added to `files`, as the raw DELETE leaves them on disk.
+    """
+    for relation in queryset.model._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': queryset})
+        on_delete = relation.on_delete
+        if on_delete is models.CASCADE:
+            _cascade(related, deleted, files)
+        elif on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif on_delete is models.DO_NOTHING:
+            continue
+        elif on_delete in (models.PROTECT, models.RESTRICT):
+            if related.exists():
+                raise ProtectedError(
+                    f"Cannot delete {queryset.model._meta.label} rows referenced by {related.model._meta.label}.",
+                    set(),
+                )
+        else:
+            # SET_DEFAULT / SET(...) need per-row values; let Django's collector handle them
+            count, _ = related.delete()
+            deleted[related.model._meta.label] += count
+
+    files.extend(_stored_files(queryset))
+    deleted[queryset.model._meta.label] += queryset._raw_delete(queryset.db)
+
+
+def bulk_delete(queryset):
+    """
+    Set-based replacement for queryset.delete() on large dashboards: Django's collector
+    fetches every cascaded UploadedFile and KeywordResearchEntry before deleting them,
+    which a 500k-row audit cannot afford. Delete signals are not sent (the audit and
+    keyword models have no receivers); the files of deleted rows, such as AuditUploadJob
+    uploads, are removed from storage once the transaction commits. Returns
+    (total, {model label: count}) like delete().
+    """
+    deleted = Counter()
+    files = []
+    with transaction.atomic(using=queryset.db):
+        _cascade(queryset, deleted, files)
+        if files:
+            transaction.on_commit(lambda: _delete_stored_files(files), using=queryset.db)
+    deleted = {label: count for label, count in deleted.items() if count}
+    logger.info(f"Bulk deleted {deleted}.")
+    return sum(deleted.values()), deleted
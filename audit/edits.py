@@ -0,0 +1,86 @@
+# edits.py
+
+import logging
+
+from django.db import transaction
+
+from .models import UploadedFile
+from .summaries import apply_choice_changes
+
+logger = logging.getLogger(__name__)
+
+# Dashboard dropdown fields that can be edited inline, with the values they accept
+EDITABLE_FIELDS = {
+    'action_choice': {key for key, _ in UploadedFile.ACTION_CHOICES},
+    'category': {key for key, _ in UploadedFile.CATEGORY_CHOICES},
+}
+MAX_BATCH_EDITS = 1000
+
+
+class InvalidEdit(ValueError):
+    pass
+
+
+def validate_edits(edits):
+    """
+    Checks a list of {'id', 'field', 'value'} edits against the editable fields and their
+    choices and returns {(id, field): value}. Later edits of the same cell win, so a
+    client can send its queue as-is.
+    """
+    if not isinstance(edits, list) or not edits:
+        raise InvalidEdit("Expected a non-empty list of edits.")
+    if len(edits) > MAX_BATCH_EDITS:
+        raise InvalidEdit(f"At most {MAX_BATCH_EDITS} edits can be sent at once.")
+
+    cleaned = {}
+    for index, edit in enumerate(edits):
+        if not isinstance(edit, dict):
+            raise InvalidEdit(f"Edit {index} is not an object.")
+        field, value = edit.get('field'), edit.get('value')
+        try:
+            audit_id = int(edit.get('id'))
+        except (TypeError, ValueError):
+            raise InvalidEdit(f"Edit {index} has an invalid id.")
+        if field not in EDITABLE_FIELDS:
+            raise InvalidEdit(f"Edit {index}: '{field}' cannot be edited.")
+        if value not in EDITABLE_FIELDS[field]:
+            raise InvalidEdit(f"Edit {index}: '{value}' is not a valid {field}.")
+        cleaned[(audit_id, field)] = value
+    return cleaned
+
+
+def apply_edits(edits):
+    """
+    Validates and applies a batch of inline edits in one transaction: the rows are read
+    once, only the fields that actually change are written with bulk_update, and the
+    dashboard summaries get the matching count deltas. Unknown ids fail the whole batch.
+    Returns the number of rows updated.
+    """
+    cleaned = validate_edits(edits)
+    ids = {audit_id for audit_id, _ in cleaned}
+
+    with transaction.atomic():
+        rows = UploadedFile.objects.select_for_update().only('id', 'dashboard_id', *EDITABLE_FIELDS).in_bulk(ids)
+        missing = ids - set(rows)
+        if missing:
+            raise InvalidEdit(f"Audit entries not found: {', '.join(map(str, sorted(missing)))}.")
+
+        changed_rows = {}
+        changed_fields = set()
+        summary_changes = []
+        for (audit_id, field), value in cleaned.items():
+            row = rows[audit_id]
+            previous = getattr(row, field)
+            if previous == value:
+                continue
+            setattr(row, field, value)
+            changed_rows[audit_id] = row
+            changed_fields.add(field)
+            summary_changes.append((row.dashboard_id, field, previous, value))
+
+        if changed_rows:
+            UploadedFile.objects.bulk_update(changed_rows.values(), sorted(changed_fields), batch_size=500)
+            apply_choice_changes(summary_changes)
+
+    logger.info(f"Applied {len(cleaned)} inline edits, {len(changed_rows)} rows changed.")
+    return len(changed_rows)
@@ -0,0 +1,166 @@
+# ingest.py
+
+import codecs
+import logging
+import time
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+# Number of rows written per bulk_create() call
+INGEST_BATCH_SIZE = 2000
+
+# Size of the byte chunks read from the upload while decoding
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+def iter_file_chunks(file, chunk_size=DECODE_CHUNK_SIZE):
+    """
+    Yields raw byte chunks from a Django UploadedFile or any binary file object.
+    """
+    if hasattr(file, 'chunks'):
+        yield from file.chunks(chunk_size)
+        return
+
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def iter_decoded_lines(file, encoding='utf-8-sig', chunk_size=DECODE_CHUNK_SIZE):
+    """
+    Decodes the file incrementally and yields one text line at a time.
+    Line endings are kept so csv.reader can still join quoted multi-line fields,
+    and the BOM (\\ufeff) is dropped by the default 'utf-8-sig' codec.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+
+    for chunk in iter_file_chunks(file, chunk_size):
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+
+        # The last piece may be a partial line (or a '\r' whose '\n' is in the next chunk)
+        pending = ''
+        if lines and not lines[-1].endswith('\n'):
+            pending = lines.pop()
+
+        yield from lines
+
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_batches(iterable, batch_size=INGEST_BATCH_SIZE):
+    """
+    Splits an iterable into lists of at most batch_size items without materialising it.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+        yield batch
+
+
+def field_max_lengths(model):
+    """Maps the attnames of the model's length-limited columns to their max_length."""
+    return {field.attname: field.max_length for field in model._meta.concrete_fields if field.max_length}
+
+
+def clamp_lengths(instance, max_lengths):
+    """
+    Truncates string values longer than their column allows, which PostgreSQL would
+    reject along with the rest of the batch. Returns the names of the clamped fields.
+    """
+    clamped = []
+    for name, max_length in max_lengths.items():
+        value = getattr(instance, name)
+        if isinstance(value, str) and len(value) > max_length:
+            setattr(instance, name, value[:max_length])
+            clamped.append(name)
+    return clamped
+
+
+def _insert_rows(model, batch):
+    """Inserts a rejected batch one row at a time, each in a savepoint. Returns (inserted, skipped)."""
+    inserted = skipped = 0
+    for instance in batch:
+        try:
+            with transaction.atomic():
+                instance.save(force_insert=True)
+            inserted += 1
+        except DatabaseError as e:
+            skipped += 1
+            logger.error(f"Skipped {model.__name__} row the database rejected: {e}")
+    return inserted, skipped
+
+
+def bulk_ingest(model, objects, batch_size=INGEST_BATCH_SIZE):
+    """
+    Writes model instances from an iterable with batched bulk_create() calls inside one transaction.
+    Only one batch is held in memory at a time. A batch the database rejects is rolled
+    back to its savepoint and inserted row by row, so a bad row only costs itself.
+    Returns a dict with the inserted and skipped row counts, elapsed seconds and
+    throughput (rows per second).
+    """
+    rows = skipped = 0
+    started = time.perf_counter()
+
+    with transaction.atomic():
+        for batch in iter_batches(objects, batch_size):
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch, batch_size=batch_size)
+                inserted = len(batch)
+            except DatabaseError as e:
+                logger.warning(f"{model.__name__} batch rejected ({e}); inserting its rows one by one")
+                inserted, batch_skipped = _insert_rows(model, batch)
+                skipped += batch_skipped
+            rows += inserted
+            logger.debug(f"Inserted batch of {inserted} {model.__name__} rows ({rows} total)")
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = rows / elapsed if elapsed > 0 else float(rows)
+    logger.info(
+        f"Ingested {rows} {model.__name__} rows in {elapsed:.2f}s ({rows_per_second:.0f} rows/s), {skipped} skipped"
+    )
+
+    return {
+        'rows': rows,
+        'skipped': skipped,
+        'seconds': elapsed,
+        'rows_per_second': rows_per_second,
+    }
+
+
+def bulk_merge(model, changes, fields, batch_size=INGEST_BATCH_SIZE):
+    """
+    Applies collected per-row changes with batched bulk_update() calls inside one transaction.
+    changes maps primary keys to {field: value} dicts, and only the listed fields are written.
+    Returns the same stats dict as bulk_ingest().
+    """
+    rows = 0
+    started = time.perf_counter()
+    objects = (model(pk=pk, **values) for pk, values in changes.items())
+
+    with transaction.atomic():
+        for batch in iter_batches(objects, batch_size):
+            model.objects.bulk_update(batch, fields, batch_size=batch_size)
+            rows += len(batch)
+            logger.debug(f"Updated batch of {len(batch)} {model.__name__} rows ({rows} total)")
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = rows / elapsed if elapsed > 0 else float(rows)
+    logger.info(f"Merged {fields} into {rows} {model.__name__} rows in {elapsed:.2f}s ({rows_per_second:.0f} rows/s)")
+
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows_per_second,
+    }
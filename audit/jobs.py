@@ -0,0 +1,212 @@
+# jobs.py
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaFileUpload
+
+from .models import AuditUploadJob
+from .views import (
+    GOOGLE_DRIVE_FIXED_FOLDER_ID,
+    get_drive_credentials,
+    process_csv_file,
+    update_in_sitemap_status,
+)
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 30  # Seconds between heartbeats of a running job
+STALE_JOB_TIMEOUT = timedelta(minutes=5)  # A running job without a heartbeat for this long is reclaimed
+MAX_ATTEMPTS = 3  # Claims per job before a stale upload is failed instead of re-queued
+
+
+def get_drive_service():
+    """Builds a Google Drive client, or returns None if authentication fails."""
+    creds = get_drive_credentials()
+    if not creds:
+        return None
+    return build('drive', 'v3', credentials=creds)
+
+
+def upload_to_drive(drive_service, file_path, file_name):
+    """Uploads a stored CSV to the fixed Drive folder and returns (file_id, webViewLink)."""
+    file_metadata = {
+        'name': file_name,
+        'parents': [GOOGLE_DRIVE_FIXED_FOLDER_ID],
+        'mimeType': 'text/csv'
+    }
+    media = MediaFileUpload(file_path, mimetype='text/csv')
+
+    uploaded_file_drive = drive_service.files().create(
+        body=file_metadata,
+        media_body=media,
+        fields='id, webViewLink'
+    ).execute()
+
+    return uploaded_file_drive.get('id'), uploaded_file_drive.get('webViewLink')
+
+
+def claim_next_job():
+    """
+    Atomically moves the oldest queued job to 'uploading' and returns it.
+    Rows locked by another worker are skipped, so several workers can run side by side.
+    """
+    with transaction.atomic():
+        job = (
+            AuditUploadJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'uploading'
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+
+    return job
+
+
+def reclaim_stale_jobs(timeout=STALE_JOB_TIMEOUT):
+    """
+    Recovers jobs whose worker died: running, with no heartbeat for `timeout`. Jobs
+    that were still uploading to Drive go back to the queue until they have been
+    claimed MAX_ATTEMPTS times. Jobs that were processing are failed, since their
+    rows may already be imported and a second run would duplicate them.
+    Returns (requeued, failed).
+    """
+    now = timezone.now()
+    stale = AuditUploadJob.objects.filter(status__in=['uploading', 'processing']).filter(
+        Q(heartbeat_at__lt=now - timeout) | Q(heartbeat_at__isnull=True, started_at__lt=now - timeout)
+    )
+    requeued = stale.filter(status='uploading', attempts__lt=MAX_ATTEMPTS).update(status='queued', started_at=None)
+
+    failed = 0
+    for job in stale:
+        if job.file:
+            job.file.delete(save=False)
+        failed += AuditUploadJob.objects.filter(pk=job.pk, status=job.status).update(
+            status='failed', file='', finished_at=now,
+            error="The worker stopped responding while running this job. Please upload the file again.",
+        )
+
+    if requeued or failed:
+        logger.warning(f"Reclaimed stale upload jobs: {requeued} re-queued, {failed} failed.")
+    return requeued, failed
+
+
+class Heartbeat:
+    """
+    Touches job.heartbeat_at from a background thread while a job runs, so a slow
+    import is not mistaken for a dead worker by reclaim_stale_jobs().
+    """
+
+    def __init__(self, job, interval=HEARTBEAT_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'upload-job-{job.id}-heartbeat', daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                AuditUploadJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def _set_status(job, status, **fields):
+    job.status = status
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=['status', *fields])
+
+
+def run_upload_job(job, drive_service=None):
+    """
+    Runs one claimed job: Drive upload, CSV processing and the 'In Sitemap' refresh.
+    drive_service can be any object exposing files().create(...).execute(), which lets
+    tests pass a fake client. A heartbeat is kept while it runs (see reclaim_stale_jobs),
+    and the stored upload is removed once the job finishes.
+    """
+    try:
+        with Heartbeat(job):
+            _run_upload_steps(job, drive_service)
+
+    except Exception as e:
+        logger.error(f"Job {job.id} failed: {e}")
+        _set_status(job, 'failed', error=str(e), finished_at=timezone.now())
+
+    finally:
+        if job.file:
+            job.file.delete(save=False)
+            job.save(update_fields=['file'])
+
+    return job
+
+
+def _run_upload_steps(job, drive_service):
+    if drive_service is None:
+        drive_service = get_drive_service()
+    if drive_service is None:
+        raise Exception("Google Drive authentication failed.")
+
+    # Step 1: Upload the file to Google Drive
+    drive_file_id, drive_file_link = upload_to_drive(drive_service, job.file.path, job.file_name)
+    if not drive_file_id or not drive_file_link:
+        raise Exception("Failed to upload file to Google Drive")
+    logger.info(f"Job {job.id}: file uploaded to Google Drive: {drive_file_id}, link: {drive_file_link}")
+
+    _set_status(job, 'processing', drive_file_id=drive_file_id, drive_file_link=drive_file_link)
+
+    # Step 2: Process the CSV data
+    with job.file.open('rb') as csv_file:
+        records_processed = process_csv_file(csv_file, job.dashboard)
+
+    if records_processed <= 0:
+        raise Exception("The CSV file is empty or could not be processed.")
+
+    # Step 3: Update the 'In Sitemap' status after saving the uploaded data
+    update_in_sitemap_status(job.dashboard)
+
+    _set_status(job, 'completed', records_processed=records_processed, finished_at=timezone.now())
+    logger.info(f"Job {job.id}: completed, {records_processed} records processed.")
+
+
+def run_pending_jobs(drive_service=None, max_jobs=None):
+    """
+    Processes queued jobs in the current process until the queue is empty
+    (or max_jobs have run). Returns the number of jobs processed.
+    """
+    reclaim_stale_jobs()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_upload_job(job, drive_service=drive_service)
+        processed += 1
+    return processed
+
+
+def work_forever(poll_interval=5, drive_service=None):
+    """Worker loop used by the process_upload_jobs management command."""
+    while True:
+        if not run_pending_jobs(drive_service=drive_service):
+            time.sleep(poll_interval)
@@ -0,0 +1,74 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from audit.benchmarks import BENCHMARK_SIZES, BENCHMARK_TYPES, compare_reports, run_benchmarks
+
+BENCHMARK_USERNAME = 'benchmark'
+
+
+def parse_sizes(value):
+    try:
+        sizes = [int(size.strip().lower().replace('k', '000').replace('m', '000000')) for size in value.split(',')]
+    except ValueError:
+        raise CommandError(f"Invalid --sizes value: {value}")
+    if any(size <= 0 for size in sizes):
+        raise CommandError("Sizes must be positive.")
+    return sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports synthetic Screaming Frog, Search Console, Analytics, keyword and backlink exports "
+        "through process_csv_file and update_in_sitemap_status, and writes rows/s, query counts and "
+        "peak RSS per step to a JSON report. Run against a local database only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(str(size) for size in BENCHMARK_SIZES),
+            help="Comma-separated row counts, e.g. 1k,10k,100k,1m.",
+        )
+        parser.add_argument(
+            '--type', dest='types', action='append', choices=BENCHMARK_TYPES,
+            help="Export type to import (repeatable). Enrichment types need screaming_frog rows to merge into.",
+        )
+        parser.add_argument('--output', default='benchmark.json', help="Path of the JSON report.")
+        parser.add_argument('--compare', help="Previous JSON report to compare rows/s against.")
+
+    def handle(self, *args, **options):
+        sizes = parse_sizes(options['sizes'])
+        # Keep the import order: the crawl first, then the exports merged into it
+        types = [csv_type for csv_type in BENCHMARK_TYPES if csv_type in (options['types'] or BENCHMARK_TYPES)]
+
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as file:
+                    previous = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        user, _ = get_user_model().objects.get_or_create(username=BENCHMARK_USERNAME)
+
+        def log(entry):
+            self.stdout.write(
+                f"{entry['step']:>24} {entry['csv_type']:>16} {entry['rows']:>9} rows: "
+                f"{entry['seconds']:.2f}s, {entry['rows_per_second'] or 0:,.0f} rows/s, "
+                f"{entry['queries']} queries, {entry['peak_rss_mb']} MB peak ({entry['memory_source']})"
+            )
+
+        report = run_benchmarks(user, sizes=sizes, csv_types=types, log=log)
+
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']} (commit {report['commit']})."))
+
+        if previous:
+            self.stdout.write(f"Compared with {options['compare']} (commit {previous.get('commit')}):")
+            for step, csv_type, rows, old, new, change in compare_reports(previous, report):
+                style = self.style.ERROR if change < -10 else self.style.SUCCESS if change > 10 else str
+                self.stdout.write(style(
+                    f"{step:>24} {csv_type:>16} {rows:>9} rows: {old:,.0f} -> {new:,.0f} rows/s ({change:+.1f}%)"
+                ))
@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.utils.html import format_html
+
+from audit.forms import UploadedFileForm
+from audit.models import UploadedFile
+from audit.tables import UploadedFileTable
+
+# The dropdown cells as custom_table.html and UploadedFileTable rendered them before the
+# option markup was precomputed: an unused form per row plus a loop over the choices
+LEGACY_SELECTS = Template(
+    '<select name="action_choice" class="action-dropdown">'
+    '{% for key, value in record.ACTION_CHOICES %}'
+    '<option value="{{ key }}" {% if record.action_choice == key %}selected{% endif %}>{{ value }}</option>'
+    '{% endfor %}</select>'
+    '<select name="category" class="category-dropdown">'
+    '{% for key, value in record.CATEGORY_CHOICES %}'
+    '<option value="{{ key }}" {% if record.category == key %}selected{% endif %}>{{ value }}</option>'
+    '{% endfor %}</select>'
+)
+
+
+def legacy_options(record, choices, current):
+    UploadedFileForm(instance=record)
+    options_html = ""
+    for key, choice in choices:
+        selected = "selected" if current == key else ""
+        options_html += f'<option value="{key}" {selected}>{choice}</option>'
+    return format_html('<select>{}</select>', options_html)
+
+
+def render_legacy(records):
+    for record in records:
+        legacy_options(record, record.ACTION_CHOICES, record.action_choice)
+        legacy_options(record, record.CATEGORY_CHOICES, record.category)
+        LEGACY_SELECTS.render(Context({'record': record}))
+
+
+def render_precomputed(records):
+    table = UploadedFileTable(records, orderable=False)
+    for row in table.rows:
+        row.get_cell('action_choice')
+        row.get_cell('category')
+
+
+def synthetic_records(rows):
+    actions = [key for key, _ in UploadedFile.ACTION_CHOICES]
+    categories = [key for key, _ in UploadedFile.CATEGORY_CHOICES] + [None]
+    return [
+        UploadedFile(
+            id=index + 1, url=f'https://www.example.com/page-{index}/', page_path=f'/page-{index}/',
+            action_choice=actions[index % len(actions)], category=categories[index % len(categories)],
+        )
+        for index in range(rows)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Measures the per-row cost of rendering the action/category dropdown cells, before and after precomputing the option markup."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='15,100,1000', help="Comma-separated page sizes.")
+        parser.add_argument('--repeat', type=int, default=20, help="Renders per measurement; the fastest is kept.")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        for rows in sizes:
+            records = synthetic_records(rows)
+            results = {}
+            for mode, render in (('before', render_legacy), ('after', render_precomputed)):
+                best = None
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    render(records)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                results[mode] = best / rows * 1e6
+
+            self.stdout.write(
+                f"{rows:>5} rows: before {results['before']:.1f} µs/row, after {results['after']:.1f} µs/row "
+                f"({results['before'] / results['after']:.1f}x)"
+            )
+
+        # Whole-table render through custom_table.html, as {% render_table %} does it, for context
+        request = RequestFactory().get('/')
+        template = get_template(UploadedFileTable._meta.template_name)
+        template.render({'table': UploadedFileTable(synthetic_records(1), orderable=False)}, request)  # Warm up
+        for rows in sizes:
+            table = UploadedFileTable(synthetic_records(rows), orderable=False)
+            started = time.perf_counter()
+            template.render({'table': table}, request)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{rows:>5} rows: full table render {elapsed / rows * 1e6:.1f} µs/row")
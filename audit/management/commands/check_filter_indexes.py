@@ -0,0 +1,101 @@
+import importlib
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from audit.filters import UploadedFileFilter
+from audit.models import UploadedFile
+
+TRIGRAM_INDEX = importlib.import_module('audit.migrations.0029_uploadedfile_url_trigram_index').TRIGRAM_INDEX
+
+
+def model_index(*fields):
+    """Name of the UploadedFile Meta index on exactly these fields."""
+    for index in UploadedFile._meta.indexes:
+        if tuple(index.fields) == fields:
+            return index.name
+    raise CommandError(f"UploadedFile has no index on {fields}.")
+
+
+def plan_indexes(plan):
+    """All index names used anywhere in an EXPLAIN (FORMAT JSON) plan tree."""
+    names = set()
+    if 'Index Name' in plan:
+        names.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        names |= plan_indexes(child)
+    return names
+
+
+def explain(queryset, force_index):
+    sql, params = queryset.query.sql_with_params()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if force_index:
+            # Small development tables would otherwise always be scanned sequentially
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN for representative UploadedFileFilter combinations and fails if the "
+        "filter indexes are not used. Needs PostgreSQL with the audit migrations applied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dashboard', type=int, help="Dashboard id to filter on (default: the largest one).")
+        parser.add_argument(
+            '--natural-plans', action='store_true',
+            help="Do not disable sequential scans, to see the plans the planner picks for the current data.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(f"Index checks need PostgreSQL; skipped on {connection.vendor}."))
+            return
+
+        dashboard_id = options['dashboard']
+        if dashboard_id is None:
+            largest = (
+                UploadedFile.objects.filter(dashboard__isnull=False)
+                .values('dashboard').annotate(rows=Count('id')).order_by('-rows').first()
+            )
+            dashboard_id = largest['dashboard'] if largest else 0
+
+        dashboard_files = UploadedFile.objects.filter(dashboard_id=dashboard_id)
+
+        def filtered(**params):
+            return UploadedFileFilter(params, queryset=dashboard_files).qs
+
+        cases = [
+            ("action choice", filtered(action_choice='301'), {model_index('dashboard', 'action_choice')}),
+            ("in sitemap", filtered(in_sitemap='False'), {model_index('dashboard', 'in_sitemap')}),
+            ("url contains", UploadedFileFilter({'url_contains': 'contains', 'url_value': 'blog'}, queryset=UploadedFile.objects.all()).qs, {TRIGRAM_INDEX}),
+            (
+                "action choice + url contains",
+                filtered(action_choice='merge', url_contains='contains', url_value='blog'),
+                {model_index('dashboard', 'action_choice'), TRIGRAM_INDEX},
+            ),
+            ("keyset page", dashboard_files.order_by('id')[:16], {model_index('dashboard', 'id')}),
+        ]
+
+        failures = []
+        for description, queryset, expected in cases:
+            used = plan_indexes(explain(queryset, force_index=not options['natural_plans']))
+            # Any of the expected indexes is enough where the planner may pick one of several
+            if used & expected:
+                self.stdout.write(self.style.SUCCESS(f"{description}: uses {', '.join(sorted(used & expected))}"))
+            else:
+                failures.append(description)
+                self.stdout.write(self.style.ERROR(
+                    f"{description}: expected {', '.join(sorted(expected))}, plan uses {', '.join(sorted(used)) or 'no index'}"
+                ))
+
+        if failures:
+            raise CommandError(f"Filter indexes not used for: {', '.join(failures)}")
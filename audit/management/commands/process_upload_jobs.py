@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from audit.jobs import run_pending_jobs, work_forever
+
+
+class Command(BaseCommand):
+    help = "Runs queued audit file uploads (Google Drive upload and CSV processing)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process the queued jobs and exit instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=5, help="Seconds to wait between polls when the queue is empty.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = run_pending_jobs()
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} upload job(s)."))
+            return
+
+        self.stdout.write(f"Waiting for upload jobs (polling every {options['poll_interval']}s)...")
+        work_forever(poll_interval=options['poll_interval'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from audit.summaries import refresh_dashboard_summaries
+
+
+class Command(BaseCommand):
+    help = "Recomputes the per-dashboard summary stats shown on the dashboard list."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', type=int, action='append', dest='ids', help="Only rebuild this dashboard (repeatable).")
+
+    def handle(self, *args, **options):
+        count = refresh_dashboard_summaries(options['ids'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} dashboard summary(ies)."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from audit.models import Sitemap
+from audit.sitemaps import refresh_sitemaps
+
+
+class Command(BaseCommand):
+    help = "Re-crawls stored sitemaps with conditional GETs and applies only the added/removed URLs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', type=int, action='append', dest='ids', help="Only refresh this sitemap (repeatable).")
+
+    def handle(self, *args, **options):
+        sitemaps = Sitemap.objects.all().order_by('id')
+        if options['ids']:
+            sitemaps = sitemaps.filter(id__in=options['ids'])
+
+        summaries = refresh_sitemaps(sitemaps)
+
+        counts = {}
+        for summary in summaries:
+            counts[summary['status']] = counts.get(summary['status'], 0) + 1
+            if summary['status'] in ('updated', 'failed'):
+                self.stdout.write(
+                    f"{summary['sitemap_url']}: {summary['status']}, {summary['added']} added, {summary['removed']} removed"
+                )
+
+        totals = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(summaries)} sitemap(s): {totals or 'none'}."))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0023_auditdashboard_client'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditUploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(blank=True, null=True, upload_to='audit_uploads/')),
+                ('file_name', models.CharField(max_length=2000)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('uploading', 'Uploading to Google Drive'), ('processing', 'Processing CSV'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('records_processed', models.IntegerField(default=0)),
+                ('drive_file_id', models.CharField(blank=True, max_length=2000, null=True)),
+                ('drive_file_link', models.URLField(blank=True, max_length=2000, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('dashboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_jobs', to='audit.auditdashboard')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+from audit.utils import normalize_url
+
+
+def backfill_normalized_urls(apps, schema_editor):
+    for model_name in ('SitemapURL', 'UploadedFile'):
+        model = apps.get_model('audit', model_name)
+        batch = []
+        for obj in model.objects.only('id', 'url').iterator(chunk_size=2000):
+            obj.normalized_url = normalize_url(obj.url) if obj.url else ''
+            batch.append(obj)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['normalized_url'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['normalized_url'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0024_audituploadjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitemapurl',
+            name='normalized_url',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=2000),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='normalized_url',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=2000),
+        ),
+        migrations.RunPython(backfill_normalized_urls, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['dashboard', 'normalized_url'], name='audit_uploa_dashboa_ba7d67_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0025_sitemapurl_normalized_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitemapurl',
+            name='changefreq',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitemapurl',
+            name='lastmod',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitemapurl',
+            name='priority',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
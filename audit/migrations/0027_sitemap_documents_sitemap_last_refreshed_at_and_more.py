@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0026_sitemapurl_changefreq_sitemapurl_lastmod_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitemap',
+            name='documents',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='sitemap',
+            name='last_refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitemapurl',
+            name='source',
+            field=models.URLField(blank=True, max_length=2000, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0027_sitemap_documents_sitemap_last_refreshed_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['dashboard', 'action_choice'], name='audit_uploa_dashboa_941eca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['dashboard', 'in_sitemap'], name='audit_uploa_dashboa_9b2496_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['dashboard', 'id'], name='audit_uploa_dashboa_68a2b1_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# url__icontains compiles to UPPER("url"::text) LIKE UPPER(%s) on PostgreSQL, so the
+# trigram index is on that expression. Built concurrently so large audit tables stay
+# writable; other databases (SQLite in development) skip it.
+TRIGRAM_INDEX = 'audit_uploadedfile_url_upper_trgm'
+
+
+def create_url_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {TRIGRAM_INDEX} '
+        'ON audit_uploadedfile USING gin (UPPER(url::text) gin_trgm_ops)'
+    )
+
+
+def drop_url_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('audit', '0028_uploadedfile_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_url_trigram_index, drop_url_trigram_index),
+    ]
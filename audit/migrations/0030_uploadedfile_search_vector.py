@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# Cross-dashboard search (audit.search) on PostgreSQL: a weighted tsvector column kept
+# current by a trigger that only fires when a searched column is written, so enrichment
+# merges (sessions, impressions, ...) do not recompute it. Other databases search with
+# LIKE and skip all of this.
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('simple', coalesce({row}current_title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}h1, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}main_kw, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce({row}url, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce({row}meta, '')), 'C')
+"""
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    execute = schema_editor.execute
+    execute('ALTER TABLE audit_uploadedfile ADD COLUMN IF NOT EXISTS search_vector tsvector')
+    execute(f"""
+        CREATE OR REPLACE FUNCTION audit_uploadedfile_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    execute('DROP TRIGGER IF EXISTS audit_uploadedfile_search_vector_trigger ON audit_uploadedfile')
+    execute("""
+        CREATE TRIGGER audit_uploadedfile_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF url, current_title, meta, h1, main_kw ON audit_uploadedfile
+        FOR EACH ROW EXECUTE FUNCTION audit_uploadedfile_search_vector_update()
+    """)
+
+    # Backfill existing rows in id ranges so no single transaction locks the whole table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT coalesce(min(id), 0), coalesce(max(id), 0) FROM audit_uploadedfile')
+        low, high = cursor.fetchone()
+        for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                f'UPDATE audit_uploadedfile SET search_vector = {SEARCH_VECTOR_SQL.format(row="")} '
+                'WHERE id >= %s AND id < %s',
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+    execute(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_uploadedfile_search_vector '
+        'ON audit_uploadedfile USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    execute = schema_editor.execute
+    execute('DROP INDEX CONCURRENTLY IF EXISTS audit_uploadedfile_search_vector')
+    execute('DROP TRIGGER IF EXISTS audit_uploadedfile_search_vector_trigger ON audit_uploadedfile')
+    execute('DROP FUNCTION IF EXISTS audit_uploadedfile_search_vector_update()')
+    execute('ALTER TABLE audit_uploadedfile DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('audit', '0029_uploadedfile_url_trigram_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0030_uploadedfile_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditDashboardSummary',
+            fields=[
+                ('dashboard', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='audit.auditdashboard')),
+                ('url_count', models.IntegerField(default=0)),
+                ('in_sitemap_count', models.IntegerField(default=0)),
+                ('total_sessions', models.BigIntegerField(default=0)),
+                ('total_impressions', models.BigIntegerField(default=0)),
+                ('action_counts', models.JSONField(default=dict)),
+                ('category_counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
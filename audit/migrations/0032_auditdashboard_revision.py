@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0031_auditdashboardsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditdashboard',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
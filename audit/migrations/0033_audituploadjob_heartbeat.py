@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0032_auditdashboard_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audituploadjob',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='audituploadjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
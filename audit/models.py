@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 
 from client.models import ClientOnboarding  # If you want to track which user created the dashboard
+from .utils import normalize_url
 
 class AuditDashboard(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)  # Optional, to track who created the dashboard
@@ -10,6 +11,23 @@ class AuditDashboard(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     share_token = models.CharField(max_length=64, unique=True, null=True, blank=True)
     client = models.ForeignKey(ClientOnboarding, on_delete=models.SET_NULL, null=True, blank=True)
+    revision = models.PositiveIntegerField(default=0)  # Bumped on every write to its rows; versions the shared view cache
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        # The shared page shows the name and description, so a save of an existing dashboard
+        # bumps the revision too. It is only ever written with F(), so a stale instance
+        # never writes back an older revision
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+        kwargs['update_fields'] = [name for name in update_fields if name != 'revision']
+        super().save(*args, **kwargs)
+
+        from .caching import invalidate_shared_dashboards
+        invalidate_shared_dashboards([self.pk])
+        self.refresh_from_db(fields=['revision'])
 
     def __str__(self):
         return self.name
@@ -87,13 +105,70 @@ class UploadedFile(models.Model):
     # New ForeignKey linking this file to an AuditDashboard instance
     dashboard = models.ForeignKey(AuditDashboard, on_delete=models.CASCADE, related_name="audit_data", null=True, blank=True)
 
+    # utils.normalize_url(url), stored so sitemap matching can be done with indexed SQL joins.
+    # Filled in save(); bulk_create() callers must set it themselves.
+    normalized_url = models.CharField(max_length=2000, blank=True, default='', db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dashboard', 'normalized_url']),
+            # UploadedFileFilter lookups within a dashboard
+            models.Index(fields=['dashboard', 'action_choice']),
+            models.Index(fields=['dashboard', 'in_sitemap']),
+            # Keyset pages in default (id) order are a range scan of this index
+            models.Index(fields=['dashboard', 'id']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_url = normalize_url(self.url) if self.url else ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'normalized_url'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.file_name
 
 
+class AuditDashboardSummary(models.Model):
+    """
+    Per-dashboard aggregates for list_dashboard, so the listing never scans UploadedFile.
+    Kept current by audit.summaries when rows are imported or edited;
+    manage.py rebuild_dashboard_summaries recomputes them from scratch.
+    """
+    dashboard = models.OneToOneField(AuditDashboard, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    url_count = models.IntegerField(default=0)
+    in_sitemap_count = models.IntegerField(default=0)
+    total_sessions = models.BigIntegerField(default=0)
+    total_impressions = models.BigIntegerField(default=0)
+    action_counts = models.JSONField(default=dict)  # {action_choice: rows}
+    category_counts = models.JSONField(default=dict)  # {category: rows}, uncategorised rows not counted
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def in_sitemap_percent(self):
+        return round(self.in_sitemap_count / self.url_count * 100, 1) if self.url_count else 0
+
+    def top_actions(self, limit=3):
+        """(label, count) for the most common action choices, ignoring 'leave'."""
+        labels = dict(UploadedFile.ACTION_CHOICES)
+        counts = sorted(
+            ((count, key) for key, count in self.action_counts.items() if count and key != 'leave'),
+            reverse=True,
+        )
+        return [(labels.get(key, key), count) for count, key in counts[:limit]]
+
+    def __str__(self):
+        return f"Summary of {self.dashboard_id}"
+
+
 class Sitemap(models.Model):
     url = models.URLField(default='http://example.com/sitemap.xml', max_length=2000)
     added_at = models.DateTimeField(auto_now_add=True)
+    # {document_url: {'etag', 'last_modified', 'children'}} for the sitemap and each child
+    # sitemap of the last complete crawl, used by conditional refreshes
+    documents = models.JSONField(default=dict, blank=True)
+    last_refreshed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.url
@@ -105,5 +180,59 @@ class SitemapURL(models.Model):
     status = models.CharField(max_length=2000, null=True, blank=True)
     added_at = models.DateTimeField(auto_now_add=True)
 
+    # Optional <url> metadata, stored as found in the sitemap
+    lastmod = models.CharField(max_length=64, null=True, blank=True)
+    changefreq = models.CharField(max_length=20, null=True, blank=True)
+    priority = models.FloatField(null=True, blank=True)
+    # The (child) sitemap document the URL was listed in
+    source = models.URLField(max_length=2000, null=True, blank=True)
+
+    # utils.normalize_url(url); filled in save(), bulk_create() callers must set it themselves
+    normalized_url = models.CharField(max_length=2000, blank=True, default='', db_index=True)
+
+    def save(self, *args, **kwargs):
+        self.normalized_url = normalize_url(self.url) if self.url else ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'normalized_url'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.url
+
+
+class AuditUploadJob(models.Model):
+    """
+    Queued audit CSV upload. The request only stores the file; a worker
+    (manage.py process_upload_jobs) uploads it to Google Drive and processes the CSV.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('uploading', 'Uploading to Google Drive'),
+        ('processing', 'Processing CSV'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    dashboard = models.ForeignKey(AuditDashboard, on_delete=models.CASCADE, related_name='upload_jobs')
+    file = models.FileField(upload_to='audit_uploads/', null=True, blank=True)
+    file_name = models.CharField(max_length=2000)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    records_processed = models.IntegerField(default=0)
+    drive_file_id = models.CharField(max_length=2000, null=True, blank=True)
+    drive_file_link = models.URLField(max_length=2000, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Touched by the worker while the job runs; jobs without one for too long are reclaimed
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
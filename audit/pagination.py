@@ -0,0 +1,240 @@
+# pagination.py
+
+import base64
+import binascii
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import F, Q
+
+logger = logging.getLogger(__name__)
+
+# Query parameters owned by the paginator; everything else (filters, sort) is kept in links
+CURSOR_PARAMS = ('after', 'before', 'last', 'page')
+
+
+def estimated_counts_enabled():
+    """Planner-estimated totals are shown unless settings.AUDIT_ESTIMATED_COUNTS is False."""
+    return getattr(settings, 'AUDIT_ESTIMATED_COUNTS', True)
+
+
+def estimate_count(queryset):
+    """
+    Row estimate for the queryset from the PostgreSQL planner (EXPLAIN, no execution),
+    so large audits never pay for a COUNT(*). Returns None on other databases or errors.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+    except Exception as e:
+        logger.warning(f"Could not estimate row count: {e}")
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _cursor_value(value):
+    # Full-precision ISO format: DjangoJSONEncoder drops microseconds, which breaks ties
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def encode_cursor(sort, value, pk):
+    payload = json.dumps({'s': sort, 'v': _cursor_value(value), 'id': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Returns the cursor payload dict, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(payload, dict) or not {'s', 'v', 'id'} <= payload.keys():
+        return None
+    return payload
+
+
+class KeysetPage:
+    """One page of rows plus opaque cursors for its neighbours; mirrors the parts of Page the templates use."""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor=None, previous_cursor=None, estimated_count=None):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.estimated_count = estimated_count
+        self.query_params = ''
+        self.sort = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def _url(self, **params):
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        if self.query_params:
+            query = f'{self.query_params}&{query}' if query else self.query_params
+        return f'?{query}'
+
+    @property
+    def first_url(self):
+        return self._url()
+
+    @property
+    def last_url(self):
+        return self._url(last=1)
+
+    @property
+    def next_url(self):
+        return self._url(after=self.next_cursor)
+
+    @property
+    def previous_url(self):
+        return self._url(before=self.previous_cursor)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over (sort field, id) instead of COUNT(*) + OFFSET: every page is
+    an indexed range scan, so page 5000 costs the same as page 1. NULL sort values are
+    ordered last in both directions and handled explicitly in the range conditions.
+    """
+
+    def __init__(self, queryset, per_page, sort=None, default_sort='id', sortable=()):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.sort = self._validate_sort(sort, sortable) or default_sort
+        self.descending = self.sort.startswith('-')
+        self.field_name = self.sort.lstrip('-')
+        self.field = queryset.model._meta.get_field(self.field_name)
+
+        # Cursors read the sort field from the page rows, so a projected queryset must load it
+        names, defer = queryset.query.deferred_loading
+        if names and not defer and self.field_name not in names:
+            self.queryset = queryset.only(*names, self.field_name)
+
+    def _validate_sort(self, sort, sortable):
+        if not sort:
+            return None
+        name = sort.lstrip('-')
+        if name != 'id' and name not in sortable:
+            return None
+        try:
+            field = self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        return sort if field.concrete and not field.is_relation else None
+
+    def _ordering(self, reverse=False):
+        """ORDER BY for the page direction; reversing also flips where NULLs go."""
+        descending = self.descending != reverse
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        if self.field_name == 'id':
+            return [F('id').desc() if descending else F('id').asc()]
+        field = F(self.field_name).desc(**nulls) if descending else F(self.field_name).asc(**nulls)
+        return [field, F('id').desc() if descending else F('id').asc()]
+
+    def _beyond(self, value, pk, reverse=False):
+        """Rows strictly after (value, pk) in the ordering given by _ordering(reverse)."""
+        descending = self.descending != reverse
+        op = 'lt' if descending else 'gt'
+        after_id = Q(**{f'id__{op}': pk})
+        if self.field_name == 'id':
+            return after_id
+
+        name = self.field_name
+        nulls_last = not reverse
+        if value is None:
+            condition = Q(**{f'{name}__isnull': True}) & after_id
+            return condition if nulls_last else condition | Q(**{f'{name}__isnull': False})
+        condition = Q(**{f'{name}__{op}': value}) | (Q(**{name: value}) & after_id)
+        return condition | Q(**{f'{name}__isnull': True}) if nulls_last else condition
+
+    def _cursor_for(self, obj):
+        return encode_cursor(self.sort, getattr(obj, self.field_name), obj.pk)
+
+    def _position(self, cursor):
+        payload = decode_cursor(cursor)
+        if payload is None or payload['s'] != self.sort:
+            return None
+        try:
+            value = None if payload['v'] is None else self.field.to_python(payload['v'])
+            pk = int(payload['id'])
+        except (ValidationError, TypeError, ValueError):
+            return None
+        return value, pk
+
+    def get_page(self, after=None, before=None, last=False):
+        """
+        Returns the page after the `after` cursor, before the `before` cursor, the last
+        page, or the first page. Invalid or stale cursors fall back to the first page.
+        """
+        size = self.per_page
+        position = self._position(before) if before else None
+        if position is not None or (last and not after):
+            queryset = self.queryset.order_by(*self._ordering(reverse=True))
+            if position is not None:
+                queryset = queryset.filter(self._beyond(*position, reverse=True))
+            rows = list(queryset[:size + 1])
+            has_previous = len(rows) > size
+            rows = rows[:size][::-1]
+            has_next = position is not None
+        else:
+            position = self._position(after)
+            queryset = self.queryset.order_by(*self._ordering())
+            if position is not None:
+                queryset = queryset.filter(self._beyond(*position))
+            rows = list(queryset[:size + 1])
+            has_next = len(rows) > size
+            rows = rows[:size]
+            has_previous = position is not None
+
+        return KeysetPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=self._cursor_for(rows[-1]) if rows else None,
+            previous_cursor=self._cursor_for(rows[0]) if rows else None,
+            estimated_count=estimate_count(self.queryset) if estimated_counts_enabled() else None,
+        )
+
+
+def paginate_keyset(request, queryset, per_page, default_sort='id', sortable=()):
+    """
+    Keyset-paginates a queryset from the request's ?sort, ?after, ?before and ?last
+    parameters. The page's links keep every other query parameter (filters, sort, rows).
+    """
+    paginator = KeysetPaginator(
+        queryset, per_page, sort=request.GET.get('sort'), default_sort=default_sort, sortable=sortable,
+    )
+    page = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        last=bool(request.GET.get('last')),
+    )
+    params = request.GET.copy()
+    for key in CURSOR_PARAMS:
+        params.pop(key, None)
+    page.query_params = params.urlencode()
+    page.sort = paginator.sort
+    return page
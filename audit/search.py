@@ -0,0 +1,60 @@
+# search.py
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import UploadedFile
+
+# Fields searched across dashboards. On PostgreSQL they are indexed in the
+# search_vector column (weighted A-C, see migration 0030), kept up to date by a trigger.
+SEARCH_FIELDS = ['url', 'current_title', 'meta', 'h1', 'main_kw']
+SEARCH_CONFIG = 'simple'  # URLs, titles and keywords are mixed-language; no stemming
+SEARCH_RESULTS_PER_PAGE = 25
+SEARCH_MAX_PAGE = 40  # Ranked results are paged by offset; deep pages are not useful
+
+
+def search_backend():
+    return 'postgresql' if connection.vendor == 'postgresql' else 'like'
+
+
+def search_queryset(query):
+    """
+    The saved dashboards' UploadedFile rows matching `query` (web search syntax on
+    PostgreSQL: words, "phrases", -excluded), best first.
+
+    On PostgreSQL rows match the search vector or contain the query in the URL (served by
+    the trigram index), ranked by ts_rank_cd. Elsewhere every field is matched with LIKE
+    and results are in id order, which keeps development and tests on SQLite working.
+    """
+    files = (
+        UploadedFile.objects.filter(dashboard__isnull=False)
+        .select_related('dashboard')
+        .only(*SEARCH_FIELDS, 'dashboard__name')
+    )
+
+    if search_backend() == 'postgresql':
+        ts_query = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        matches = RawSQL(f'"audit_uploadedfile"."search_vector" @@ {ts_query}', (query,), output_field=BooleanField())
+        rank = RawSQL(f'ts_rank_cd("audit_uploadedfile"."search_vector", {ts_query})', (query,), output_field=FloatField())
+        files = files.filter(Q(matches) | Q(url__icontains=query)).annotate(rank=rank).order_by('-rank', 'id')
+    else:
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': query})
+        files = files.filter(condition).annotate(rank=Value(None, output_field=FloatField())).order_by('id')
+    return files
+
+
+def search_uploaded_files(query, page=1, per_page=SEARCH_RESULTS_PER_PAGE):
+    """Searches the saved dashboards (see search_queryset) and returns (results, has_next)."""
+    query = query.strip()
+    if not query:
+        return [], False
+
+    files = search_queryset(query)
+    page = max(1, min(page, SEARCH_MAX_PAGE))
+    offset = (page - 1) * per_page
+    results = list(files[offset:offset + per_page + 1])
+    has_next = len(results) > per_page and page < SEARCH_MAX_PAGE
+    return results[:per_page], has_next
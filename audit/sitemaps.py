@@ -0,0 +1,260 @@
+# sitemaps.py
+
+import logging
+
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .crawler import SitemapCrawler
+from .ingest import INGEST_BATCH_SIZE, iter_batches
+from .models import Sitemap, SitemapURL, UploadedFile
+from .summaries import refresh_in_sitemap_counts
+from .utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+def create_sitemap_urls(sitemap, entries):
+    """
+    Bulk inserts a batch of crawled sitemap entries (dicts with loc, lastmod,
+    changefreq, priority and source). URLs are stored normalized, as before.
+    """
+    sitemap_urls = []
+    for entry in entries:
+        url = normalize_url(entry['loc'])
+        sitemap_urls.append(SitemapURL(
+            sitemap=sitemap,
+            url=url,
+            normalized_url=normalize_url(url),
+            lastmod=entry.get('lastmod'),
+            changefreq=entry.get('changefreq'),
+            priority=entry.get('priority'),
+            source=entry.get('source'),
+        ))
+    SitemapURL.objects.bulk_create(sitemap_urls, batch_size=INGEST_BATCH_SIZE)
+    return len(sitemap_urls)
+
+
+RETURNING_FETCH_SIZE = 10000
+
+
+def update_returns_rows():
+    """True if the database supports UPDATE ... RETURNING (PostgreSQL, SQLite 3.35+)."""
+    return connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_rows_from_bulk_insert
+
+
+def set_in_sitemap(files, value, dashboard_ids):
+    """
+    Sets 'in_sitemap' on the `files` queryset and adds the dashboards of the rows it
+    changes to the dashboard_ids set, so only their summaries are recounted. The
+    dashboards come back from the UPDATE itself (RETURNING), so the matching runs once;
+    other databases select them first. Returns the number of rows updated.
+    """
+    if not update_returns_rows():
+        dashboard_ids.update(files.exclude(dashboard=None).values_list('dashboard_id', flat=True).distinct())
+        return files.update(in_sitemap=value)
+
+    quote = connection.ops.quote_name
+    pk_sql, params = files.values('pk').query.sql_with_params()
+    sql = (
+        f"UPDATE {quote(UploadedFile._meta.db_table)} SET {quote('in_sitemap')} = %s "
+        f"WHERE {quote(UploadedFile._meta.pk.column)} IN ({pk_sql}) RETURNING {quote('dashboard_id')}"
+    )
+    updated = 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value, *params])
+        while rows := cursor.fetchmany(RETURNING_FETCH_SIZE):
+            updated += len(rows)
+            dashboard_ids.update(dashboard_id for dashboard_id, in rows if dashboard_id is not None)
+    return updated
+
+
+def update_in_sitemap_flags(added=(), removed=(), dashboard_ids=None):
+    """
+    Updates 'in_sitemap' only for UploadedFile rows whose normalized_url is in the
+    added or removed sets of a sitemap diff. Removed URLs are only unmarked if no
+    other sitemap still lists them. The dashboards of changed rows are added to
+    dashboard_ids when given. Returns (marked, unmarked).
+    """
+    dashboard_ids = set() if dashboard_ids is None else dashboard_ids
+    marked = unmarked = 0
+    for batch in iter_batches(added):
+        files = UploadedFile.objects.filter(in_sitemap=False, normalized_url__in=batch)
+        marked += set_in_sitemap(files, True, dashboard_ids)
+
+    still_listed = SitemapURL.objects.filter(normalized_url=OuterRef('normalized_url'))
+    for batch in iter_batches(removed):
+        files = UploadedFile.objects.filter(in_sitemap=True, normalized_url__in=batch).filter(~Exists(still_listed))
+        unmarked += set_in_sitemap(files, False, dashboard_ids)
+    return marked, unmarked
+
+
+def crawl_is_complete(result):
+    """True if every document of a crawl was fetched and parsed and no cap cut it short."""
+    return not result['truncated'] and all(not stats['error'] for stats in result['stats'])
+
+
+def save_crawl_state(sitemap, result):
+    """
+    Stores the validators and children of every document of a complete crawl on the
+    Sitemap, so the next refresh can send a conditional GET for each of them.
+    Incomplete crawls leave them cleared, which forces a full re-crawl next time.
+    """
+    sitemap.documents = result['documents'] if crawl_is_complete(result) else {}
+    sitemap.last_refreshed_at = timezone.now()
+    sitemap.save(update_fields=['documents', 'last_refreshed_at'])
+
+
+class SitemapDiff:
+    """
+    Diffs freshly crawled entries against the URLs already stored for one Sitemap.
+    New URLs are inserted (and their 'in_sitemap' flags set) batch by batch as the
+    crawl streams in; URLs that never showed up are deleted by finish(), unless
+    their source document answered 304. Only the stored URLs and their sources are
+    held in memory, not the crawled entries.
+    """
+
+    def __init__(self, sitemap):
+        self.sitemap = sitemap
+        self.existing = None  # Stored normalized_url -> source not seen in the crawl yet
+        self.seen = set()
+        self.added = 0
+        self.removed = 0
+        self.marked = 0
+        self.unmarked = 0
+        self.dashboard_ids = set()  # Dashboards with flags flipped by this diff
+
+    def load_existing(self):
+        if self.existing is None:
+            self.existing = dict(
+                SitemapURL.objects.filter(sitemap=self.sitemap).values_list('normalized_url', 'source')
+            )
+
+    def apply(self, entries):
+        self.load_existing()
+        added_entries = []
+        added_urls = []
+        moved = {}
+        for entry in entries:
+            url = normalize_url(entry['loc'])
+            if url in self.seen:
+                continue
+            self.seen.add(url)
+            if url in self.existing:
+                # Rows stored before sources were recorded, or moved to another child sitemap
+                if self.existing.pop(url) != entry.get('source'):
+                    moved.setdefault(entry.get('source'), []).append(url)
+            else:
+                added_entries.append(entry)
+                added_urls.append(url)
+
+        for source, urls in moved.items():
+            SitemapURL.objects.filter(sitemap=self.sitemap, normalized_url__in=urls).update(source=source)
+
+        if added_entries:
+            self.added += create_sitemap_urls(self.sitemap, added_entries)
+            marked, _ = update_in_sitemap_flags(added=added_urls, dashboard_ids=self.dashboard_ids)
+            self.marked += marked
+
+    def finish(self, unchanged_sources=()):
+        """
+        Deletes the stored URLs that were not in the crawl and unmarks their flags.
+        URLs from unchanged_sources, the documents that answered 304, are kept.
+        """
+        self.load_existing()
+        unchanged_sources = set(unchanged_sources)
+        removed_urls = [url for url, source in self.existing.items() if source not in unchanged_sources]
+        for batch in iter_batches(removed_urls):
+            SitemapURL.objects.filter(sitemap=self.sitemap, normalized_url__in=batch).delete()
+        _, unmarked = update_in_sitemap_flags(removed=removed_urls, dashboard_ids=self.dashboard_ids)
+        self.removed += len(removed_urls)
+        self.unmarked += unmarked
+        self.existing = {}
+        self.refresh_counts()
+
+    def refresh_counts(self):
+        """
+        Recounts the summaries (and bumps the revisions) of the dashboards whose flags
+        this diff changed. finish() calls it; a failed crawl calls it on its own, as the
+        URLs it added before failing are already stored and marked.
+        """
+        if self.dashboard_ids:
+            refresh_in_sitemap_counts(self.dashboard_ids)
+            self.dashboard_ids = set()
+
+
+def refresh_sitemaps(sitemaps=None, crawler=None):
+    """
+    Re-crawls stored sitemaps and applies only what changed since the last crawl.
+
+    Each sitemap URL and every child sitemap of an index is fetched with
+    If-None-Match / If-Modified-Since from its stored ETag and Last-Modified; when
+    all of them answer 304 the refresh costs one request per document and one UPDATE.
+    Otherwise the crawl is diffed against the stored URLs: added URLs are bulk
+    inserted, removed ones bulk deleted (those of unmodified documents are kept), and
+    only the affected UploadedFile.in_sitemap flags are touched. If a document fails
+    to download or parse, nothing is deleted.
+    Returns a list of per-sitemap summary dicts.
+    """
+    if sitemaps is None:
+        sitemaps = Sitemap.objects.all()
+    crawler = crawler or SitemapCrawler()
+
+    # The same sitemap URL may have been added more than once; it is fetched once
+    groups = {}
+    for sitemap in sitemaps:
+        groups.setdefault(sitemap.url, []).append(sitemap)
+
+    validators = {}
+    for url, group in groups.items():
+        documents = group[0].documents
+        if documents and all(sitemap.documents == documents for sitemap in group):
+            validators[url] = documents
+
+    diffs = {url: [SitemapDiff(sitemap) for sitemap in group] for url, group in groups.items()}
+
+    def apply_entries(sitemap_url, entries):
+        for diff in diffs[sitemap_url]:
+            diff.apply(entries)
+
+    crawl = crawler.crawl_many(list(groups), on_entries=apply_entries, validators=validators)
+
+    summaries = []
+    for url, group_diffs in diffs.items():
+        result = crawl[url]
+        unchanged_sources = [stats['sitemap_url'] for stats in result['stats'] if stats['not_modified']]
+        for diff in group_diffs:
+            sitemap = diff.sitemap
+
+            if result['not_modified']:
+                status = 'not_modified'
+                sitemap.last_refreshed_at = timezone.now()
+                sitemap.save(update_fields=['last_refreshed_at'])
+            elif not crawl_is_complete(result):
+                # Keep every stored URL; a partial crawl says nothing about removals. The URLs
+                # added while it streamed are kept too, so their dashboards are recounted
+                status = 'failed'
+                diff.refresh_counts()
+                save_crawl_state(sitemap, result)
+            else:
+                diff.finish(unchanged_sources)
+                save_crawl_state(sitemap, result)
+                status = 'updated' if diff.added or diff.removed else 'unchanged'
+
+            summary = {
+                'sitemap_id': sitemap.id,
+                'sitemap_url': url,
+                'status': status,
+                'added': diff.added,
+                'removed': diff.removed,
+                'in_sitemap_marked': diff.marked,
+                'in_sitemap_unmarked': diff.unmarked,
+            }
+            summaries.append(summary)
+            logger.info(
+                f"Sitemap {url} refreshed ({status}): {diff.added} URLs added, {diff.removed} removed, "
+                f"{diff.marked} files marked and {diff.unmarked} unmarked as in sitemap"
+            )
+
+    return summaries
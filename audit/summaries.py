@@ -0,0 +1,151 @@
+# summaries.py
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .caching import invalidate_shared_dashboards
+from .models import AuditDashboard, AuditDashboardSummary, UploadedFile
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = [
+    'url_count', 'in_sitemap_count', 'total_sessions', 'total_impressions', 'action_counts', 'category_counts',
+]
+
+# Fields whose per-value counts are kept in the summary, with the JSON field holding them
+COUNTED_FIELDS = {
+    'action_choice': ('action_counts', UploadedFile.ACTION_CHOICES),
+    'category': ('category_counts', UploadedFile.CATEGORY_CHOICES),
+}
+
+
+def _aggregates():
+    # Choice keys contain spaces and slashes, so the per-choice counts get positional aliases
+    aggregates = {
+        'url_count': Count('id'),
+        'in_sitemap_count': Count('id', filter=Q(in_sitemap=True)),
+        'total_sessions': Coalesce(Sum('sessions'), 0),
+        'total_impressions': Coalesce(Sum('impressions'), 0),
+    }
+    for field, (_, choices) in COUNTED_FIELDS.items():
+        for index, (key, _) in enumerate(choices):
+            aggregates[f'{field}_{index}'] = Count('id', filter=Q(**{field: key}))
+    return aggregates
+
+
+def _summary_values(row):
+    values = {name: row[name] for name in ('url_count', 'in_sitemap_count', 'total_sessions', 'total_impressions')}
+    for field, (counts_field, choices) in COUNTED_FIELDS.items():
+        values[counts_field] = {
+            key: row[f'{field}_{index}'] for index, (key, _) in enumerate(choices) if row[f'{field}_{index}']
+        }
+    return values
+
+
+def refresh_dashboard_summaries(dashboard_ids=None):
+    """
+    Recomputes the summaries of the given dashboards (all when None) with one grouped
+    aggregate query and one upsert. Dashboards without rows get an empty summary.
+    Returns the number of summaries written.
+    """
+    dashboards = AuditDashboard.objects.all()
+    files = UploadedFile.objects.filter(dashboard__isnull=False)
+    if dashboard_ids is not None:
+        dashboard_ids = list(dashboard_ids)
+        if not dashboard_ids:
+            return 0
+        dashboards = dashboards.filter(id__in=dashboard_ids)
+        files = files.filter(dashboard_id__in=dashboard_ids)
+
+    rows = {row['dashboard']: row for row in files.values('dashboard').annotate(**_aggregates()).order_by()}
+    empty = {'url_count': 0, 'in_sitemap_count': 0, 'total_sessions': 0, 'total_impressions': 0,
+             'action_counts': {}, 'category_counts': {}}
+
+    summaries = [
+        AuditDashboardSummary(
+            dashboard_id=dashboard_id,
+            **(_summary_values(rows[dashboard_id]) if dashboard_id in rows else empty),
+        )
+        for dashboard_id in dashboards.values_list('id', flat=True)
+    ]
+    AuditDashboardSummary.objects.bulk_create(
+        summaries,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['dashboard'],
+        update_fields=SUMMARY_FIELDS + ['updated_at'],
+    )
+    invalidate_shared_dashboards(dashboard_ids)
+    logger.info(f"Refreshed {len(summaries)} dashboard summaries.")
+    return len(summaries)
+
+
+def refresh_dashboard_summary(dashboard):
+    if dashboard is not None:
+        refresh_dashboard_summaries([dashboard.id])
+
+
+def refresh_in_sitemap_counts(dashboard_ids=None):
+    """
+    Recounts only in_sitemap_count, served by the (dashboard, in_sitemap) index, after
+    sitemap changes flip flags across dashboards.
+    """
+    files = UploadedFile.objects.filter(dashboard__isnull=False, in_sitemap=True)
+    summaries = AuditDashboardSummary.objects.all()
+    if dashboard_ids is not None:
+        files = files.filter(dashboard_id__in=dashboard_ids)
+        summaries = summaries.filter(dashboard_id__in=dashboard_ids)
+
+    counts = dict(files.values_list('dashboard').annotate(count=Count('id')).order_by())
+    changed = []
+    for summary in summaries.only('dashboard_id', 'in_sitemap_count'):
+        count = counts.get(summary.dashboard_id, 0)
+        if summary.in_sitemap_count != count:
+            summary.in_sitemap_count = count
+            changed.append(summary)
+    AuditDashboardSummary.objects.bulk_update(changed, ['in_sitemap_count'], batch_size=500)
+    # Flags can flip both ways within a dashboard without changing its count
+    invalidate_shared_dashboards(dashboard_ids)
+    return len(changed)
+
+
+def apply_choice_changes(changes):
+    """
+    Applies inline edits to the summaries' choice counts without rescanning the
+    dashboards. `changes` is an iterable of (dashboard_id, field, old value, new value)
+    for the rows actually changed. Dashboards without a summary yet are computed in full.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for dashboard_id, field, old, new in changes:
+        if dashboard_id is None or field not in COUNTED_FIELDS or old == new:
+            continue
+        counts_field, _ = COUNTED_FIELDS[field]
+        if old:
+            deltas[dashboard_id][(counts_field, old)] -= 1
+        if new:
+            deltas[dashboard_id][(counts_field, new)] += 1
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        summaries = AuditDashboardSummary.objects.select_for_update().filter(dashboard_id__in=list(deltas))
+        found = set()
+        for summary in summaries:
+            found.add(summary.dashboard_id)
+            for (counts_field, key), delta in deltas[summary.dashboard_id].items():
+                counts = getattr(summary, counts_field)
+                count = counts.get(key, 0) + delta
+                if count > 0:
+                    counts[key] = count
+                else:
+                    counts.pop(key, None)
+            summary.save(update_fields=['action_counts', 'category_counts', 'updated_at'])
+        invalidate_shared_dashboards(found)
+
+    missing = set(deltas) - found
+    if missing:
+        refresh_dashboard_summaries(missing)
@@ -0,0 +1,70 @@
+# synthetic.py
+
+import csv
+import io
+import random
+
+# Header rows as the tools export them
+SYNTHETIC_HEADERS = {
+    'screaming_frog': [
+        'Address', 'Content Type', 'Status Code', 'Indexability', 'Title 1', 'Meta Description 1', 'H1-1',
+        'Word Count', 'Canonical Link Element 1', 'Inlinks', 'Outlinks', 'Crawl Depth',
+    ],
+    'search_console': ['Top pages', 'Clicks', 'Impressions', 'CTR', 'Position'],
+    'google_analytics': [
+        'Page path and screen class', 'Sessions', 'Bounce rate', 'Average session duration', 'Sessions Δ (%)',
+    ],
+    'keyword_research': ['Keyword', 'Search Vol.', 'Position', 'URL'],
+    'backlinks': ['Backlink URL', 'Destination URL', 'Anchor'],
+}
+
+
+def _synthetic_row(csv_type, index, rng, domain):
+    url = f'https://www.{domain}/section-{index % 97}/page-{index}/'
+    if csv_type == 'screaming_frog':
+        return [
+            url, 'text/html; charset=UTF-8', '200', 'Indexable', f'Page {index} title',
+            f'Description of page {index}', f'Heading {index}', str(rng.randint(50, 4000)), url,
+            f'{rng.randint(0, 5000):,}', str(rng.randint(0, 300)), str(rng.randint(0, 8)),
+        ]
+    if csv_type == 'search_console':
+        return [url, str(rng.randint(0, 900)), f'{rng.randint(0, 90000):,}', f'{rng.uniform(0, 30):.2f}%', f'{rng.uniform(1, 80):.1f}']
+    if csv_type == 'google_analytics':
+        change = rng.uniform(-90, 90)
+        return [
+            f'/section-{index % 97}/page-{index}/', f'{rng.randint(0, 50000):,}', f'{rng.uniform(0, 100):.2f}%',
+            f'0:0{rng.randint(0, 9)}:{rng.randint(10, 59)}', f'{"−" if change < 0 else ""}{abs(change):.1f}%',
+        ]
+    if csv_type == 'keyword_research':
+        return [f'keyword {index}', f'{rng.randint(0, 20000):,}', str(rng.choice([rng.randint(1, 100), ''])), url]
+    if csv_type == 'backlinks':
+        return [f'https://ref-{index % 500}.example.org/post-{index}', url, f'anchor {index}']
+    raise ValueError(f"Unknown CSV type: {csv_type}")
+
+
+def iter_synthetic_lines(csv_type, rows, seed=0, domain='example.com'):
+    """
+    Yields the header and `rows` data lines of a realistic synthetic export, formatted
+    like the real tool output (thousands separators, percent signs, unicode minus).
+    The same seed always produces the same file.
+    """
+    rng = random.Random(seed)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line(SYNTHETIC_HEADERS[csv_type])
+    for index in range(rows):
+        yield line(_synthetic_row(csv_type, index, rng, domain))
+
+
+def write_synthetic_export(path, csv_type, rows, seed=0, domain='example.com'):
+    """Writes a synthetic export to path (UTF-8) and returns path."""
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.writelines(iter_synthetic_lines(csv_type, rows, seed=seed, domain=domain))
+    return path
@@ -1,14 +1,61 @@
 import django_tables2 as tables
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from .models import UploadedFile
-from .forms import UploadedFileForm
-from django.urls import reverse
-from django.middleware.csrf import get_token
-from django.template.loader import render_to_string
+
+
+class ChoiceOptions:
+    """
+    The <option> markup of one choice set, rendered once for every possible selection,
+    so a dropdown cell is a dict lookup instead of a loop over the choices per row.
+    Unknown or empty values get the markup with nothing selected.
+    """
+
+    def __init__(self, choices):
+        self.choices = list(choices)
+        self.unselected = self._markup(None)
+        self.selected = {key: self._markup(key) for key, _ in self.choices}
+
+    def _markup(self, selected):
+        return format_html_join(
+            '', '<option value="{}"{}>{}</option>',
+            ((key, ' selected' if key == selected else '', label) for key, label in self.choices),
+        )
+
+    def render(self, value):
+        return self.selected.get(value, self.unselected)
+
+
+ACTION_OPTIONS = ChoiceOptions(UploadedFile.ACTION_CHOICES)
+CATEGORY_OPTIONS = ChoiceOptions(UploadedFile.CATEGORY_CHOICES)
+
 
 class UploadedFileTable(tables.Table):
+    # Record fields custom_table.html reads besides the columns themselves
+    record_fields = ['id', 'losing_traffic']
+
+    @classmethod
+    def projection(cls, exclude=()):
+        """
+        Model fields needed to render the table without the excluded columns, for .only():
+        wide audits then skip the unused max_length=2000 columns on every page query.
+        """
+        fields = [name for name in cls.Meta.fields if name not in exclude]
+        return list(dict.fromkeys(cls.record_fields + fields))
+
+    @classmethod
+    def hidden_columns(cls, request):
+        """Columns hidden with ?hide=meta,h1 (or repeated ?hide=), limited to real columns."""
+        names = {name.strip() for value in request.GET.getlist('hide') for name in value.split(',')}
+        return [name for name in cls.Meta.fields if name in names]
+
+    @classmethod
+    def column_choices(cls, hidden=()):
+        """(name, header, hidden) for every column, for the column filter checkboxes."""
+        return [(name, cls.base_columns[name].verbose_name, name in hidden) for name in cls.Meta.fields]
+
     action_choice = tables.Column(
         verbose_name='Action choice',
+        empty_values=(),
         attrs={
             "td": {
                 "class": "sticky-col-1",
@@ -27,44 +74,15 @@ class UploadedFileTable(tables.Table):
         }
     )
 
-    def render_action_choice(self, value, record):
-        form = UploadedFileForm(instance=record)
-        options_html = ""
-        for key, choice in record.ACTION_CHOICES:
-            selected = "selected" if record.action_choice == key else ""
-            options_html += f'<option value="{key}" {selected}>{choice}</option>'
-
-        return format_html(
-            '''
-            <form method="post" class="sticky-col-1" style="position: sticky; left: 0; z-index: 3;">
-                <select name="action_choice" class="action-dropdown">
-                    {}
-                </select>
-            </form>
-            ''',
-            options_html
-        )
+    # Nullable, so the options are still rendered when no category is set yet
+    category = tables.Column(verbose_name='Category', empty_values=())
 
+    # custom_table.html wraps these option lists in the inline-edit AJAX forms
+    def render_action_choice(self, value, record):
+        return ACTION_OPTIONS.render(record.action_choice)
 
     def render_category(self, value, record):
-        form = UploadedFileForm(instance=record)
-        options_html = ""
-        for key, choice in record.CATEGORY_CHOICES:
-            selected = "selected" if record.category == key else ""
-            options_html += f'<option value="{key}" {selected}>{choice}</option>'
-
-        return format_html(
-            '''
-            <form method="post">
-                <select name="category" class="category-dropdown">
-                    {}
-                </select>
-            </form>
-            ''',
-            options_html
-        )
-
-
+        return CATEGORY_OPTIONS.render(record.category)
 
     # URL Column with Custom Rendering
     def render_url(self, value, record):
@@ -222,8 +240,6 @@ class UploadedFileTable(tables.Table):
         else:
             return '-'
 
-
-
     links = tables.Column(verbose_name='Links', attrs={"td": {"style": "white-space: nowrap;"}})
 
     def render_links(self, value, record):
@@ -270,6 +286,10 @@ class UploadedFileTable(tables.Table):
     inlinks = tables.Column(verbose_name='Inlinks', attrs={"td": {"style": "white-space: nowrap;"}})
     outlinks = tables.Column(verbose_name='Outlinks', attrs={"td": {"style": "white-space: nowrap;"}})
 
+    # Set for shared dashboards, whose renderings are cached for every visitor:
+    # custom_table.html then leaves the per-visitor CSRF token out of the forms
+    shared = False
+
     class Meta:
         model = UploadedFile
         template_name = 'audit/custom_table.html'
@@ -281,8 +301,3 @@ class UploadedFileTable(tables.Table):
             'word_count', 'canonical_link', 'status_code', 'index_status', 'inlinks', 'outlinks'
         ]
         attrs = {'class': 'table table-striped text-white'}
-
-
-
-
-
@@ -1,3 +1,606 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import tempfile
+import threading
+import zipfile
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import benchmarks
+from .crawler import SessionPool, SitemapCrawler
+from .exports import EXPORT_FIELDS, export_headers
+from .filters import UploadedFileFilter
+from .ingest import bulk_ingest
+from .jobs import MAX_ATTEMPTS, STALE_JOB_TIMEOUT, reclaim_stale_jobs, run_pending_jobs
+from .management.commands.check_filter_indexes import TRIGRAM_INDEX, explain, model_index, plan_indexes
+from .models import AuditDashboard, AuditUploadJob, Sitemap, SitemapURL, UploadedFile
+from .search import search_backend, search_queryset, search_uploaded_files
+from .sitemaps import SitemapDiff, refresh_sitemaps, set_in_sitemap
+from .summaries import refresh_dashboard_summaries
+from .utils import normalize_url
+from .views import process_csv_file, update_in_sitemap_status
+
+
+class SharedDashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='owner', password='x')
+        self.dashboard = AuditDashboard.objects.create(user=user, name='Shared', share_token='token123')
+        self.row = UploadedFile.objects.create(
+            user=user, dashboard=self.dashboard, url='https://example.com/a', action_choice='Leave As Is'
+        )
+        self.url = reverse('shared_dashboard', args=[self.dashboard.share_token])
+
+    def test_cached_page_carries_no_csrf_token(self):
+        first = Client(enforce_csrf_checks=True).get(self.url)
+        second = Client(enforce_csrf_checks=True).get(self.url)  # Served from the cache
+
+        self.assertEqual(first.content, second.content)
+        self.assertNotIn(b'csrfmiddlewaretoken', second.content)
+
+    def test_every_visitor_gets_a_csrf_cookie_for_inline_edits(self):
+        Client().get(self.url)  # Fills the cache
+        visitor = Client(enforce_csrf_checks=True)
+        response = visitor.get(self.url)
+        self.assertIn('csrftoken', response.cookies)
+
+        response = visitor.post(
+            reverse('update_choices_batch'),
+            data=json.dumps({'edits': [{'id': self.row.id, 'field': 'action_choice', 'value': '301'}]}),
+            content_type='application/json',
+            HTTP_X_CSRFTOKEN=response.cookies['csrftoken'].value,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.row.refresh_from_db()
+        self.assertEqual(self.row.action_choice, '301')
+
+    def test_renaming_the_dashboard_invalidates_the_cached_page(self):
+        self.assertIn(b'Shared', Client().get(self.url).content)  # Fills the cache
+        stale = AuditDashboard.objects.get(id=self.dashboard.id)
+
+        self.dashboard.name = 'Renamed'
+        self.dashboard.save()
+        self.assertIn(b'Renamed', Client().get(self.url).content)
+
+        # A stale instance saving an unrelated field still moves the revision forward
+        revision = self.dashboard.revision
+        stale.description = 'Quarterly audit'
+        stale.save(update_fields=['description'])
+        stale.refresh_from_db()
+        self.assertEqual(stale.revision, revision + 1)
+        self.assertEqual(stale.name, 'Renamed')
+
+
+
+class HiddenColumnTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        self.dashboard = AuditDashboard.objects.create(user=user, name='Columns')
+        UploadedFile.objects.create(
+            user=user, dashboard=self.dashboard, url='https://example.com/a', meta='Meta description', h1='Heading',
+        )
+
+    def test_hidden_columns_are_neither_rendered_nor_loaded(self):
+        url = reverse('load_dashboard', args=[self.dashboard.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'hide': 'meta,h1'})
+
+        self.assertEqual(response.context['hidden_columns'], ['meta', 'h1'])
+        self.assertNotIn('meta', [column.name for column in response.context['table'].columns])
+        self.assertNotContains(response, 'Meta description')
+        self.assertNotContains(response, 'Heading')
+        page_query = next(query['sql'] for query in queries if '"url"' in query['sql'] and 'audit_uploadedfile' in query['sql'])
+        self.assertNotIn('"meta"', page_query)
+        self.assertNotIn('"h1"', page_query)
+        # The column filter menu shows them unchecked
+        self.assertContains(response, 'data-name="meta">')
+        self.assertContains(response, 'data-name="url" checked>')
+
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.dashboard = AuditDashboard.objects.create(user=self.owner, name='Client audit')
+        UploadedFile.objects.create(user=self.owner, dashboard=self.dashboard, url='https://example.com/a', action_choice='301', word_count=120)
+        UploadedFile.objects.create(user=self.owner, dashboard=self.dashboard, url='https://example.com/b', current_title='B & <C>')
+        self.url = reverse('export_dashboard', args=[self.dashboard.id])
+        self.client.force_login(self.owner)
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_has_the_table_columns_and_action_labels(self):
+        response, content = self.export()
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Client_audit.csv"')
+        header, *rows = csv.reader(io.StringIO(content.decode()))
+        self.assertEqual(header, export_headers())
+        self.assertEqual([row[EXPORT_FIELDS.index('url')] for row in rows], ['https://example.com/a', 'https://example.com/b'])
+        self.assertEqual(rows[0][EXPORT_FIELDS.index('action_choice')], dict(UploadedFile.ACTION_CHOICES)['301'])
+        self.assertEqual(rows[1][EXPORT_FIELDS.index('current_title')], 'B & <C>')
+
+    def test_xlsx_is_a_workbook_with_a_row_per_file(self):
+        _, content = self.export(format='xlsx')
+
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            self.assertIn('xl/workbook.xml', workbook.namelist())
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row '), 3)  # The header and two files
+        self.assertIn('<t xml:space="preserve">https://example.com/b</t>', sheet)
+        self.assertIn('B &amp; &lt;C&gt;', sheet)
+        self.assertIn('<v>120</v>', sheet)
+
+    def test_other_users_dashboards_are_not_exported(self):
+        self.client.force_login(User.objects.create_user(username='someone-else', email='else@example.com', password='x'))
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'format': 'xlsx'}).status_code, 404)
+
+
+class InSitemapCountTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        self.listed = AuditDashboard.objects.create(user=user, name='Listed')
+        self.other = AuditDashboard.objects.create(user=user, name='Other')
+        UploadedFile.objects.create(dashboard=self.listed, url='https://example.com/a')
+        UploadedFile.objects.create(dashboard=self.other, url='https://example.com/b')
+        refresh_dashboard_summaries([self.listed.id, self.other.id])
+        self.sitemap = Sitemap.objects.create(url='https://example.com/sitemap.xml')
+
+    def revisions(self):
+        return dict(AuditDashboard.objects.values_list('name', 'revision'))
+
+    def assert_only_listed_recounted(self, before):
+        after = self.revisions()
+        self.assertEqual(after['Listed'], before['Listed'] + 1)
+        self.assertEqual(after['Other'], before['Other'])
+        self.listed.summary.refresh_from_db()
+        self.assertEqual(self.listed.summary.in_sitemap_count, 1)
+
+    def test_sitemap_diff_recounts_only_changed_dashboards(self):
+        before = self.revisions()
+        diff = SitemapDiff(self.sitemap)
+        diff.apply([{'loc': 'https://example.com/a'}])
+        diff.finish()
+
+        self.assert_only_listed_recounted(before)
+
+    def test_status_update_for_a_sitemap_recounts_only_changed_dashboards(self):
+        self.sitemap.urls.create(url='https://example.com/a')
+        before = self.revisions()
+        update_in_sitemap_status(sitemap=self.sitemap)
+
+        self.assert_only_listed_recounted(before)
+
+    def test_flags_and_dashboards_come_from_one_update(self):
+        dashboard_ids = set()
+        with self.assertNumQueries(1):
+            updated = set_in_sitemap(UploadedFile.objects.filter(url__endswith='/a'), True, dashboard_ids)
+
+        self.assertEqual((updated, dashboard_ids), (1, {self.listed.id}))
+        self.assertTrue(UploadedFile.objects.get(url='https://example.com/a').in_sitemap)
+
+    def test_status_update_for_a_sitemap_is_driven_by_its_urls(self):
+        self.sitemap.urls.create(url='https://example.com/a')
+        with CaptureQueriesContext(connection) as queries:
+            update_in_sitemap_status(sitemap=self.sitemap)
+
+        [update] = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "audit_uploadedfile"')]
+        self.assertIn('"normalized_url" IN (SELECT', update)
+        self.assertIn('"sitemap_id" =', update)
+        self.assertNotIn('EXISTS', update)
+
+
+def urlset(*locs):
+    entries = ''.join(f'<url><loc>{loc}</loc></url>' for loc in locs)
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'.encode()
+
+
+def sitemapindex(*locs):
+    entries = ''.join(f'<sitemap><loc>{loc}</loc></sitemap>' for loc in locs)
+    return f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'.encode()
+
+
+class SitemapStub:
+    """A local HTTP server serving {path: body}, answering If-None-Match with 304 on ETag matches."""
+
+    def __init__(self, documents, etags=None):
+        self.documents = documents
+        self.etags = etags or {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append((self.path, self.headers.get('If-None-Match')))
+                etag = stub.etags.get(self.path)
+                if etag and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = stub.documents.get(self.path)
+                self.send_response(200 if body is not None else 404)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return self.base + path
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SitemapCrawlerTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = SitemapStub({})
+        self.addCleanup(self.stub.close)
+        url = self.stub.url
+        self.stub.documents.update({
+            '/index.xml': sitemapindex(url('/pages.xml'), url('/posts.xml.gz'), url('/nested.xml')),
+            '/nested.xml': sitemapindex(url('/deep.xml')),
+            '/pages.xml': urlset(url('/a'), url('/b')),
+            '/posts.xml.gz': gzip.compress(urlset(url('/c'))),
+            '/deep.xml': urlset(url('/d')),
+        })
+
+    def test_follows_indexes_and_gzip_with_stats(self):
+        result = SitemapCrawler(max_workers=4).crawl_many([self.stub.url('/index.xml')])[self.stub.url('/index.xml')]
+
+        self.assertEqual(sorted(result['urls']), [self.stub.url(path) for path in ('/a', '/b', '/c', '/d')])
+        stats = {stat['sitemap_url'].rsplit('/', 1)[-1]: stat for stat in result['stats']}
+        self.assertEqual(set(stats), {'index.xml', 'nested.xml', 'pages.xml', 'posts.xml.gz', 'deep.xml'})
+        self.assertEqual(stats['index.xml']['child_count'], 3)
+        self.assertEqual(stats['posts.xml.gz']['url_count'], 1)
+        self.assertTrue(all(stat['error'] is None and 'seconds' in stat for stat in result['stats']))
+
+    def test_depth_cap_stops_recursion(self):
+        result = SitemapCrawler(max_depth=1).crawl_many([self.stub.url('/index.xml')])[self.stub.url('/index.xml')]
+
+        self.assertNotIn(self.stub.url('/d'), result['urls'])
+        self.assertEqual(len(result['urls']), 3)
+        self.assertTrue(result['truncated'])
+
+    def test_sitemap_cap_marks_the_crawl_truncated(self):
+        result = SitemapCrawler(max_sitemaps=3).crawl_many([self.stub.url('/index.xml')])[self.stub.url('/index.xml')]
+
+        self.assertEqual(len(result['stats']), 3)
+        self.assertTrue(result['truncated'])
+
+    def test_uncapped_crawl_is_not_truncated(self):
+        result = SitemapCrawler().crawl_many([self.stub.url('/index.xml')])[self.stub.url('/index.xml')]
+
+        self.assertFalse(result['truncated'])
+
+    def test_sessions_are_per_thread_and_host(self):
+        pool = SessionPool()
+        here = pool.get('https://example.com/sitemap.xml', fallback=True)
+        self.assertIs(pool.get('https://example.com/other.xml', fallback=True), here)
+        self.assertIsNot(pool.get('https://example.org/sitemap.xml', fallback=True), here)
+
+        elsewhere = []
+        thread = threading.Thread(target=lambda: elsewhere.append(pool.get('https://example.com/sitemap.xml', fallback=True)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(elsewhere[0], here)
+
+
+
+class SitemapRefreshTests(TestCase):
+    """An index whose child sitemaps each send an ETag; refreshes revalidate every document."""
+
+    def setUp(self):
+        self.stub = SitemapStub({}, etags={'/index.xml': '"i1"', '/pages.xml': '"p1"', '/posts.xml': '"c1"'})
+        self.addCleanup(self.stub.close)
+        url = self.stub.url
+        self.stub.documents.update({
+            '/index.xml': sitemapindex(url('/pages.xml'), url('/posts.xml')),
+            '/pages.xml': urlset(url('/a'), url('/b')),
+            '/posts.xml': urlset(url('/c')),
+        })
+        self.sitemap = Sitemap.objects.create(url=url('/index.xml'))
+
+    def refresh(self):
+        self.stub.requests.clear()
+        [summary] = refresh_sitemaps([Sitemap.objects.get(pk=self.sitemap.pk)], SitemapCrawler(max_workers=2))
+        return summary
+
+    def stored(self):
+        return sorted(SitemapURL.objects.filter(sitemap=self.sitemap).values_list('url', flat=True))
+
+    def expected(self, *paths):
+        return [normalize_url(self.stub.url(path)) for path in paths]
+
+    def test_child_sitemaps_are_fetched_conditionally(self):
+        self.assertEqual(self.refresh()['added'], 3)
+        self.assertEqual(set(self.stub.requests), {('/index.xml', None), ('/pages.xml', None), ('/posts.xml', None)})
+
+        # An unmodified index still has its stored children revalidated
+        self.assertEqual(self.refresh()['status'], 'not_modified')
+        self.assertEqual(set(self.stub.requests), {('/index.xml', '"i1"'), ('/pages.xml', '"p1"'), ('/posts.xml', '"c1"')})
+
+        # Only the changed child is downloaded; the URLs of the unmodified one are kept
+        self.stub.documents['/posts.xml'] = urlset(self.stub.url('/c'), self.stub.url('/e'))
+        self.stub.etags['/posts.xml'] = '"c2"'
+        summary = self.refresh()
+        self.assertEqual((summary['status'], summary['added'], summary['removed']), ('updated', 1, 0))
+        self.assertEqual(self.stored(), self.expected('/a', '/b', '/c', '/e'))
+
+    def test_urls_of_a_dropped_child_are_removed(self):
+        self.refresh()
+        self.stub.documents['/index.xml'] = sitemapindex(self.stub.url('/posts.xml'))
+        self.stub.etags['/index.xml'] = '"i2"'
+
+        summary = self.refresh()
+
+        self.assertEqual((summary['status'], summary['removed']), ('updated', 2))
+        self.assertNotIn('/pages.xml', [path for path, _ in self.stub.requests])
+        self.assertEqual(self.stored(), self.expected('/c'))
+
+
+    def test_failed_refresh_recounts_the_urls_it_added(self):
+        user = User.objects.create_user(username='owner', password='x')
+        dashboard = AuditDashboard.objects.create(user=user, name='Sitemap')
+        for path in ('/a', '/b', '/z'):
+            UploadedFile.objects.create(user=user, dashboard=dashboard, url=self.stub.url(path))
+        refresh_dashboard_summaries([dashboard.id])
+        revision = AuditDashboard.objects.get(pk=dashboard.pk).revision
+        del self.stub.documents['/posts.xml']  # Answers 404 while /pages.xml adds /a and /b
+
+        summary = self.refresh()
+
+        self.assertEqual((summary['status'], summary['added']), ('failed', 2))
+        dashboard.refresh_from_db()
+        self.assertEqual(dashboard.summary.in_sitemap_count, 2)
+        self.assertGreater(dashboard.revision, revision)
+
+
+SCREAMING_FROG_CSV = (
+    b'Address,Content Type,Title 1,Meta Description 1,H1-1,Word Count,Canonical Link Element 1,'
+    b'Status Code,Indexability,Inlinks,Outlinks,Crawl Depth\n'
+    b'https://example.com/a,text/html,A,,A,100,,200,Indexable,3,4,1\n'
+    b'https://example.com/b,text/html,B,,B,200,,200,Indexable,1,2,2\n'
+)
+
+
+
+class IngestTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        self.dashboard = AuditDashboard.objects.create(user=user, name='Import')
+
+    def test_oversized_values_are_truncated_instead_of_failing_the_upload(self):
+        title = 'T' * 3000
+        csv_file = SCREAMING_FROG_CSV + f'https://example.com/c,text/html,{title},,C,300,,200,Indexable,1,1,1\n'.encode()
+
+        self.assertEqual(process_csv_file(ContentFile(csv_file), self.dashboard), 3)
+
+        rows = UploadedFile.objects.filter(dashboard=self.dashboard).order_by('url')
+        self.assertEqual([row.url for row in rows], ['https://example.com/a', 'https://example.com/b', 'https://example.com/c'])
+        self.assertEqual(len(rows[2].current_title), UploadedFile._meta.get_field('current_title').max_length)
+
+    def test_rejected_batch_falls_back_to_row_by_row_inserts(self):
+        existing = UploadedFile.objects.create(dashboard=self.dashboard, url='https://example.com/existing')
+        rows = [
+            UploadedFile(dashboard=self.dashboard, url='https://example.com/a'),
+            UploadedFile(id=existing.id, dashboard=self.dashboard, url='https://example.com/duplicate'),
+            UploadedFile(dashboard=self.dashboard, url='https://example.com/b'),
+        ]
+
+        stats = bulk_ingest(UploadedFile, iter(rows))
+
+        self.assertEqual((stats['rows'], stats['skipped']), (2, 1))
+        self.assertEqual(
+            sorted(UploadedFile.objects.filter(dashboard=self.dashboard).values_list('url', flat=True)),
+            ['https://example.com/a', 'https://example.com/b', 'https://example.com/existing'],
+        )
+
+
+class FakeDrive:
+    """Stands in for the Drive client: files().create(...).execute() records the upload."""
+
+    def __init__(self):
+        self.uploads = []
+
+    def files(self):
+        return self
+
+    def create(self, body, media_body, fields):
+        self.uploads.append(body['name'])
+        return self
+
+    def execute(self):
+        return {'id': f'drive-{len(self.uploads)}', 'webViewLink': f'https://drive.example.com/{len(self.uploads)}'}
+
+
+class UploadJobTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='owner', password='x')
+        self.dashboard = AuditDashboard.objects.create(user=self.user, name='Uploads')
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['current_dashboard_id'] = self.dashboard.id
+        session.save()
+
+    def queue_job(self, **fields):
+        job = AuditUploadJob(dashboard=self.dashboard, file_name='crawl.csv', **fields)
+        job.file.save('crawl.csv', ContentFile(SCREAMING_FROG_CSV), save=False)
+        job.save()
+        return job
+
+    def test_upload_returns_a_job_that_an_in_process_worker_completes(self):
+        response = self.client.post(
+            reverse('upload_file'), {'file': SimpleUploadedFile('crawl.csv', SCREAMING_FROG_CSV)},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        job_id = response.json()['job_id']
+        self.assertEqual(response.json()['status'], 'queued')
+
+        drive = FakeDrive()
+        self.assertEqual(run_pending_jobs(drive_service=drive), 1)
+
+        status = self.client.get(reverse('upload_job_status', args=[job_id])).json()
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['records_processed'], 2)
+        self.assertEqual(drive.uploads, ['crawl.csv'])
+        self.assertEqual(UploadedFile.objects.filter(dashboard=self.dashboard).count(), 2)
+        self.assertFalse(AuditUploadJob.objects.get(id=job_id).file)
+
+    def test_stale_jobs_are_requeued_or_failed(self):
+        stale = timezone.now() - STALE_JOB_TIMEOUT - timedelta(minutes=1)
+        uploading = self.queue_job(status='uploading', attempts=1, started_at=stale, heartbeat_at=stale)
+        processing = self.queue_job(status='processing', attempts=1, started_at=stale, heartbeat_at=stale)
+        exhausted = self.queue_job(status='uploading', attempts=MAX_ATTEMPTS, started_at=stale, heartbeat_at=stale)
+        alive = self.queue_job(status='processing', attempts=1, started_at=stale, heartbeat_at=timezone.now())
+
+        self.assertEqual(reclaim_stale_jobs(), (1, 2))
+
+        statuses = dict(AuditUploadJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[uploading.id], 'queued')
+        self.assertEqual(statuses[processing.id], 'failed')
+        self.assertEqual(statuses[exhausted.id], 'failed')
+        self.assertEqual(statuses[alive.id], 'processing')
+
+        # The worker picks the re-queued upload up again
+        run_pending_jobs(drive_service=FakeDrive())
+        uploading.refresh_from_db()
+        self.assertEqual((uploading.status, uploading.attempts), ('completed', 2))
+
+    def test_deleting_the_dashboard_removes_queued_upload_files(self):
+        job = self.queue_job()
+        storage, name = job.file.storage, job.file.name
+        other = AuditDashboard.objects.create(user=self.user, name='Other')
+        kept = AuditUploadJob(dashboard=other, file_name='kept.csv')
+        kept.file.save('kept.csv', ContentFile(SCREAMING_FROG_CSV))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post(reverse('delete_dashboard', args=[self.dashboard.id]))
+            self.assertTrue(storage.exists(name))  # Kept until the deletes commit
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(AuditUploadJob.objects.filter(id=job.id).exists())
+        self.assertFalse(storage.exists(name))
+        self.assertTrue(storage.exists(kept.file.name))
+
+
+
+class PeakMemoryTests(SimpleTestCase):
+    def test_falls_back_to_tracemalloc_without_proc_or_resource(self):
+        with mock.patch.object(benchmarks, 'resource', None), mock.patch.object(benchmarks, 'current_rss', return_value=None):
+            with benchmarks.PeakRSS() as peak:
+                block = bytearray(8 * 2 ** 20)
+            del block
+
+        self.assertEqual(peak.source, 'tracemalloc')
+        self.assertGreaterEqual(peak.peak, 8 * 2 ** 20)
+
+
+
+@skipUnless(connection.vendor != 'postgresql', "PostgreSQL uses full-text search instead of the LIKE fallback.")
+class SearchFallbackTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        dashboard = AuditDashboard.objects.create(user=user, name='Shop')
+        self.matches = [
+            UploadedFile.objects.create(dashboard=dashboard, url='https://example.com/shoes'),
+            UploadedFile.objects.create(dashboard=dashboard, url='https://example.com/a', current_title='Running SHOES'),
+            UploadedFile.objects.create(dashboard=dashboard, url='https://example.com/b', meta='Shoes for every day'),
+            UploadedFile.objects.create(dashboard=dashboard, url='https://example.com/c', h1='Trail shoes'),
+            UploadedFile.objects.create(dashboard=dashboard, url='https://example.com/d', main_kw='cheap shoes'),
+        ]
+        UploadedFile.objects.create(dashboard=dashboard, url='https://example.com/hats', current_title='Hats')
+        UploadedFile.objects.create(dashboard=None, url='https://example.com/unsaved-shoes')  # Not in a saved dashboard
+
+    def test_matches_every_field_case_insensitively_in_id_order(self):
+        results, has_next = search_uploaded_files('  shoes ')
+
+        self.assertEqual(search_backend(), 'like')
+        self.assertEqual([uploaded_file.id for uploaded_file in results], [row.id for row in self.matches])
+        self.assertFalse(has_next)
+        self.assertEqual(results[0].dashboard.name, 'Shop')
+
+    def test_pages_by_offset(self):
+        first, has_next = search_uploaded_files('shoes', page=1, per_page=3)
+        self.assertEqual([row.id for row in first], [row.id for row in self.matches[:3]])
+        self.assertTrue(has_next)
+
+        second, has_next = search_uploaded_files('shoes', page=2, per_page=3)
+        self.assertEqual([row.id for row in second], [row.id for row in self.matches[3:]])
+        self.assertFalse(has_next)
+
+    def test_blank_query_returns_nothing(self):
+        self.assertEqual(search_uploaded_files('   '), ([], False))
+
+    def test_ajax_search_returns_json(self):
+        response = self.client.get(reverse('search_dashboards'), {'q': 'trail'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        data = response.json()
+        self.assertEqual([result['id'] for result in data['results']], [self.matches[3].id])
+        self.assertEqual(data['results'][0]['dashboard'], 'Shop')
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN index checks need PostgreSQL.")
+class FilterIndexPlanTests(TestCase):
+    """
+    Asserts via EXPLAIN that representative filters and the cross-dashboard search use
+    their indexes. Sequential scans are disabled, as a test table is always small.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        self.dashboard = AuditDashboard.objects.create(user=user, name='Plans')
+        for path in ('blog/first-post', 'shop/shoes', 'about'):
+            UploadedFile.objects.create(
+                dashboard=self.dashboard, url=f'https://example.com/{path}', current_title=path.replace('/', ' '),
+            )
+
+    def assertUsesIndexes(self, queryset, *indexes):
+        used = plan_indexes(explain(queryset, force_index=True))
+        for index in indexes:
+            self.assertIn(index, used)
+
+    def filtered(self, **params):
+        return UploadedFileFilter(params, queryset=UploadedFile.objects.filter(dashboard=self.dashboard)).qs
+
+    def test_dashboard_filters_use_composite_indexes(self):
+        self.assertUsesIndexes(self.filtered(action_choice='301'), model_index('dashboard', 'action_choice'))
+        self.assertUsesIndexes(self.filtered(in_sitemap='False'), model_index('dashboard', 'in_sitemap'))
+
+    def test_url_contains_uses_trigram_index(self):
+        queryset = UploadedFileFilter({'url_contains': 'contains', 'url_value': 'blog'}, queryset=UploadedFile.objects.all()).qs
+        self.assertUsesIndexes(queryset, TRIGRAM_INDEX)
+
+    def test_search_uses_search_vector_and_trigram_indexes(self):
+        self.assertUsesIndexes(search_queryset('shoes'), 'audit_uploadedfile_search_vector', TRIGRAM_INDEX)
@@ -5,6 +5,7 @@ from .views import populate_audit_dashboard_with_search_console_data
 
 urlpatterns = [
     path('upload/', views.upload_file, name='upload_file'),  # For uploading files
+    path('upload-jobs/<int:job_id>/', views.upload_job_status, name='upload_job_status'),  # Poll queued upload progress
     path('results/', views.audit_result, name='audit_result'),  # A placeholder for showing results
     path('crawl-sitemaps/', views.crawl_sitemaps, name='crawl_sitemaps'),  # For crawling sitemaps
     path('dashboard/', views.audit_dashboard, name='audit_dashboard'),
@@ -15,13 +16,17 @@ urlpatterns = [
     
     path('update-action-choice/', views.update_action_choice, name='update_action_choice'),  # URL for updating actions
     path('update-category/', views.update_category, name='update_category'),
+    path('update-choices/', views.update_choices_batch, name='update_choices_batch'),  # Batched inline edits
     path('sitemaps/delete/<int:sitemap_id>/', views.delete_sitemap, name='delete_sitemap'),
+    path('sitemaps/refresh/<int:sitemap_id>/', views.refresh_sitemap, name='refresh_sitemap'),  # Conditional re-crawl
     path('fetch-data/', populate_audit_dashboard_with_search_console_data, name='fetch_search_console_data'),
     path('save-audit-dashboard/', views.save_audit_dashboard, name='save_audit_dashboard'),
     
     path('list-dashboard/', views.list_dashboard, name='list_dashboard'),  # List all saved dashboards
+    path('search/', views.search_dashboards, name='search_dashboards'),  # Search across saved dashboards
     
     path('load-dashboard/<int:id>/', views.load_dashboard, name='load_dashboard'),
+    path('export-dashboard/<int:id>/', views.export_dashboard, name='export_dashboard'),  # Streamed CSV/XLSX export
     path('delete-dashboard/<int:id>/', views.delete_dashboard, name='delete_dashboard'),
     path('generate-share-link/<int:id>/', views.generate_shareable_link, name='generate_shareable_link'),
     path('shared-dashboard/<str:share_token>/', views.shared_dashboard, name='shared_dashboard'),
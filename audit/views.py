@@ -1,40 +1,43 @@
 # views.py
 
-import os
 import csv
 import re
 import logging
-import tempfile
 import json
-import xml.etree.ElementTree as ET
-import cloudscraper
-import certifi
-import ssl
-from urllib.parse import urlparse
+import time
 from uuid import uuid4
 from datetime import datetime, timedelta
 
 from django.urls import reverse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.core.cache import cache
 from django.http import (
+    HttpResponse,
     HttpResponseBadRequest,
     JsonResponse,
     HttpResponseServerError,
+    StreamingHttpResponse,
 )
-from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.csrf import csrf_protect, ensure_csrf_cookie
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q, ProtectedError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, ProtectedError
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_POST
 from django_tables2 import RequestConfig
 from django.views.decorators.csrf import csrf_exempt
-from requests import Timeout
-import requests
 
 from google_auth import SERVICE_ACCOUNT_FILE
 from keywords.models import KeywordResearchDashboard
-
+from search_console.fetcher import iter_search_analytics_rows
+from search_console.warehouse import answer as warehouse_answer
+
+from .caching import shared_dashboard_cache_key, shared_dashboard_timeout
+from .crawler import SitemapCrawler
+from .deletion import bulk_delete
+from .exports import EXPORT_FORMATS, stream_csv, stream_xlsx
+from .edits import InvalidEdit, apply_edits
 from .filters import UploadedFileFilter
 from .forms import (
     AuditDashboardForm,
@@ -42,12 +45,18 @@ from .forms import (
     SitemapForm,
     UploadedFileForm,
 )
-from .models import AuditDashboard, UploadedFile, SitemapURL, Sitemap
-from .utils import identify_csv_type, normalize_page_path
+from .models import AuditDashboard, AuditDashboardSummary, AuditUploadJob, UploadedFile, SitemapURL, Sitemap
+from .ingest import bulk_ingest, bulk_merge, clamp_lengths, field_max_lengths, iter_decoded_lines
+from .sitemaps import create_sitemap_urls, refresh_sitemaps, save_crawl_state, set_in_sitemap
+from .columnar import LOSING_TRAFFIC, iter_column_chunks
+from .csv_schemas import audit_schemas
+from .utils import normalize_page_path, normalize_url
+from .pagination import paginate_keyset
+from .search import search_backend, search_uploaded_files
+from .summaries import apply_choice_changes, refresh_dashboard_summaries, refresh_dashboard_summary, refresh_in_sitemap_counts
 from .tables import UploadedFileTable
 
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 from google.oauth2 import service_account
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
 
@@ -97,12 +106,11 @@ def get_search_console_credentials():
         return None
 
 def audit_result(request):
-    # Order the audit_data queryset by 'uploaded_at' to ensure consistent ordering across pages
-    audit_data = UploadedFile.objects.all().order_by('uploaded_at')  # You can replace 'uploaded_at' with any other field if needed
-    logging.info(f"Audit data retrieved for dashboard: {len(audit_data)} files.")
+    # Keyset pagination ordered by 'uploaded_at' (then id) for consistent ordering across pages,
+    # loading only the fields the table displays; columns hidden with ?hide= are not loaded
+    hidden_columns = UploadedFileTable.hidden_columns(request)
+    audit_data = UploadedFile.objects.only(*UploadedFileTable.projection(hidden_columns))
 
-    # Pagination Logic
-    page_number = request.GET.get('page', 1)
     rows_per_page = request.GET.get('rows', 15)  # Default to 15 rows per page
 
     # Ensure rows_per_page is an integer
@@ -113,33 +121,21 @@ def audit_result(request):
     except ValueError:
         rows_per_page = 15
 
-    paginator = Paginator(audit_data, rows_per_page)
+    page_obj = paginate_keyset(request, audit_data, rows_per_page, default_sort='uploaded_at', sortable=UploadedFileTable.Meta.fields)
+    logging.info(f"Audit data page retrieved: {len(page_obj)} files.")
 
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver the first page
-        page_obj = paginator.get_page(1)
-    except EmptyPage:
-        # If page is out of range, deliver the last page of results
-        page_obj = paginator.get_page(paginator.num_pages)
+    # The page is already sorted by the database
+    table = UploadedFileTable(page_obj.object_list, orderable=False, exclude=hidden_columns)
 
     return render(request, 'audit/audit_dashboard.html', {
         'audit_data': page_obj,
-        'paginator': paginator,
+        'table': table,
         'page_obj': page_obj,
         'rows_per_page': rows_per_page,  # Pass rows_per_page to the template
+        'hidden_columns': hidden_columns,
+        'column_choices': UploadedFileTable.column_choices(hidden_columns),
     })
 
-def normalize_url(url):
-    url = url.strip().lower()  # Convert to lowercase and strip spaces
-    parsed_url = urlparse(url)
-    netloc = parsed_url.netloc
-    if netloc.startswith('www.'):
-        netloc = netloc[4:]
-    path = parsed_url.path.rstrip('/')
-    return netloc + path
-
 def upload_file(request):
     # Retrieve the current dashboard from the session
     dashboard_id = request.session.get('current_dashboard_id')
@@ -167,80 +163,24 @@ def upload_file(request):
                 logging.warning(f"File too large: {file.name}, size: {file.size} bytes")
                 return render(request, 'audit/upload.html', {'form': form})
 
-            temp_file_path = None
-            try:
-                # Create a temporary file for uploading
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    temp_file_path = temp_file.name
-                    for chunk in file.chunks():
-                        temp_file.write(chunk)
-                    temp_file.flush()
-                    logging.info(f"Temporary file created: {temp_file_path}")
-
-                # Step 1: Get Google Drive credentials
-                creds = get_drive_credentials()
-                if not creds:
-                    messages.error(request, "Google Drive authentication failed.")
-                    logging.error("Google Drive authentication failed.")
-                    return redirect('audit_dashboard')
-
-                # Step 2: Upload the file to Google Drive
-                try:
-                    service = build('drive', 'v3', credentials=creds)
-                    file_metadata = {
-                        'name': file.name,
-                        'parents': [GOOGLE_DRIVE_FIXED_FOLDER_ID],
-                        'mimeType': 'text/csv'
-                    }
-                    media = MediaFileUpload(temp_file_path, mimetype='text/csv')
-
-                    uploaded_file_drive = service.files().create(
-                        body=file_metadata,
-                        media_body=media,
-                        fields='id, webViewLink'
-                    ).execute()
-
-                    drive_file_id = uploaded_file_drive.get('id')
-                    drive_file_link = uploaded_file_drive.get('webViewLink')
-
-                    logging.info(f"File uploaded to Google Drive: {drive_file_id}, link: {drive_file_link}")
-
-                    if not drive_file_id or not drive_file_link:
-                        raise Exception("Failed to upload file to Google Drive")
-
-                    # Step 3: Process CSV data before storing in the database
-                    file.seek(0)  # Reset file pointer to process CSV
-                    records_processed = process_csv_file(file, audit_dashboard)
-
-                    if records_processed > 0:
-                        messages.success(request, "File uploaded successfully and audit data processed.")
-                        logging.info(f"CSV processing successful. Records processed: {records_processed}")
-
-                        # Step 4: Update the 'In Sitemap' status after saving the uploaded data
-                        update_in_sitemap_status(audit_dashboard)
-                    else:
-                        logging.warning("The CSV file is empty or could not be processed.")
-                        messages.error(request, "The CSV file is empty or could not be processed.")
-
-                except Exception as e:
-                    logging.error(f"Google Drive upload error: {e}")
-                    messages.error(request, f"An error occurred while uploading the file to Google Drive: {e}")
-                    return redirect('audit_dashboard')
-
-            except Exception as e:
-                logging.error(f"Error during file processing: {e}")
-                messages.error(request, f"An error occurred while processing the file: {e}")
+            # Store the file and hand the Drive upload and CSV processing to the job worker
+            job = AuditUploadJob.objects.create(
+                user=request.user if request.user.is_authenticated else None,
+                dashboard=audit_dashboard,
+                file=file,
+                file_name=file.name,
+            )
+            logging.info(f"Upload job {job.id} queued for file: {file.name}")
 
-            finally:
-                # Ensure the file is closed before removing it
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.remove(temp_file_path)
-                        logging.info(f"Temporary file deleted: {temp_file_path}")
-                    except PermissionError:
-                        logging.debug(f"Retry failed to delete temp file. File may still be in use: {temp_file_path}")
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({
+                    'success': True,
+                    'job_id': job.id,
+                    'status': job.status,
+                    'status_url': reverse('upload_job_status', args=[job.id]),
+                })
 
-            # After successful upload, redirect to the specific dashboard
+            messages.success(request, "File uploaded. The audit data is being processed in the background.")
             return redirect('load_dashboard', id=audit_dashboard.id)
 
     else:
@@ -248,21 +188,41 @@ def upload_file(request):
 
     return render(request, 'audit/upload.html', {'form': form})
 
+def upload_job_status(request, job_id):
+    """
+    Returns the progress of a queued upload as JSON so the dashboard can poll it.
+    """
+    job = get_object_or_404(AuditUploadJob, id=job_id)
+    return JsonResponse({
+        'success': True,
+        'job_id': job.id,
+        'file_name': job.file_name,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'is_finished': job.is_finished,
+        'records_processed': job.records_processed,
+        'error': job.error,
+        'dashboard_url': reverse('load_dashboard', args=[job.dashboard_id]),
+    })
+
 def fetch_search_console_data(creds, site_url, start_date, end_date):
     try:
-        service = build('webmasters', 'v3', credentials=creds)
-
         # Define the query for search analytics
         request_body = {
             'startDate': start_date,
             'endDate': end_date,
-            'dimensions': ['page'],
-            'rowLimit': 1000  # Adjust the row limit as needed
+            'dimensions': ['page'],  # No rowLimit: every page of the site is fetched
         }
 
-        # Make the API request to get the search analytics data
-        response = service.searchanalytics().query(siteUrl=site_url, body=request_body).execute()
-        return response.get('rows', [])
+        # Synced sites are answered from the local Search Console warehouse
+        rows = warehouse_answer(site_url, request_body)
+        if rows is not None:
+            return rows
+
+        # Make the API requests, paging past 25k rows; each fetcher thread builds its own service
+        return list(iter_search_analytics_rows(
+            lambda: build('webmasters', 'v3', credentials=creds), site_url, request_body
+        ))
 
     except Exception as e:
         logging.error(f"Error fetching data from Google Search Console: {e}")
@@ -296,6 +256,7 @@ def populate_audit_dashboard_with_search_console_data(request):
         return redirect('audit_dashboard')
 
     # Process and update the audit dashboard with the fetched data
+    touched_dashboards = set()
     for row in rows:
         try:
             page_url = row['keys'][0]  # The 'page' dimension (URL)
@@ -310,6 +271,7 @@ def populate_audit_dashboard_with_search_console_data(request):
                     'serp_ctr': ctr,
                 }
             )
+            touched_dashboards.add(uploaded_file.dashboard_id)
             if created:
                 logging.info(f"Created new record for {page_url} with impressions: {impressions}, CTR: {ctr}%.")
             else:
@@ -319,93 +281,15 @@ def populate_audit_dashboard_with_search_console_data(request):
         except Exception as e:
             logging.error(f"Error updating audit data for {page_url}: {e}")
 
+    touched_dashboards.discard(None)
+    refresh_dashboard_summaries(touched_dashboards)
+
     # Notify the user about the successful update
     messages.success(request, "Audit data updated with the last 6 months of Search Console data.")
     return redirect('audit_dashboard')
 
-def scrape_sitemap(sitemap_url):
-    """
-    Scrapes the sitemap from the given URL.
-    Tries using cloudscraper first, falls back to requests if necessary.
-    """
-    # Define headers to mimic a real browser
-    headers = {
-        'User-Agent': (
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/91.0.4472.124 Safari/537.36'
-        )
-    }
-
-    # First attempt with cloudscraper, using TLS 1.2 and certifi for SSL certificates
-    scraper = cloudscraper.create_scraper(ssl_context=ssl.SSLContext(ssl.PROTOCOL_TLSv1_2))
-    try:
-        logging.debug(f"Attempting to fetch sitemap with cloudscraper: {sitemap_url}")
-        response = scraper.get(sitemap_url, headers=headers, timeout=10, verify=certifi.where())  # Using certifi certificates
-        response.raise_for_status()
-        logging.debug(f"Response Status Code with cloudscraper: {response.status_code}")
-        logging.debug(f"Response Content (first 500 characters): {response.text[:500]}")
-
-        # Parse the sitemap XML
-        return parse_sitemap(response.content, sitemap_url)
-
-    except (ssl.SSLError, ConnectionError, Timeout) as e:
-        logging.error(f"cloudscraper failed for {sitemap_url}. Error: {e}")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"RequestException with cloudscraper for {sitemap_url}. Error: {e}")
-
-    # Fallback attempt with requests, disabling SSL verification
-    try:
-        logging.debug(f"Attempting to fetch sitemap with requests: {sitemap_url}")
-        response = requests.get(sitemap_url, headers=headers, timeout=10, verify=False)  # Disable SSL verification
-        response.raise_for_status()
-        logging.debug(f"Response Status Code with requests: {response.status_code}")
-        logging.debug(f"Response Content (first 500 characters): {response.text[:500]}")
-
-        # Parse the sitemap XML
-        return parse_sitemap(response.content, sitemap_url)
-
-    except (ssl.SSLError, ConnectionError, Timeout) as e:
-        logging.error(f"requests failed for {sitemap_url}. Error: {e}")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"RequestException with requests for {sitemap_url}. Error: {e}")
-
-    # If both attempts fail, return None
-    logging.warning(f"Both cloudscraper and requests failed to fetch the sitemap: {sitemap_url}")
-    return None
-
-def parse_sitemap(content, sitemap_url):
-    """
-    Parses the sitemap XML content and returns a list of URLs.
-    """
-    try:
-        root = ET.fromstring(content)
-        urls = []
-        namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-
-        if root.tag.endswith('sitemapindex'):
-            # Sitemap index file
-            for sitemap in root.findall('ns:sitemap', namespace):
-                loc = sitemap.find('ns:loc', namespace).text
-                urls.append(loc)
-            logging.info(f"Sitemap index scraped successfully: {sitemap_url}")
-
-        elif root.tag.endswith('urlset'):
-            # Regular sitemap file
-            for url in root.findall('ns:url', namespace):
-                loc = url.find('ns:loc', namespace).text
-                urls.append(loc)
-            logging.info(f"Sitemap scraped successfully: {sitemap_url}")
-
-        else:
-            logging.warning(f"Unknown sitemap type for URL: {sitemap_url}")
-            return None
-
-        return urls
-
-    except ET.ParseError as parse_err:
-        logging.error(f"XML parsing error for sitemap: {sitemap_url}. Error: {parse_err}")
-        return None
+# Number of crawled URLs listed per sitemap in the crawl results panel
+CRAWL_RESULTS_PREVIEW = 100
 
 @csrf_protect
 def crawl_sitemaps(request):
@@ -417,37 +301,51 @@ def crawl_sitemaps(request):
             # Handle AJAX POST request
             form = SitemapForm(request.POST)
             if form.is_valid():
-                sitemap_urls = form.cleaned_data['sitemap_urls'].splitlines()
+                # Drop blank lines and duplicates while keeping the pasted order
+                sitemap_urls = list(dict.fromkeys(
+                    url.strip() for url in form.cleaned_data['sitemap_urls'].splitlines() if url.strip()
+                ))
                 new_sitemaps = []
                 failed_sitemaps = []
+                crawl_stats = {}
+
+                # Sitemap rows are created when a sitemap yields its first batch of URLs
+                stored_sitemaps = {}
+
+                def store_entries(sitemap_url, entries):
+                    sitemap = stored_sitemaps.get(sitemap_url)
+                    if sitemap is None:
+                        sitemap = stored_sitemaps[sitemap_url] = Sitemap.objects.create(url=sitemap_url)
+                        crawled_results[sitemap_url] = {'urls': [], 'total': 0}
+                    create_sitemap_urls(sitemap, entries)
+
+                    # Keep only a short preview of the URLs for the results panel
+                    result = crawled_results[sitemap_url]
+                    result['total'] += len(entries)
+                    room = CRAWL_RESULTS_PREVIEW - len(result['urls'])
+                    if room > 0:
+                        result['urls'].extend(normalize_url(entry['loc']) for entry in entries[:room])
+
+                # Fetch all sitemaps (and their child sitemaps) concurrently, storing URLs as they stream in
+                crawl = SitemapCrawler().crawl_many(sitemap_urls, on_entries=store_entries)
 
                 for sitemap_url in sitemap_urls:
-                    sitemap_url = sitemap_url.strip()
-                    if sitemap_url:
-                        urls = scrape_sitemap(sitemap_url)
-                        if urls:
-                            # Normalize the sitemap URLs before saving them
-                            normalized_urls = [normalize_url(url) for url in urls]
-
-                            # Create Sitemap entry
-                            sitemap = Sitemap.objects.create(url=sitemap_url)
-
-                            # Save the normalized sitemap URLs
-                            sitemap_urls_bulk = [
-                                SitemapURL(sitemap=sitemap, url=url) for url in normalized_urls
-                            ]
-                            SitemapURL.objects.bulk_create(sitemap_urls_bulk)
-                            new_sitemaps.append(sitemap)
-                            crawled_results[sitemap_url] = normalized_urls
-                            logging.info(f"Sitemap URLs stored for: {sitemap_url}")
-
-                            # Step 1: Update the 'In Sitemap' status for crawled URLs
-                            update_in_sitemap_status()
+                    crawl_stats[sitemap_url] = crawl[sitemap_url]['stats']
+                    sitemap = stored_sitemaps.get(sitemap_url)
+                    if sitemap:
+                        new_sitemaps.append(sitemap)
+                        logging.info(f"{crawl[sitemap_url]['url_count']} sitemap URLs stored for: {sitemap_url}")
 
-                        else:
-                            failed_sitemaps.append(sitemap_url)
-                            crawled_results[sitemap_url] = 'Failed to crawl the sitemap.'
-                            logging.warning(f"Failed to crawl sitemap: {sitemap_url}")
+                        # Keep each document's ETag, Last-Modified and children for conditional refreshes
+                        save_crawl_state(sitemap, crawl[sitemap_url])
+
+                        # Step 1: Update the 'In Sitemap' status for URLs in this sitemap only
+                        update_in_sitemap_status(sitemap=sitemap)
+
+                    else:
+                        failed_sitemaps.append(sitemap_url)
+                        crawled_results[sitemap_url] = 'Failed to crawl the sitemap.'
+                        logging.warning(f"Failed to crawl sitemap: {sitemap_url}")
 
                 # Fetch the updated sitemaps list
                 sitemaps = Sitemap.objects.all().order_by('-added_at')
@@ -476,6 +374,7 @@ def crawl_sitemaps(request):
                     'success': True,
                     'crawl_results_html': crawl_results_html,
                     'sitemaps_html': sitemaps_html,
+                    'crawl_stats': crawl_stats,
                 })
 
             else:
@@ -544,39 +443,69 @@ def delete_sitemap(request, sitemap_id):
             return JsonResponse({'success': False, 'error': 'Invalid request.'}, status=400)
     return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=400)
 
-def update_in_sitemap_status(audit_dashboard=None):
+@csrf_protect
+def refresh_sitemap(request, sitemap_id):
     """
-    Updates the 'in_sitemap' field in UploadedFile by checking
-    if the 'url' exists in the crawled SitemapURL entries.
-    If audit_dashboard is provided, only updates files associated with that dashboard.
+    Re-crawls one stored sitemap with a conditional GET and applies the added/removed
+    URL diff (see refresh_sitemaps). Returns the diff summary and the refreshed list.
     """
-    # Fetch all sitemap URLs and normalize them for comparison
-    sitemap_urls = SitemapURL.objects.values_list('url', flat=True)
-    normalized_sitemap_urls = set(normalize_url(url) for url in sitemap_urls)
-
-    # Fetch audit files
-    if audit_dashboard:
-        audit_files = UploadedFile.objects.filter(dashboard=audit_dashboard)
-    else:
-        audit_files = UploadedFile.objects.all()
+    if request.method == 'POST':
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            try:
+                sitemap = get_object_or_404(Sitemap, id=sitemap_id)
+                summary = refresh_sitemaps([sitemap])[0]
+                if summary['status'] == 'failed':
+                    return JsonResponse({'success': False, 'error': 'Failed to crawl the sitemap.', 'summary': summary})
 
-    # Batch update to avoid too many save() calls in a loop
-    bulk_updates = []
+                # Fetch the updated sitemaps list
+                sitemaps = Sitemap.objects.all().order_by('-added_at')
+                paginator = Paginator(sitemaps, 10)
+                page_number = request.GET.get('page', 1)
+                try:
+                    page_obj = paginator.get_page(page_number)
+                except PageNotAnInteger:
+                    page_obj = paginator.get_page(1)
+                except EmptyPage:
+                    page_obj = paginator.get_page(paginator.num_pages)
 
-    for audit_file in audit_files:
-        normalized_audit_url = normalize_url(audit_file.url)
+                sitemaps_html = render_to_string('audit/sitemap_list.html', {'sitemaps': page_obj}, request=request)
 
-        # If the audit file URL is in the normalized sitemap URLs, mark it as 'in_sitemap'
-        new_in_sitemap_status = normalized_audit_url in normalized_sitemap_urls
+                return JsonResponse({'success': True, 'summary': summary, 'sitemaps_html': sitemaps_html})
+            except Exception as e:
+                logging.error(f"Error refreshing sitemap {sitemap_id}: {e}")
+                return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        else:
+            return JsonResponse({'success': False, 'error': 'Invalid request.'}, status=400)
+    return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=400)
 
-        # Only update if there is a change to avoid unnecessary saves
-        if audit_file.in_sitemap != new_in_sitemap_status:
-            audit_file.in_sitemap = new_in_sitemap_status
-            bulk_updates.append(audit_file)
+def update_in_sitemap_status(audit_dashboard=None, sitemap=None):
+    """
+    Updates the 'in_sitemap' field in UploadedFile with set-based UPDATE ... WHERE EXISTS
+    queries joining on the indexed normalized_url columns.
+    If audit_dashboard is provided, only updates files associated with that dashboard.
+    If sitemap is provided, only that sitemap's URLs are matched, driven from its own
+    rows through normalized_url IN (...), so adding a sitemap never scans the whole
+    table; it can only turn flags on, so rows already in a sitemap are left alone.
+    """
+    audit_files = UploadedFile.objects.all()
+    if audit_dashboard:
+        audit_files = audit_files.filter(dashboard=audit_dashboard)
+
+    # Only rows whose status actually changes are written, and only their dashboards recounted
+    dashboard_ids = set()
+    unmarked = 0
+    if sitemap is not None:
+        sitemap_urls = SitemapURL.objects.filter(sitemap=sitemap).values('normalized_url')
+        marked = set_in_sitemap(audit_files.filter(in_sitemap=False, normalized_url__in=sitemap_urls), True, dashboard_ids)
+    else:
+        sitemap_urls = SitemapURL.objects.filter(normalized_url=OuterRef('normalized_url'))
+        marked = set_in_sitemap(audit_files.filter(in_sitemap=False).filter(Exists(sitemap_urls)), True, dashboard_ids)
+        unmarked = set_in_sitemap(audit_files.filter(in_sitemap=True).filter(~Exists(sitemap_urls)), False, dashboard_ids)
 
-    # Use Django's bulk_update to update all files in a single query
-    if bulk_updates:
-        UploadedFile.objects.bulk_update(bulk_updates, ['in_sitemap'])
+    logging.info(f"In Sitemap status updated: {marked} marked, {unmarked} unmarked.")
+    if dashboard_ids:
+        refresh_in_sitemap_counts(dashboard_ids)
+    return marked + unmarked
 
 def get_page_path(url):
     """
@@ -594,379 +523,226 @@ def get_page_path(url):
 
     return path
 
+def iter_screaming_frog_records(reader, columns, audit_dashboard):
+    """
+    Converts Screaming Frog CSV rows into unsaved UploadedFile instances one at a time,
+    using the schema's converters (column by column per chunk when the columnar stage is on).
+    Rows that cannot be converted are logged and skipped; values longer than their
+    column are truncated (and logged) rather than failing the insert.
+    """
+    max_lengths = field_max_lengths(UploadedFile)
+    for data in iter_column_chunks(reader, columns):
+        for row_values in zip(*data.values()):
+            values = dict(zip(data, row_values))
+            url = values['url']
+            uploaded_file = UploadedFile(
+                dashboard=audit_dashboard,  # Associate with the dashboard
+                normalized_url=normalize_url(url) if url else '',
+                page_path=get_page_path(url) if url else '/',
+                **values,
+            )
+            clamped = clamp_lengths(uploaded_file, max_lengths)
+            if clamped:
+                logging.warning(f"Truncated {', '.join(clamped)} of {url[:200]} to fit the column length")
+            yield uploaded_file
+
+# Fields written by each enrichment CSV type; bulk_update() only touches these columns
+KEYWORD_RESEARCH_FIELDS = ['main_kw', 'kw_volume', 'kw_ranking', 'best_kw', 'best_kw_volume', 'best_kw_ranking']
+SEARCH_CONSOLE_FIELDS = ['impressions', 'serp_ctr']
+GOOGLE_ANALYTICS_FIELDS = ['sessions', 'bounce_rate', 'avg_time_on_page', 'percent_change_sessions', 'losing_traffic']
+BACKLINKS_FIELDS = ['links']
+
+def get_dashboard_url_lookup(audit_dashboard):
+    """
+    Maps normalized URLs to UploadedFile ids for a dashboard using a narrow values() projection,
+    so enrichment merges never instantiate full 40-column model rows.
+    """
+    return {
+        normalized_url: uploaded_file_id
+        for uploaded_file_id, normalized_url in UploadedFile.objects.filter(
+            dashboard=audit_dashboard
+        ).values_list('id', 'normalized_url')
+    }
+
 def process_csv_file(file, audit_dashboard):
     records_processed = 0  # Initialize the counter
     try:
-        # Decode and split the CSV file for processing
-        decoded_file = file.read().decode('utf-8-sig').splitlines()  # Handles BOM (\ufeff) if present
-        logging.debug(f"CSV File Content: {decoded_file[:5]}")  # Log the first few lines for sanity check
-
-        if not decoded_file:
-            logging.error("The CSV file is empty.")
-            return records_processed  # Return 0
-
-        reader = csv.reader(decoded_file)
+        # Decode the CSV file lazily so large uploads are never held in memory as a whole
+        reader = csv.reader(iter_decoded_lines(file))  # Handles BOM (\ufeff) if present
         headers = next(reader, None)  # Get the header row
         if headers is None:
-            logging.error("No headers found in the CSV file.")
+            logging.error("The CSV file is empty or has no headers.")
             return records_processed  # Return 0
 
         logging.debug(f"CSV Headers: {headers}")  # Log headers for debugging
 
-        # Determine the type of CSV
-        csv_type = identify_csv_type(headers)
+        # Determine the type of CSV and resolve its columns in one pass over the headers
+        csv_type, columns = audit_schemas.identify(headers)
         logging.info(f"Detected CSV type: {csv_type}")
 
-        # Normalize headers and create a mapping
-        normalized_headers = [header.strip().lower() for header in headers]
-        header_to_index = {header.strip().lower(): index for index, header in enumerate(headers)}
-
-        # Helper function to get index from possible header names
-        def get_header_index(possible_headers):
-            for header in possible_headers:
-                index = header_to_index.get(header.lower())
-                if index is not None:
-                    return index
-            return None
-
         if csv_type == 'screaming_frog':
-            # Screaming Frog column mappings
-            column_mapping = {
-                'url': get_header_index(['address', 'url']),
-                'type': get_header_index(['content type', 'type']),
-                'current_title': get_header_index(['title 1', 'title']),
-                'meta': get_header_index(['meta description 1', 'meta description']),
-                'h1': get_header_index(['h1-1', 'h1']),
-                'word_count': get_header_index(['word count']),
-                'canonical_link': get_header_index(['canonical link element 1', 'canonical link']),
-                'status_code': get_header_index(['status code', 'status']),
-                'index_status': get_header_index(['indexability']),
-                'inlinks': get_header_index(['inlinks']),
-                'outlinks': get_header_index(['outlinks']),
-                'crawl_depth': get_header_index(['crawl depth'])
-            }
-
-            # Read all rows
-            rows = list(reader)
-
-            for row in rows:
-                logging.debug(f"Processing row: {row}")
-
-                if not row:
-                    logging.warning("Empty row encountered, skipping.")
-                    continue
-
-                try:
-                    # Extract data
-                    url = row[column_mapping['url']] if column_mapping['url'] is not None else None
-                    page_path = get_page_path(url) if url else '/'
-
-                    uploaded_file = UploadedFile(
-                        dashboard=audit_dashboard,  # Associate with the dashboard
-                        url=url,
-                        page_path=page_path,
-                        type=row[column_mapping['type']] if column_mapping['type'] is not None else None,
-                        current_title=row[column_mapping['current_title']] if column_mapping['current_title'] is not None else None,
-                        meta=row[column_mapping['meta']] if column_mapping['meta'] is not None else None,
-                        h1=row[column_mapping['h1']] if column_mapping['h1'] is not None else None,
-                        word_count=int(row[column_mapping['word_count']]) if column_mapping['word_count'] is not None and row[column_mapping['word_count']].isdigit() else 0,
-                        canonical_link=row[column_mapping['canonical_link']] if column_mapping['canonical_link'] is not None else None,
-                        status_code=row[column_mapping['status_code']] if column_mapping['status_code'] is not None else None,
-                        index_status=row[column_mapping['index_status']] if column_mapping['index_status'] is not None else None,
-                        inlinks=int(row[column_mapping['inlinks']]) if column_mapping['inlinks'] is not None and row[column_mapping['inlinks']].isdigit() else 0,
-                        outlinks=int(row[column_mapping['outlinks']]) if column_mapping['outlinks'] is not None and row[column_mapping['outlinks']].isdigit() else 0,
-                        crawl_depth=int(row[column_mapping['crawl_depth']]) if column_mapping['crawl_depth'] is not None and row[column_mapping['crawl_depth']].isdigit() else 0
-                    )
-                    uploaded_file.save()
-                    logging.info(f"Saved UploadedFile for URL: {url}")
-                    records_processed += 1  # Increment the counter
-
-                except IndexError as e:
-                    logging.error(f"IndexError while processing row: {row} - {e}")
-                except ValueError as e:
-                    logging.error(f"ValueError while converting data: {row} - {e}")
-                except Exception as e:
-                    logging.error(f"Unexpected error while processing row: {row} - {e}")
+            # Stream rows straight into batched bulk inserts instead of one save() per row
+            stats = bulk_ingest(
+                UploadedFile,
+                iter_screaming_frog_records(reader, columns, audit_dashboard),
+            )
+            records_processed = stats['rows']
+            logging.info(
+                f"Screaming Frog import: {stats['rows']} rows at {stats['rows_per_second']:.0f} rows/s, "
+                f"{stats['skipped']} rejected rows skipped"
+            )
 
             # After processing Screaming Frog CSV, update the 'in_sitemap' status
             update_in_sitemap_status(audit_dashboard)
 
         elif csv_type == 'keyword_research':
-            # Keyword Research CSV column mappings
-            column_mapping = {
-                'url': get_header_index(['url']),
-                'keyword': get_header_index(['keyword']),
-                'search_vol': get_header_index(['search vol.']),
-                'position': get_header_index(['position'])
-            }
-
-            # Check if all required columns are present
-            required_columns = ['url', 'keyword', 'search_vol', 'position']
-            missing_columns = [col for col in required_columns if column_mapping[col] is None]
-            if missing_columns:
-                logging.error(f"Missing required columns in CSV: {missing_columns}")
-                return records_processed  # Return 0
-
             # Dictionary to store data for each URL
             url_data = {}
 
-            # Read all rows
-            rows = list(reader)
-
-            for row in rows:
-                logging.debug(f"Processing row: {row}")
-
-                if not row:
-                    logging.warning("Empty row encountered, skipping.")
-                    continue
-
-                try:
-                    # Extract data
-                    url = row[column_mapping['url']].strip() if column_mapping['url'] is not None else None
-                    keyword = row[column_mapping['keyword']].strip() if column_mapping['keyword'] is not None else None
-                    search_vol_str = row[column_mapping['search_vol']].replace(',', '').strip() if column_mapping['search_vol'] is not None else '0'
-                    position_str = row[column_mapping['position']].strip() if column_mapping['position'] is not None else '0'
-
-                    search_vol = int(search_vol_str) if search_vol_str.isdigit() else 0
-                    position = int(position_str) if position_str.isdigit() else float('inf')
-
-                    if url:
-                        normalized_url = normalize_url(url)
-                        if normalized_url not in url_data:
-                            url_data[normalized_url] = {
-                                'main_kw': keyword,
-                                'kw_volume': search_vol,
-                                'kw_ranking': position,
-                                'best_kw': keyword,
-                                'best_kw_volume': search_vol,
-                                'best_kw_ranking': position
-                            }
-                        else:
-                            # Update main_kw if higher search_vol
-                            if search_vol > url_data[normalized_url]['kw_volume']:
-                                url_data[normalized_url]['main_kw'] = keyword
-                                url_data[normalized_url]['kw_volume'] = search_vol
-                                url_data[normalized_url]['kw_ranking'] = position
-
-                            # Update best_kw if better ranking
-                            if position < url_data[normalized_url]['best_kw_ranking']:
-                                url_data[normalized_url]['best_kw'] = keyword
-                                url_data[normalized_url]['best_kw_volume'] = search_vol
-                                url_data[normalized_url]['best_kw_ranking'] = position
-
-                except IndexError as e:
-                    logging.error(f"IndexError while processing row: {row} - {e}")
-                except ValueError as e:
-                    logging.error(f"ValueError while converting data: {row} - {e}")
-
-            # Now update the Django table with the processed data
-            uploaded_files = UploadedFile.objects.filter(dashboard=audit_dashboard)
-            uploaded_files_dict = {normalize_url(u.url): u for u in uploaded_files}
+            for data in iter_column_chunks(reader, columns):
+                for url, keyword, search_vol, position in zip(data['url'], data['keyword'], data['search_vol'], data['position']):
+                    try:
+                        if position is None:
+                            position = float('inf')
+
+                        if url:
+                            normalized_url = normalize_url(url)
+                            if normalized_url not in url_data:
+                                url_data[normalized_url] = {
+                                    'main_kw': keyword,
+                                    'kw_volume': search_vol,
+                                    'kw_ranking': position,
+                                    'best_kw': keyword,
+                                    'best_kw_volume': search_vol,
+                                    'best_kw_ranking': position
+                                }
+                            else:
+                                # Update main_kw if higher search_vol
+                                if search_vol > url_data[normalized_url]['kw_volume']:
+                                    url_data[normalized_url]['main_kw'] = keyword
+                                    url_data[normalized_url]['kw_volume'] = search_vol
+                                    url_data[normalized_url]['kw_ranking'] = position
+
+                                # Update best_kw if better ranking
+                                if position < url_data[normalized_url]['best_kw_ranking']:
+                                    url_data[normalized_url]['best_kw'] = keyword
+                                    url_data[normalized_url]['best_kw_volume'] = search_vol
+                                    url_data[normalized_url]['best_kw_ranking'] = position
+
+                    except Exception as e:
+                        logging.error(f"Unexpected error while processing keyword row for {url}: {e}")
+
+            # Match the aggregated keywords against the dashboard's URLs
+            url_to_id = get_dashboard_url_lookup(audit_dashboard)
+            changes = {}
 
             for normalized_url, data in url_data.items():
-                try:
-                    uploaded_file = uploaded_files_dict.get(normalized_url)
-                    if uploaded_file:
-                        uploaded_file.main_kw = data['main_kw']
-                        uploaded_file.kw_volume = data['kw_volume']
-                        uploaded_file.kw_ranking = data['kw_ranking']
-                        uploaded_file.best_kw = data['best_kw']
-                        uploaded_file.best_kw_volume = data['best_kw_volume']
-                        uploaded_file.best_kw_ranking = data['best_kw_ranking']
-                        uploaded_file.save()
-                        logging.info(f"Updated data for URL: {uploaded_file.url}")
-                        records_processed += 1  # Increment the counter for each update
-                    else:
-                        logging.warning(f"No match found for URL: {normalized_url}")
+                uploaded_file_id = url_to_id.get(normalized_url)
+                if uploaded_file_id:
+                    # Unranked keywords are tracked as inf above; store them as NULL
+                    changes[uploaded_file_id] = {
+                        field: None if value == float('inf') else value for field, value in data.items()
+                    }
+                else:
+                    logging.debug(f"No match found for URL: {normalized_url}")
 
-                except Exception as e:
-                    logging.error(f"Error updating data for URL {normalized_url}: {e}")
+            records_processed = bulk_merge(UploadedFile, changes, KEYWORD_RESEARCH_FIELDS)['rows']
 
         elif csv_type == 'search_console':
-            # Search Console column mappings
-            column_mapping = {
-                'url': get_header_index(['top pages', 'page', 'url']),
-                'impressions': get_header_index(['impressions', 'total impressions']),
-                'ctr': get_header_index(['ctr', 'click through rate'])
-            }
+            # Build mapping from normalized URL to UploadedFile id
+            url_to_id = get_dashboard_url_lookup(audit_dashboard)
+            changes = {}
 
-            # Read all rows
-            rows = list(reader)
-
-            # Build mapping from normalized URL to UploadedFile
-            uploaded_files = UploadedFile.objects.filter(dashboard=audit_dashboard)
-            uploaded_files_dict = {normalize_url(u.url): u for u in uploaded_files}
-
-            for row in rows:
-                logging.debug(f"Processing row: {row}")
+            for data in iter_column_chunks(reader, columns):
+                for url, impressions, ctr in zip(data['url'], data['impressions'], data['ctr']):
+                    try:
+                        normalized_url = normalize_url(url)
 
-                if not row:
-                    logging.warning("Empty row encountered, skipping.")
-                    continue
+                        uploaded_file_id = url_to_id.get(normalized_url)
+                        if uploaded_file_id:
+                            changes[uploaded_file_id] = {'impressions': impressions, 'serp_ctr': ctr}
+                            records_processed += 1  # Increment the counter for each matched row
+                        else:
+                            logging.debug(f"No match found for URL: {normalized_url}")
 
-                try:
-                    url = row[column_mapping['url']] if column_mapping['url'] is not None else None
-                    impressions_str = row[column_mapping['impressions']].replace(',', '') if column_mapping['impressions'] is not None else '0'
-                    ctr_str = row[column_mapping['ctr']].replace('%', '') if column_mapping['ctr'] is not None else '0'
-
-                    impressions = int(impressions_str) if impressions_str.replace('.', '', 1).isdigit() else 0
-                    serp_ctr = float(ctr_str) if ctr_str.replace('.', '', 1).isdigit() else 0.0
-
-                    normalized_url = normalize_url(url)
-
-                    uploaded_file = uploaded_files_dict.get(normalized_url)
-                    if uploaded_file:
-                        uploaded_file.impressions = impressions
-                        uploaded_file.serp_ctr = serp_ctr
-                        uploaded_file.save()
-                        logging.info(f"Updated data for URL: {uploaded_file.url}")
-                        records_processed += 1  # Increment the counter for each update
-                    else:
-                        logging.warning(f"No match found for URL: {normalized_url}")
+                    except Exception as e:
+                        logging.error(f"Unexpected error while processing Search Console row for {url}: {e}")
 
-                except IndexError as e:
-                    logging.error(f"IndexError while processing row: {row} - {e}")
-                except ValueError as e:
-                    logging.error(f"ValueError while converting data: {row} - {e}")
-                except Exception as e:
-                    logging.error(f"Unexpected error while processing row: {row} - {e}")
+            bulk_merge(UploadedFile, changes, SEARCH_CONSOLE_FIELDS)
 
         elif csv_type == 'google_analytics':
-            # Define possible headers to look for in the CSV
-            possible_headers = {
-                'page_path': ['page path and screen class', 'page path'],
-                'sessions': ['sessions'],
-                'bounce_rate': ['bounce rate', 'bounce rate (%)'],
-                'avg_session_duration': ['average session duration', 'avg. session duration'],
-                'percent_change_sessions': ['sessions Δ', 'sessions delta', 'sessions δ', 'sessions Δ (%)', 'sessions delta (%)', 'sessions change (%)', 'sessions change'],
+            # Map normalized page_path to UploadedFile id from a narrow values() projection
+            page_path_to_id = {
+                normalize_page_path(page_path): uploaded_file_id
+                for uploaded_file_id, page_path in UploadedFile.objects.filter(
+                    dashboard=audit_dashboard, page_path__isnull=False
+                ).values_list('id', 'page_path')
             }
-
-            # Map the headers in the CSV to their corresponding indices
-            column_mapping = {key: get_header_index(possible_headers[key]) for key in possible_headers}
-
-            # Read the CSV rows
-            rows = list(reader)
-
-            # Create a dictionary mapping normalized page_path to UploadedFile instances
-            uploaded_files = UploadedFile.objects.filter(dashboard=audit_dashboard)
-            uploaded_files_dict = {normalize_page_path(u.page_path): u for u in uploaded_files}
+            changes = {}
 
             # Process each row in the CSV
-            for row in rows:
-                logging.debug(f"Processing row: {row}")
-
-                if not row:
-                    logging.warning("Empty row encountered, skipping.")
-                    continue
-
-                try:
-                    # Extract values from the row using the column mapping
-                    page_path = row[column_mapping['page_path']] if column_mapping['page_path'] is not None else None
-                    page_path = normalize_page_path(page_path)
-                    sessions_str = row[column_mapping['sessions']].replace(',', '') if column_mapping['sessions'] is not None else '0'
-                    bounce_rate_str = row[column_mapping['bounce_rate']].replace('%', '') if column_mapping['bounce_rate'] is not None else '0'
-                    avg_session_duration_str = row[column_mapping['avg_session_duration']] if column_mapping['avg_session_duration'] is not None else '0:00'
-                    percent_change_sessions_str = row[column_mapping['percent_change_sessions']].replace('%', '').replace('−', '-') if column_mapping['percent_change_sessions'] is not None else '0.0'
-
-                    # Convert extracted data into their appropriate types
-                    sessions = int(float(sessions_str)) if re.match(r'^-?\d+(\.\d+)?$', sessions_str) else 0
-                    bounce_rate = float(bounce_rate_str) if re.match(r'^-?\d+(\.\d+)?$', bounce_rate_str) else 0.0
-                    avg_time_on_page = avg_session_duration_str  # Keep the original string (no conversion)
-                    percent_change_sessions = float(percent_change_sessions_str) if re.match(r'^-?\d+(\.\d+)?$', percent_change_sessions_str) else 0.0
-
-                    # Find the corresponding UploadedFile by page_path
-                    uploaded_file = uploaded_files_dict.get(page_path)
-                    if uploaded_file:
-                        # Update the fields of the UploadedFile instance
-                        uploaded_file.sessions = sessions
-                        uploaded_file.bounce_rate = bounce_rate
-                        uploaded_file.avg_time_on_page = avg_time_on_page  # Save the original avg_session_duration string
-                        uploaded_file.percent_change_sessions = percent_change_sessions
-
-                        # Update losing_traffic field based on percent_change_sessions
-                        if percent_change_sessions > 0:
-                            uploaded_file.losing_traffic = 'up'
-                        elif percent_change_sessions < 0:
-                            uploaded_file.losing_traffic = 'down'
+            # losing_traffic is derived from percent_change_sessions alongside the conversion
+            for data in iter_column_chunks(reader, columns, derived=[LOSING_TRAFFIC]):
+                rows = zip(
+                    data['page_path'], data['sessions'], data['bounce_rate'], data['avg_session_duration'],
+                    data['percent_change_sessions'], data['losing_traffic'],
+                )
+                for page_path, sessions, bounce_rate, avg_session_duration, percent_change_sessions, losing_traffic in rows:
+                    try:
+                        page_path = normalize_page_path(page_path)
+
+                        # Find the corresponding UploadedFile by page_path
+                        uploaded_file_id = page_path_to_id.get(page_path)
+                        if uploaded_file_id:
+                            changes[uploaded_file_id] = {
+                                'sessions': sessions,
+                                'bounce_rate': bounce_rate,
+                                'avg_time_on_page': avg_session_duration,  # Save the original avg_session_duration string
+                                'percent_change_sessions': percent_change_sessions,
+                                'losing_traffic': losing_traffic,
+                            }
+                            records_processed += 1  # Increment the counter for each matched row
                         else:
-                            uploaded_file.losing_traffic = 'none'
+                            logging.debug(f"No match found for page_path: {page_path}")
 
-                        # Save the updated instance to the database
-                        uploaded_file.save()
-                        logging.info(f"Updated data for page_path: {page_path}")
-                        records_processed += 1  # Increment the counter for each update
-                    else:
-                        logging.warning(f"No match found for page_path: {page_path}")
+                    except Exception as e:
+                        logging.error(f"Unexpected error while processing Google Analytics row for {page_path}: {e}")
 
-                except IndexError as e:
-                    logging.error(f"IndexError while processing row: {row} - {e}")
-                except ValueError as e:
-                    logging.error(f"ValueError while converting data: {row} - {e}")
-                except Exception as e:
-                    logging.error(f"Unexpected error while processing row: {row} - {e}")
+            bulk_merge(UploadedFile, changes, GOOGLE_ANALYTICS_FIELDS)
 
         elif csv_type == 'backlinks':
-            # Backlinks CSV column mappings
-            column_mapping = {
-                'backlink_url': get_header_index(['backlink url']),
-                'destination_url': get_header_index(['destination url']),
-            }
-
-            # Check if all required columns are present
-            required_columns = ['backlink_url', 'destination_url']
-            missing_columns = [col for col in required_columns if column_mapping[col] is None]
-            if missing_columns:
-                logging.error(f"Missing required columns in CSV: {missing_columns}")
-                return records_processed  # Return 0
-
             # Dictionary to count backlinks
             backlink_counts = {}
 
-            # Read all rows
-            rows = list(reader)
-
-            for row in rows:
-                logging.debug(f"Processing row: {row}")
-
-                if not row:
-                    logging.warning("Empty row encountered, skipping.")
-                    continue
-
-                try:
-                    destination_url = row[column_mapping['destination_url']].strip() if column_mapping['destination_url'] is not None else None
-
-                    if destination_url:
-                        destination_url_normalized = normalize_url(destination_url)
-                        backlink_counts[destination_url_normalized] = backlink_counts.get(destination_url_normalized, 0) + 1
+            for data in iter_column_chunks(reader, columns):
+                for destination_url in data['destination_url']:
+                    try:
+                        if destination_url:
+                            destination_url_normalized = normalize_url(destination_url)
+                            backlink_counts[destination_url_normalized] = backlink_counts.get(destination_url_normalized, 0) + 1
 
-                except IndexError as e:
-                    logging.error(f"IndexError while processing row: {row} - {e}")
-                except Exception as e:
-                    logging.error(f"Unexpected error while processing row: {row} - {e}")
+                    except Exception as e:
+                        logging.error(f"Unexpected error while processing backlink to {destination_url}: {e}")
 
-            # Now update the Django table with the backlink counts
-            uploaded_files = UploadedFile.objects.filter(dashboard=audit_dashboard)
-            uploaded_files_dict = {normalize_url(u.url): u for u in uploaded_files}
+            # Now match the backlink counts against the dashboard's URLs
+            url_to_id = get_dashboard_url_lookup(audit_dashboard)
+            changes = {}
 
             for normalized_url, count in backlink_counts.items():
-                try:
-                    uploaded_file = uploaded_files_dict.get(normalized_url)
-                    if uploaded_file:
-                        uploaded_file.links = count
-                        uploaded_file.save()
-                        logging.info(f"Updated backlinks count for URL: {uploaded_file.url} with count: {count}")
-                        records_processed += 1  # Increment the counter for each update
-                    else:
-                        logging.warning(f"No match found for URL: {normalized_url}")
+                uploaded_file_id = url_to_id.get(normalized_url)
+                if uploaded_file_id:
+                    changes[uploaded_file_id] = {'links': count}
+                else:
+                    logging.debug(f"No match found for URL: {normalized_url}")
 
-                except Exception as e:
-                    logging.error(f"Error updating backlinks for URL {normalized_url}: {e}")
+            records_processed = bulk_merge(UploadedFile, changes, BACKLINKS_FIELDS)['rows']
 
         else:
             logging.error(f"Unknown CSV type: {csv_type}")
             return records_processed  # Return 0
 
         logging.info("CSV processing complete.")
+        refresh_dashboard_summary(audit_dashboard)  # Keep list_dashboard's stats current
         return records_processed  # Return the total number of records processed
 
     except Exception as e:
@@ -979,22 +755,18 @@ def audit_dashboard(request):
     Shows UploadedFile entries that are not associated with any AuditDashboard.
     """
     # Apply the UploadedFileFilter to the queryset
-    filter = UploadedFileFilter(request.GET, queryset=UploadedFile.objects.filter(dashboard__isnull=True).order_by('id'))
+    # Only the fields the table displays are loaded; columns hidden with ?hide= are neither rendered nor loaded
+    hidden_columns = UploadedFileTable.hidden_columns(request)
+    uploaded_files = UploadedFile.objects.filter(dashboard__isnull=True).only(*UploadedFileTable.projection(hidden_columns))
+    filter = UploadedFileFilter(request.GET, queryset=uploaded_files)
     filtered_qs = filter.qs  # This is the filtered queryset
 
-    # Pagination logic
-    page_number = request.GET.get('page', 1)
+    # Keyset pagination over (sort, id); filter and sort params are kept in the page links
     rows_per_page = 15
-    paginator = Paginator(filtered_qs, rows_per_page)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.get_page(1)
-    except EmptyPage:
-        page_obj = paginator.get_page(paginator.num_pages)
+    page_obj = paginate_keyset(request, filtered_qs, rows_per_page, sortable=UploadedFileTable.Meta.fields)
 
-    # Initialize the table with the filtered and paginated data
-    table = UploadedFileTable(page_obj)
+    # Initialize the table with the filtered and paginated data, already sorted by the database
+    table = UploadedFileTable(page_obj.object_list, orderable=False, exclude=hidden_columns)
     RequestConfig(request, paginate=False).configure(table)
 
     # Instantiate the forms
@@ -1018,6 +790,8 @@ def audit_dashboard(request):
         'audit_form': audit_dashboard_form,        # Pass AuditDashboardForm as 'audit_form'
         'page_obj': page_obj,
         'filter': filter,  # Pass the filter to the template
+        'hidden_columns': hidden_columns,
+        'column_choices': UploadedFileTable.column_choices(hidden_columns),
     })
 
 @csrf_protect
@@ -1035,10 +809,12 @@ def delete_uploaded_files(request, dashboard_id=None):
             logger.info("Attempting to delete all unsaved UploadedFiles (those without a dashboard).")
             files_to_delete = UploadedFile.objects.filter(dashboard__isnull=True)
 
-        # Delete files and count the number of deletions
-        count = files_to_delete.count()
-        files_to_delete.delete()
+        # Delete files (and their keyword entries) with set-based deletes
+        _, deleted = bulk_delete(files_to_delete)
+        count = deleted.get(UploadedFile._meta.label, 0)
         logger.info(f"Deleted {count} UploadedFile records.")
+        if dashboard_id:
+            refresh_dashboard_summary(dashboard)
 
         # Return a successful response with the count of deleted files
         return JsonResponse({'success': True, 'deleted_count': count})
@@ -1064,8 +840,10 @@ def update_action_choice(request):
 
         try:
             audit_entry = UploadedFile.objects.get(id=audit_id)
+            previous = audit_entry.action_choice
             audit_entry.action_choice = action_choice
             audit_entry.save()
+            apply_choice_changes([(audit_entry.dashboard_id, 'action_choice', previous, action_choice)])
             return JsonResponse({'success': True, 'message': 'Action choice updated successfully.'})
         except UploadedFile.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Audit entry not found.'}, status=404)
@@ -1085,8 +863,10 @@ def update_category(request):
         try:
             # Fetch the UploadedFile record and update the category
             audit_entry = UploadedFile.objects.get(id=audit_id)
+            previous = audit_entry.category
             audit_entry.category = category
             audit_entry.save()
+            apply_choice_changes([(audit_entry.dashboard_id, 'category', previous, category)])
 
             # Return a success response as JSON
             return JsonResponse({'success': True, 'message': 'Category updated successfully.'})
@@ -1097,6 +877,22 @@ def update_category(request):
     # Return an error if the request is not a POST request
     return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=400)
 
+@csrf_protect
+@require_POST
+def update_choices_batch(request):
+    # Coalesced dropdown edits from the dashboard table: {"edits": [{"id", "field", "value"}, ...]}
+    try:
+        edits = json.loads(request.body).get('edits')
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON body.'}, status=400)
+
+    try:
+        updated = apply_edits(edits)
+    except InvalidEdit as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({'success': True, 'updated': updated, 'message': f'{updated} entries updated.'})
+
 @csrf_protect
 def save_audit_dashboard(request):
     if request.method == 'POST':
@@ -1108,29 +904,32 @@ def save_audit_dashboard(request):
             client = form.cleaned_data.get('client')  # Get the optional client selection
 
             # Check if a dashboard with the same name already exists
-            existing_dashboard = AuditDashboard.objects.filter(name=dashboard_name).first()
-
-            if existing_dashboard:
-                if overwrite:
-                    # If overwriting is allowed, delete the old dashboard
-                    existing_dashboard.delete()
+            existing_dashboards = AuditDashboard.objects.filter(name=dashboard_name)
+
+            if existing_dashboards.exists() and not overwrite:
+                # If not overwriting, ask the user to provide a new name
+                messages.error(request, f"A dashboard with the name '{dashboard_name}' already exists. Please choose a new name or select 'Overwrite existing dashboard'.")
+                return redirect('audit_dashboard')  # Redirect back to the audit dashboard for name input
+
+            # The old dashboard only goes away if the new one is saved
+            with transaction.atomic():
+                if overwrite and existing_dashboards.exists():
+                    # If overwriting is allowed, delete the old dashboard with set-based deletes
+                    bulk_delete(existing_dashboards)
                     messages.success(request, f"Dashboard '{dashboard_name}' was overwritten.")
-                else:
-                    # If not overwriting, ask the user to provide a new name
-                    messages.error(request, f"A dashboard with the name '{dashboard_name}' already exists. Please choose a new name or select 'Overwrite existing dashboard'.")
-                    return redirect('audit_dashboard')  # Redirect back to the audit dashboard for name input
-
-            # Create the new dashboard
-            dashboard = AuditDashboard.objects.create(
-                user=request.user,  # Associate the dashboard with the current user
-                name=dashboard_name,
-                description=form.cleaned_data.get('description', ''),
-                client=client  # Optionally link the client if one is selected
-            )
 
-            # Move current unsaved data (those without a dashboard) to the new dashboard
-            uploaded_files = UploadedFile.objects.filter(dashboard__isnull=True)
-            uploaded_files.update(dashboard=dashboard)  # Associate the files with the new dashboard
+                # Create the new dashboard
+                dashboard = AuditDashboard.objects.create(
+                    user=request.user,  # Associate the dashboard with the current user
+                    name=dashboard_name,
+                    description=form.cleaned_data.get('description', ''),
+                    client=client  # Optionally link the client if one is selected
+                )
+
+                # Move current unsaved data (those without a dashboard) to the new dashboard
+                uploaded_files = UploadedFile.objects.filter(dashboard__isnull=True)
+                uploaded_files.update(dashboard=dashboard)  # Associate the files with the new dashboard
+                refresh_dashboard_summary(dashboard)
 
             # Notify the user that the audit has been saved and the workspace cleared
             messages.success(request, "Audit saved successfully. The working area has been cleared.")
@@ -1143,8 +942,19 @@ def save_audit_dashboard(request):
 
 
 def list_dashboard(request):
-    # Fetch all saved audit dashboards
-    audit_dashboards = AuditDashboard.objects.all()
+    # Fetch all saved audit dashboards with their precomputed stats in one query
+    audit_dashboards = list(
+        AuditDashboard.objects.select_related('client', 'summary').prefetch_related('keyword_research_dashboards')
+    )
+
+    # Dashboards saved before summaries existed get theirs built once, here
+    missing = [dashboard.id for dashboard in audit_dashboards if not hasattr(dashboard, 'summary')]
+    if missing:
+        refresh_dashboard_summaries(missing)
+        summaries = AuditDashboardSummary.objects.in_bulk(missing)
+        for dashboard in audit_dashboards:
+            if dashboard.id in summaries:
+                dashboard.summary = summaries[dashboard.id]
 
     # Fetch all saved keyword research dashboards
     keyword_research_dashboards = KeywordResearchDashboard.objects.all()
@@ -1154,6 +964,71 @@ def list_dashboard(request):
         'keyword_research_dashboards': keyword_research_dashboards,  # Pass both to the template
     })
 
+def search_dashboards(request):
+    """
+    Searches URL, title, meta, H1 and main keyword across all saved audit dashboards.
+    Returns JSON for AJAX requests, otherwise renders the search page.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+
+    started = time.perf_counter()
+    results, has_next = search_uploaded_files(query, page=page)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    logging.info(f"Dashboard search for '{query}' page {page}: {len(results)} results in {elapsed_ms} ms ({search_backend()}).")
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True,
+            'query': query,
+            'page': page,
+            'has_next': has_next,
+            'elapsed_ms': elapsed_ms,
+            'results': [
+                {
+                    'id': uploaded_file.id,
+                    'dashboard_id': uploaded_file.dashboard_id,
+                    'dashboard': uploaded_file.dashboard.name,
+                    'dashboard_url': reverse('load_dashboard', args=[uploaded_file.dashboard_id]),
+                    'url': uploaded_file.url,
+                    'current_title': uploaded_file.current_title,
+                    'meta': uploaded_file.meta,
+                    'h1': uploaded_file.h1,
+                    'main_kw': uploaded_file.main_kw,
+                    'rank': uploaded_file.rank,
+                }
+                for uploaded_file in results
+            ],
+        })
+
+    return render(request, 'audit/dashboard_search.html', {
+        'query': query,
+        'results': results,
+        'page': page,
+        'has_next': has_next,
+        'elapsed_ms': elapsed_ms,
+    })
+
+def export_dashboard(request, id):
+    """
+    Streams all of a dashboard's rows as CSV (default) or XLSX (?format=xlsx); rows are
+    read in chunks and written as they arrive, so large audits never sit in memory.
+    Only the dashboard's owner can export it; anyone else gets a 404.
+    """
+    dashboard = get_object_or_404(AuditDashboard, id=id, user_id=request.user.id)
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Unsupported export format.")
+
+    stream = stream_xlsx(dashboard) if file_format == 'xlsx' else stream_csv(dashboard)
+    response = StreamingHttpResponse(stream, content_type=EXPORT_FORMATS[file_format])
+    filename = re.sub(r'[^\w.-]+', '_', dashboard.name).strip('_') or f'dashboard_{dashboard.id}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
 def load_dashboard(request, id):
     """
     View to load and display a specific audit dashboard.
@@ -1163,27 +1038,21 @@ def load_dashboard(request, id):
     dashboard = get_object_or_404(AuditDashboard, id=id)
     request.session['current_dashboard_id'] = dashboard.id
 
-    # Fetch uploaded files related to this dashboard
-    uploaded_files = UploadedFile.objects.filter(dashboard=dashboard)
+    # Fetch uploaded files related to this dashboard, loading only the fields the table displays;
+    # columns hidden with ?hide= are neither rendered nor loaded
+    hidden_columns = UploadedFileTable.hidden_columns(request)
+    uploaded_files = UploadedFile.objects.filter(dashboard=dashboard).only(*UploadedFileTable.projection(hidden_columns))
 
     # Apply the UploadedFileFilter to the queryset
     filter = UploadedFileFilter(request.GET, queryset=uploaded_files)
     filtered_qs = filter.qs  # This is the filtered queryset
 
-    # Pagination Logic
-    page_number = request.GET.get('page', 1)
+    # Keyset pagination over (sort, id); filter and sort params are kept in the page links
     rows_per_page = 15
-    paginator = Paginator(filtered_qs, rows_per_page)
-
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.get_page(1)
-    except EmptyPage:
-        page_obj = paginator.get_page(paginator.num_pages)
+    page_obj = paginate_keyset(request, filtered_qs, rows_per_page, sortable=UploadedFileTable.Meta.fields)
 
-    # Initialize the table with paginated data
-    table = UploadedFileTable(page_obj)
+    # Initialize the table with paginated data, already sorted by the database
+    table = UploadedFileTable(page_obj.object_list, orderable=False, exclude=hidden_columns)
     RequestConfig(request, paginate=False).configure(table)
 
     # Instantiate the AuditDashboardForm (optional: prepopulate if needed)
@@ -1196,6 +1065,8 @@ def load_dashboard(request, id):
         'audit_form': audit_dashboard_form,  # Pass AuditDashboardForm as 'audit_form'
         'page_obj': page_obj,
         'filter': filter,  # Pass the filter to the template
+        'hidden_columns': hidden_columns,
+        'column_choices': UploadedFileTable.column_choices(hidden_columns),
     })
 
 @csrf_protect
@@ -1205,9 +1076,9 @@ def delete_dashboard(request, id):
 
     if request.method == 'POST':
         try:
-            # Delete the dashboard
+            # Delete the dashboard and everything under it with set-based deletes
             dashboard_name = dashboard.name
-            dashboard.delete()
+            bulk_delete(AuditDashboard.objects.filter(id=dashboard.id))
 
             # Log and add a success message for the user
             logging.info(f"Dashboard '{dashboard_name}' deleted successfully.")
@@ -1246,36 +1117,46 @@ def generate_shareable_link(request, id):
     else:
         return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=400)
 
+@ensure_csrf_cookie
 def shared_dashboard(request, share_token):
     # Retrieve the dashboard using the share token
     dashboard = get_object_or_404(AuditDashboard, share_token=share_token)
-    uploaded_files = UploadedFile.objects.filter(dashboard=dashboard)
+
+    # Renderings are cached per revision, so a hit never touches UploadedFile. They carry
+    # no CSRF token (custom_table.html leaves it out of shared tables); ensure_csrf_cookie
+    # gives every visitor their own cookie for the inline edits, cache hits included
+    cache_key = shared_dashboard_cache_key(dashboard, request)
+    content = cache.get(cache_key)
+    if content is not None:
+        return HttpResponse(content)
+
+    # Columns hidden with ?hide= are neither rendered nor loaded
+    hidden_columns = UploadedFileTable.hidden_columns(request)
+    uploaded_files = UploadedFile.objects.filter(dashboard=dashboard).only(*UploadedFileTable.projection(hidden_columns))
 
     # Apply the UploadedFileFilter to the query
     filter = UploadedFileFilter(request.GET, queryset=uploaded_files)
     filtered_qs = filter.qs  # This is the filtered queryset
 
-    # Pagination logic (same as in your existing load_dashboard view)
-    page_number = request.GET.get('page', 1)
+    # Keyset pagination (same as in the load_dashboard view)
     rows_per_page = 15
-    paginator = Paginator(filtered_qs, rows_per_page)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.get_page(1)
-    except EmptyPage:
-        page_obj = paginator.get_page(paginator.num_pages)
+    page_obj = paginate_keyset(request, filtered_qs, rows_per_page, sortable=UploadedFileTable.Meta.fields)
 
-    # Initialize the table with paginated data
-    table = UploadedFileTable(page_obj)
+    # Initialize the table with paginated data, already sorted by the database
+    table = UploadedFileTable(page_obj.object_list, orderable=False, exclude=hidden_columns)
+    table.shared = True
     RequestConfig(request, paginate=False).configure(table)
 
     # Render the template with the 'is_shared_view' flag and 'hide_sidebar'
-    return render(request, 'audit/shared_dashboard.html', {
+    response = render(request, 'audit/shared_dashboard.html', {
         'dashboard': dashboard,
         'table': table,
         'page_obj': page_obj,
         'is_shared_view': True,  # Indicate that this is a shared view
         'hide_sidebar': True,    # Hide the sidebar in the template
         'filter': filter,        # Pass the filter to the template
+        'hidden_columns': hidden_columns,
+        'column_choices': UploadedFileTable.column_choices(hidden_columns),
     })
+    cache.set(cache_key, response.content, shared_dashboard_timeout())
+    return response
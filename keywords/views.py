@@ -4,6 +4,7 @@ import csv
 import json
 import logging
 import tempfile
+from itertools import islice
 from statistics import mean
 
 import numpy as np
@@ -23,7 +24,7 @@ from audit.models import AuditDashboard, UploadedFile
 
 from .forms import KeywordDashboardForm
 from .models import KeywordResearchDashboard, KeywordResearchEntry
-from .utils import read_and_identify_csv
+from .utils import SERP_ANALYSIS, read_and_identify_csv
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -506,21 +507,25 @@ def process_csv_and_update_entry(temp_file_path, keyword_entry):
     Now includes outlier detection using Z-scores and IQR.
     """
     try:
-        with open(temp_file_path, mode='r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            data = list(reader)
-
-            if not data:
+        with open(temp_file_path, mode='r', encoding='utf-8', newline='') as file:
+            reader = csv.reader(file)
+            headers = next(reader, None)
+            columns = SERP_ANALYSIS.resolve(headers or [])
+            missing = [name for name in ('referring_domains', 'dt', 'pt', 'backlinks') if columns[name] is None]
+            if missing:
+                raise Exception(f"Missing columns in CSV: {missing}")
+
+            # Process the top 10 rows for analysis, converted by the shared SERP schema
+            top_10_results = [columns.convert(row) for row in islice((row for row in reader if row), 10)]
+
+            if not top_10_results:
                 raise Exception("CSV file is empty or improperly formatted.")
 
-            # Process the top 10 rows for analysis
-            top_10_results = data[:10]
-
-            # Extract the necessary columns for analysis
-            referring_domains = [float(row['Referring Domains']) for row in top_10_results if row['Referring Domains'].isdigit()]
-            dt = [float(row['DT']) for row in top_10_results if row['DT'].isdigit()]
-            pt = [float(row['PT']) for row in top_10_results if row['PT'].isdigit()]
-            backlinks = [float(row['Backlinks']) for row in top_10_results if row['Backlinks'].isdigit()]
+            # Extract the necessary columns for analysis (blank or non-numeric cells are None)
+            referring_domains = [row['referring_domains'] for row in top_10_results if row['referring_domains'] is not None]
+            dt = [row['dt'] for row in top_10_results if row['dt'] is not None]
+            pt = [row['pt'] for row in top_10_results if row['pt'] is not None]
+            backlinks = [row['backlinks'] for row in top_10_results if row['backlinks'] is not None]
 
             # Detect and remove outliers from each column
             filtered_rd = remove_outliers(referring_domains)
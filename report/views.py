@@ -11,7 +11,6 @@ from django.http import (
 )
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 
@@ -27,6 +26,9 @@ from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from urllib.parse import urlparse
 from django.core.cache import cache
 from google_auth import get_service_credentials
+from search_console.fetcher import iter_search_analytics_rows, run_concurrently
+from search_console.services import get_credentials, get_service
+from search_console.warehouse import answer as warehouse_answer
 
 logger = logging.getLogger(__name__)
 
@@ -37,8 +39,23 @@ def fetch_search_console_data(
     request, site_url, start_date, end_date, dimensions=['query'], row_limit=10
 ):
     try:
-        # Use the service account to authenticate for Google Search Console
-        creds = get_service_credentials('search_console')
+        # Prepare the request body for Search Analytics query; row_limit=None fetches every row
+        request_body = {
+            'startDate': start_date,
+            'endDate': end_date,
+            'dimensions': dimensions,
+        }
+        if row_limit:
+            request_body['rowLimit'] = row_limit
+
+        # Synced sites are answered from the local Search Console warehouse
+        data = warehouse_answer(site_url, request_body)
+        if data is not None:
+            logger.debug(f"Answered Search Console query for {site_url} from the warehouse: {request_body}")
+            return data
+
+        # Use the service account to authenticate for Google Search Console (kept between requests)
+        creds = get_credentials()
 
         if not creds:
             logger.error("Failed to obtain credentials for Google Search Console.")
@@ -46,30 +63,12 @@ def fetch_search_console_data(
                 "Failed to get credentials for Google Search Console"
             )
 
-        # Build the Search Console API service
-        service = build('webmasters', 'v3', credentials=creds)
-
-        # Prepare the request body for Search Analytics query
-        request_body = {
-            'startDate': start_date,
-            'endDate': end_date,
-            'dimensions': dimensions,
-            'rowLimit': row_limit,
-        }
-
         logger.debug(
             f"Fetching Search Console data for site: {site_url} with request body: {request_body}"
         )
 
-        # Execute the query and get the response
-        response = (
-            service.searchanalytics()
-            .query(siteUrl=site_url, body=request_body)
-            .execute()
-        )
-
-        # Extract rows from the response
-        data = response.get('rows', [])
+        # Execute the query, paging past 25k rows; each fetcher thread uses its own service
+        data = list(iter_search_analytics_rows(get_service, site_url, request_body))
         logger.debug(
             f"Fetched {len(data)} rows from Search Console for the period {start_date} to {end_date}"
         )
@@ -209,29 +208,36 @@ def google_search_console_report(request, client_id):
             f"Client ID: {client_id}, Site URL: {site_url}, Date Range: {date_range}, Start Date: {start_date}, End Date: {end_date}, Compare: {compare}"
         )
 
-        # Fetch data for the current period
-        current_page_data = fetch_search_console_data(
-            request, site_url, start_date, end_date, dimensions=['page']
-        )
+        # Fetch both periods in parallel; page data feeds the totals, so every page is
+        # fetched, not only the top rows
+        results = run_concurrently({
+            'current_page': lambda: fetch_search_console_data(
+                request, site_url, start_date, end_date, dimensions=['page'], row_limit=None
+            ),
+            'current_query': lambda: fetch_search_console_data(
+                request, site_url, start_date, end_date, dimensions=['query'], row_limit=10
+            ),
+            'previous_page': lambda: fetch_search_console_data(
+                request, site_url, prev_start_date, prev_end_date, dimensions=['page'], row_limit=None
+            ),
+            'previous_query': lambda: fetch_search_console_data(
+                request, site_url, prev_start_date, prev_end_date, dimensions=['query'], row_limit=10
+            ),
+        })
+
+        current_page_data = results['current_page'].result()
         if isinstance(current_page_data, HttpResponse):
             return current_page_data
 
-        current_query_data = fetch_search_console_data(
-            request, site_url, start_date, end_date, dimensions=['query'], row_limit=10
-        )
+        current_query_data = results['current_query'].result()
         if isinstance(current_query_data, HttpResponse):
             return current_query_data
 
-        # Fetch data for the previous period
-        previous_page_data = fetch_search_console_data(
-            request, site_url, prev_start_date, prev_end_date, dimensions=['page']
-        )
+        previous_page_data = results['previous_page'].result()
         if isinstance(previous_page_data, HttpResponse):
             return previous_page_data
 
-        previous_query_data = fetch_search_console_data(
-            request, site_url, prev_start_date, prev_end_date, dimensions=['query'], row_limit=10
-        )
+        previous_query_data = results['previous_query'].result()
         if isinstance(previous_query_data, HttpResponse):
             return previous_query_data
 
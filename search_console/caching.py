@@ -0,0 +1,120 @@
+# search_console/caching.py
+
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+RECENT_DAYS = 3  # Google still revises the last days, so ranges touching them expire sooner
+STATS_KEYS = {
+    'hits': 'search_console:rows:hits',
+    'misses': 'search_console:rows:misses',
+}
+
+# Request options whose default may be sent or left out without changing the answer
+BODY_DEFAULTS = {
+    'startRow': 0,
+    'type': 'web',
+    'searchType': 'web',
+    'aggregationType': 'auto',
+    'dataState': 'final',
+}
+
+
+def result_timeout(body):
+    """
+    Seconds a result stays cached: settings.SEARCH_CONSOLE_CACHE_SECONDS (default a day)
+    for ranges that ended more than RECENT_DAYS ago, else
+    settings.SEARCH_CONSOLE_RECENT_CACHE_SECONDS (default 10 minutes).
+    """
+    try:
+        end = datetime.strptime(body['endDate'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        end = date.today()
+    if end >= date.today() - timedelta(days=RECENT_DAYS):
+        return getattr(settings, 'SEARCH_CONSOLE_RECENT_CACHE_SECONDS', 600)
+    return getattr(settings, 'SEARCH_CONSOLE_CACHE_SECONDS', 86400)
+
+
+def _canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def canonical_body(body):
+    """
+    The request body as a stable string: defaults dropped, and filters and filter
+    groups sorted, since their order does not change the rows. Dimension order is
+    kept, as it is the order of each row's keys.
+    """
+    body = {key: value for key, value in body.items() if BODY_DEFAULTS.get(key, object()) != value}
+    groups = []
+    for group in body.pop('dimensionFilterGroups', []):
+        filters = [{'operator': 'equals', **dimension_filter} for dimension_filter in group.get('filters', [])]
+        groups.append({
+            **group,
+            'groupType': group.get('groupType', 'and'),
+            'filters': sorted(filters, key=_canonical_json),
+        })
+    if groups:
+        body['dimensionFilterGroups'] = sorted(groups, key=_canonical_json)
+    return _canonical_json(body)
+
+
+def result_cache_key(site_url, body):
+    digest = hashlib.md5(f'{site_url}\n{canonical_body(body)}'.encode()).hexdigest()
+    return f'search_console:rows:{digest}'
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); losing one count is fine
+        pass
+
+
+def cache_stats():
+    """
+    Hits and misses of the result cache since the last reset, with the hit rate. The
+    counters live in the default cache, so they only add up across web workers (and
+    reach manage.py search_console_cache_stats) when that cache is shared, like the
+    DatabaseCache in settings; the per-process LocMemCache keeps one count per process.
+    Counts can be slightly low under concurrent requests, as incr() is not atomic on
+    every backend.
+    """
+    counts = cache.get_many(STATS_KEYS.values())
+    stats = {name: counts.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / total if total else 0
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many(list(STATS_KEYS.values()))
+
+
+def cached_rows(site_url, body, fetch):
+    """
+    Rows for (site_url, body) from the cache, else fetch() and cache them, so re-sorting,
+    paging and exporting a lookup does not query again. Results over
+    settings.SEARCH_CONSOLE_CACHE_MAX_ROWS rows (default 25000) are not cached.
+    """
+    key = result_cache_key(site_url, body)
+    rows = cache.get(key)
+    if rows is not None:
+        _count('hits')
+        logger.debug(f"Search Analytics cache hit for {site_url}: {body}")
+        return rows
+
+    _count('misses')
+    rows = fetch()
+    if len(rows) <= getattr(settings, 'SEARCH_CONSOLE_CACHE_MAX_ROWS', 25000):
+        cache.set(key, rows, result_timeout(body))
+    return rows
@@ -0,0 +1,94 @@
+# search_console/fetcher.py
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+API_ROW_LIMIT = 25000  # Largest rowLimit the Search Analytics API accepts
+REQUEST_RETRIES = 3  # googleapiclient retries 429 and 5xx responses with exponential backoff
+
+
+def max_concurrency():
+    """
+    Page requests in flight per query, settings.SEARCH_CONSOLE_MAX_CONCURRENCY. The API
+    allows about 20 queries per second per site, so this stays well below it.
+    """
+    return getattr(settings, 'SEARCH_CONSOLE_MAX_CONCURRENCY', 4)
+
+
+def iter_search_analytics_rows(service_factory, site_url, body, max_workers=None):
+    """
+    Yields every row of a searchanalytics().query, paging with startRow past the API's
+    25k-row limit. body['rowLimit'] caps the total number of rows (no cap when absent).
+
+    The first page is fetched alone, so small results cost one request; once a page
+    comes back full the following pages are requested max_workers at a time and yielded
+    in order as they arrive, holding at most that many pages in memory.
+    service_factory builds a Search Console service; googleapiclient services are not
+    thread-safe, so each worker thread builds and keeps its own.
+    """
+    body = dict(body)
+    row_limit = body.pop('rowLimit', None)
+    page_size = min(row_limit, API_ROW_LIMIT) if row_limit else API_ROW_LIMIT
+    max_workers = max_workers or max_concurrency()
+    local = threading.local()
+
+    def fetch(start_row):
+        if getattr(local, 'service', None) is None:
+            local.service = service_factory()
+        page_body = {**body, 'startRow': start_row, 'rowLimit': page_size}
+        response = local.service.searchanalytics().query(siteUrl=site_url, body=page_body).execute(
+            num_retries=REQUEST_RETRIES
+        )
+        return response.get('rows', [])
+
+    yielded = 0
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-analytics') as executor:
+        pending = deque([executor.submit(fetch, 0)])
+        next_start = page_size
+        try:
+            while pending:
+                rows = pending.popleft().result()
+                if row_limit:
+                    rows = rows[:row_limit - yielded]
+                yield from rows
+                yielded += len(rows)
+                if len(rows) < page_size or (row_limit and yielded >= row_limit):
+                    break
+                # A full page: keep max_workers requests in flight until a short page
+                while len(pending) < max_workers and (not row_limit or next_start < row_limit):
+                    pending.append(executor.submit(fetch, next_start))
+                    next_start += page_size
+        finally:
+            for future in pending:
+                future.cancel()
+
+    logger.debug(f"Fetched {yielded} Search Analytics rows for {site_url}: {body}")
+
+
+def _run_task(task):
+    try:
+        return task()
+    finally:
+        # Warehouse answers open a database connection in the worker thread; close it there
+        connections.close_all()
+
+
+def run_concurrently(tasks, max_workers=None):
+    """
+    Runs independent queries, {name: zero-argument callable}, in parallel on a bounded
+    thread pool and returns {name: finished future} once all are done, so a comparison
+    report takes about as long as its slowest query. Each query keeps its own outcome:
+    future.result() returns its rows or raises its own error, leaving the caller to
+    decide per query whether a failure is fatal.
+    """
+    max_workers = max_workers or max_concurrency()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-console') as executor:
+        futures = {name: executor.submit(_run_task, task) for name, task in tasks.items()}
+    return futures
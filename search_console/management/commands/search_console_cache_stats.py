@@ -0,0 +1,26 @@
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from search_console.caching import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Shows hits and misses of the Search Analytics result cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after printing them.")
+
+    def handle(self, *args, **options):
+        if isinstance(cache, LocMemCache):
+            self.stderr.write(self.style.WARNING(
+                "The default cache is per process (LocMemCache): these counts are this command's "
+                "own, not the web workers'. Configure a shared cache in CACHES."
+            ))
+        stats = cache_stats()
+        self.stdout.write(
+            f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {stats['hit_rate']:.1%}"
+        )
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from googleapiclient.errors import HttpError
+
+from search_console.services import get_available_sites
+from search_console.views import get_search_console_service
+from search_console.warehouse import REFRESH_DAYS, SYNC_DAYS, dates_to_sync, sync_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies Search Analytics rows into the local warehouse, fetching only days not stored yet "
+        "and re-fetching the most recent ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--site', action='append', dest='sites', help="Only sync this property (repeatable).")
+        parser.add_argument('--days', type=int, default=SYNC_DAYS, help="Days of history to keep synced.")
+        parser.add_argument(
+            '--refresh-days', type=int, default=REFRESH_DAYS, help="Recent days re-fetched on every run."
+        )
+
+    def handle(self, *args, **options):
+        service = get_search_console_service()
+        if not service:
+            raise CommandError("Could not initiate Google Search Console service.")
+
+        sites = options['sites']
+        if not sites:
+            sites = get_available_sites(service, refresh=True)
+
+        for site_url in sites:
+            days = dates_to_sync(site_url, options['days'], options['refresh_days'])
+            rows = failed = 0
+            for day in days:
+                try:
+                    rows += sync_day(get_search_console_service, site_url, day)
+                except HttpError as e:
+                    # The day stays unsynced and is retried on the next run
+                    failed += 1
+                    self.stderr.write(f"{site_url} {day}: {e}")
+            self.stdout.write(f"{site_url}: {len(days) - failed} day(s) synced, {rows} rows, {failed} failed.")
+
+        self.stdout.write(self.style.SUCCESS(f"Synced {len(sites)} site(s)."))
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchAnalyticsDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('site_url', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('row_count', models.IntegerField(default=0)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('site_url', 'date'), name='sc_day_site_date_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchAnalyticsRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('site_url', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('query', models.TextField(blank=True, null=True)),
+                ('page', models.CharField(max_length=2000)),
+                ('device', models.CharField(max_length=16)),
+                ('country', models.CharField(max_length=3)),
+                ('clicks', models.IntegerField(default=0)),
+                ('impressions', models.IntegerField(default=0)),
+                ('ctr', models.FloatField(default=0)),
+                ('position', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['site_url', 'date'], name='sc_row_site_date'), models.Index(fields=['site_url', 'page', 'date'], name='sc_row_site_page_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+def resync_days(apps, schema_editor):
+    # Days synced before the by-property levels existed lack them; forgetting the days
+    # makes the warehouse fall back to the API until the next sync re-fetches them
+    apps.get_model('search_console', 'SearchAnalyticsDay').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search_console', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='searchanalyticsrow',
+            name='page',
+            field=models.CharField(blank=True, max_length=2000, null=True),
+        ),
+        migrations.RunPython(resync_days, migrations.RunPython.noop),
+    ]
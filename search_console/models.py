@@ -1,3 +1,49 @@
 from django.db import models
 
-# Create your models here.
+
+class SearchAnalyticsRow(models.Model):
+    """
+    One Search Analytics row per (site, date, query, page, device, country), filled by
+    manage.py sync_search_console and aggregated by search_console.warehouse.
+
+    Search Console drops anonymized queries from query-level rows, so each day is also
+    stored at page level (query is NULL) for totals that match the API's page reports.
+    Without a page dimension or filter the API aggregates by property, counting a search
+    that showed two pages of the site once, so each day is stored by property as well
+    (page is NULL), with and without the query.
+    """
+    site_url = models.CharField(max_length=255)
+    date = models.DateField()
+    query = models.TextField(null=True, blank=True)  # NULL on page-level and property total rows
+    page = models.CharField(max_length=2000, null=True, blank=True)  # NULL on by-property rows
+    device = models.CharField(max_length=16)
+    country = models.CharField(max_length=3)
+    clicks = models.IntegerField(default=0)
+    impressions = models.IntegerField(default=0)
+    ctr = models.FloatField(default=0)
+    position = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['site_url', 'date'], name='sc_row_site_date'),
+            models.Index(fields=['site_url', 'page', 'date'], name='sc_row_site_page_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.site_url} {self.date} {self.query or '(all queries)'} {self.page or '(property)'}"
+
+
+class SearchAnalyticsDay(models.Model):
+    """A (site, date) that has been synced, so the sync only fetches missing dates."""
+    site_url = models.CharField(max_length=255)
+    date = models.DateField()
+    row_count = models.IntegerField(default=0)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['site_url', 'date'], name='sc_day_site_date_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.site_url} {self.date}"
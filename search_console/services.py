@@ -0,0 +1,123 @@
+# search_console/services.py
+
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from google_auth import get_service_credentials
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)  # Tokens are refreshed this long before they expire
+SITES_CACHE_KEY = 'search_console:sites'
+
+_lock = threading.Lock()
+_credentials = None
+_local = threading.local()
+
+
+def sites_timeout():
+    """Seconds the site list stays cached, settings.SEARCH_CONSOLE_SITES_CACHE_SECONDS."""
+    return getattr(settings, 'SEARCH_CONSOLE_SITES_CACHE_SECONDS', 3600)
+
+
+def _needs_refresh(credentials):
+    if not credentials.token:
+        return True
+    if credentials.expiry is None:
+        return False
+    # google-auth keeps expiry as naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return credentials.expiry - TOKEN_REFRESH_MARGIN <= now
+
+
+def get_credentials():
+    """
+    The process-wide Search Console credentials, loaded once and refreshed ahead of
+    expiry so no API call waits on a token exchange. None if none are configured.
+    """
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            _credentials = get_service_credentials('search_console')
+            if _credentials is None:
+                return None
+        if _needs_refresh(_credentials):
+            try:
+                _credentials.refresh(Request())
+                logger.debug(f"Refreshed Search Console token, valid until {_credentials.expiry}.")
+            except Exception:
+                # Reload from the service account on the next call
+                _credentials = None
+                raise
+        return _credentials
+
+
+@lru_cache(maxsize=None)
+def _discovery_document():
+    document = get_static_doc('webmasters', 'v3')
+    return json.loads(document) if document else None
+
+
+def get_service():
+    """
+    A Search Console service for the calling thread. googleapiclient services are not
+    thread-safe, so each thread keeps its own, built from the shared credentials and
+    the parsed discovery document. None if no credentials are configured.
+    """
+    credentials = get_credentials()
+    if credentials is None:
+        return None
+    if getattr(_local, 'credentials', None) is not credentials:
+        document = _discovery_document()
+        if document:
+            _local.service = build_from_document(document, credentials=credentials)
+        else:
+            _local.service = build('webmasters', 'v3', credentials=credentials)
+        _local.credentials = credentials
+    return _local.service
+
+
+def get_available_sites(service, refresh=False):
+    """
+    URLs of the properties the service account can read, cached for sites_timeout()
+    seconds. refresh=True refetches them, e.g. right after a property was shared.
+    """
+    sites = None if refresh else cache.get(SITES_CACHE_KEY)
+    if sites is None:
+        site_entries = service.sites().list().execute().get('siteEntry', [])
+        sites = [site['siteUrl'] for site in site_entries]
+        cache.set(SITES_CACHE_KEY, sites, sites_timeout())
+        logger.debug(f"Cached {len(sites)} Search Console sites.")
+    return sites
+
+
+def clear_available_sites():
+    cache.delete(SITES_CACHE_KEY)
+
+
+@lru_cache(maxsize=1024)
+def sites_for_host(host, available_sites):
+    """
+    The properties that can contain URLs on host (a tuple of available_sites): its
+    domain properties and the URL-prefix properties on the same host. Keyed on the site
+    list itself, so a refreshed list is never matched against stale results.
+    """
+    matches = []
+    for site in available_sites:
+        if site.startswith('sc-domain:'):
+            domain = site.split(':', 1)[1].lower()
+            if host == domain or host.endswith('.' + domain):
+                matches.append(site)
+        elif urlparse(site).netloc.lower() == host:
+            matches.append(site)
+    return tuple(matches)
@@ -1,3 +1,74 @@
+from datetime import date, timedelta
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import SearchAnalyticsDay, SearchAnalyticsRow
+from .warehouse import answer
+
+SITE = 'https://www.example.com/'
+
+
+class WarehouseAnswerTests(TestCase):
+    """
+    Two synced days where the query 'shoes' shows both /a and /b: by page it has 10 + 8
+    impressions a day, by property only 12, as one search showing both pages counts once.
+    """
+
+    def setUp(self):
+        self.end = date.today() - timedelta(days=5)
+        self.start = self.end - timedelta(days=1)
+        for day in (self.start, self.end):
+            SearchAnalyticsDay.objects.create(site_url=SITE, date=day)
+            for query, page, clicks, impressions, position in [
+                ('shoes', f'{SITE}a', 2, 10, 3.0),
+                ('shoes', f'{SITE}b', 1, 8, 6.0),
+                (None, f'{SITE}a', 3, 15, 3.0),
+                (None, f'{SITE}b', 1, 9, 6.0),
+                ('shoes', None, 3, 12, 3.5),
+                (None, None, 4, 20, 4.0),
+            ]:
+                SearchAnalyticsRow.objects.create(
+                    site_url=SITE, date=day, query=query, page=page, device='MOBILE', country='usa',
+                    clicks=clicks, impressions=impressions, ctr=clicks / impressions, position=position,
+                )
+
+    def body(self, **options):
+        return {'startDate': self.start.isoformat(), 'endDate': self.end.isoformat(), **options}
+
+    def test_queries_without_a_page_are_aggregated_by_property(self):
+        rows = answer(SITE, self.body(dimensions=['query']))
+
+        self.assertEqual(rows, [{'keys': ['shoes'], 'clicks': 6, 'impressions': 24, 'ctr': 0.25, 'position': 3.5}])
+
+    def test_page_filter_aggregates_by_page(self):
+        page_filter = {'dimension': 'page', 'operator': 'equals', 'expression': f'{SITE}a'}
+        rows = answer(SITE, self.body(dimensions=['query'], dimensionFilterGroups=[{'filters': [page_filter]}]))
+
+        self.assertEqual(rows, [{'keys': ['shoes'], 'clicks': 4, 'impressions': 20, 'ctr': 0.2, 'position': 3.0}])
+
+    def test_pages_include_anonymized_queries(self):
+        rows = answer(SITE, self.body(dimensions=['page']))
+
+        self.assertEqual([(row['keys'], row['clicks'], row['impressions']) for row in rows], [
+            ([f'{SITE}a'], 6, 30),
+            ([f'{SITE}b'], 2, 18),
+        ])
+
+    def test_totals_use_property_rows(self):
+        self.assertEqual(answer(SITE, self.body()), [{'clicks': 8, 'impressions': 40, 'ctr': 0.2, 'position': 4.0}])
+
+        rows = answer(SITE, self.body(dimensions=['date', 'device']))
+        self.assertEqual([(row['keys'], row['impressions']) for row in rows], [
+            ([self.start.isoformat(), 'MOBILE'], 20),
+            ([self.end.isoformat(), 'MOBILE'], 20),
+        ])
+
+    def test_unsynced_ranges_are_left_to_the_api(self):
+        self.assertIsNone(answer(SITE, self.body(startDate=(self.start - timedelta(days=1)).isoformat())))
+        self.assertIsNone(answer('https://other.example.com/', self.body(dimensions=['query'])))
+        self.assertIsNone(answer(SITE, self.body(dimensions=['searchAppearance'])))
+
+    def test_answer_is_a_fixed_number_of_indexed_queries(self):
+        # Existence of the site, coverage of the range, then one grouped aggregate
+        with self.assertNumQueries(3):
+            answer(SITE, self.body(dimensions=['query', 'page'], rowLimit=1))
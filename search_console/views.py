@@ -12,12 +12,11 @@ from django.http import (
 )
 from django.shortcuts import render
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-# Import the get_service_credentials function from your Google auth module
-# Adjust the import path based on your project structure
-from google_auth import get_service_credentials
+from .fetcher import run_concurrently
+from .services import get_available_sites, get_service, sites_for_host
+from .warehouse import search_analytics_rows
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -26,11 +25,11 @@ logger = logging.getLogger(__name__)
 def get_search_console_service():
     """Get Google Search Console service using centralized service account credentials."""
     try:
-        credentials = get_service_credentials('search_console')
-        if not credentials:
+        # Credentials and the built client are kept between requests (see services.py)
+        service = get_service()
+        if not service:
             raise ValueError("No valid service account credentials available.")
 
-        service = build('webmasters', 'v3', credentials=credentials)
         return service
     except Exception as e:
         logger.error(f"Failed to build Search Console service: {e}")
@@ -62,6 +61,9 @@ def find_matching_site_url(input_url, available_sites):
     # Reconstruct the normalized input URL
     normalized_input_url = f"{input_scheme}://{input_netloc}{input_path}"
 
+    # Only properties on the input's host can match; the candidates are cached per host
+    available_sites = sites_for_host(input_netloc, tuple(available_sites))
+
     # First, check for exact matches with available_sites
     input_root_url = f"{input_scheme}://{input_netloc}/"
     if input_root_url in available_sites:
@@ -121,11 +123,9 @@ def search_console_data(request):
                 "Could not initiate Google Search Console service."
             )
 
-        # Fetch the list of sites available to the service account
+        # Fetch the list of sites available to the service account (cached; ?refresh_sites=1 refetches it)
         try:
-            site_list = service.sites().list().execute()
-            site_entries = site_list.get('siteEntry', [])
-            available_sites = [site['siteUrl'] for site in site_entries]
+            available_sites = get_available_sites(service, refresh='refresh_sites' in request.GET)
             logger.debug(f"Available sites: {available_sites}")
         except HttpError as e:
             logger.error(f"Error fetching site list: {e}")
@@ -268,17 +268,6 @@ def search_console_data(request):
                         logger.debug(f"Request body without dimension filter: {request_body}")
 
                     try:
-                        # Fetch Search Analytics data for the selected period
-                        response = (
-                            service.searchanalytics()
-                            .query(siteUrl=matched_site_url, body=request_body)
-                            .execute()
-                        )
-                        logger.debug(
-                            "Search Analytics data fetched successfully for the selected period."
-                        )
-                        data = response.get('rows', [])
-
                         # Convert start_date and end_date to datetime.date objects
                         start_date_dt = datetime.strptime(
                             start_date, '%Y-%m-%d'
@@ -303,16 +292,19 @@ def search_console_data(request):
                         if not page_url:
                             prev_request_body.pop('dimensionFilterGroups', None)
 
-                        # Fetch Search Analytics data for the previous period
-                        prev_response = (
-                            service.searchanalytics()
-                            .query(siteUrl=matched_site_url, body=prev_request_body)
-                            .execute()
+                        # Fetch the selected and previous periods in parallel
+                        results = run_concurrently({
+                            'current': lambda: search_analytics_rows(get_search_console_service, matched_site_url, request_body),
+                            'previous': lambda: search_analytics_rows(get_search_console_service, matched_site_url, prev_request_body),
+                        })
+                        data = results['current'].result()
+                        logger.debug(
+                            "Search Analytics data fetched successfully for the selected period."
                         )
+                        prev_data = results['previous'].result()
                         logger.debug(
                             "Search Analytics data fetched successfully for the previous period."
                         )
-                        prev_data = prev_response.get('rows', [])
 
                         # Create a mapping from key to previous data
                         prev_data_dict = {tuple(row['keys']): row for row in prev_data}
@@ -436,8 +428,24 @@ def search_console_data(request):
 
                     matched_site_url = selected_site
 
+                    # Convert start_date and end_date to datetime.date objects
+                    start_date_dt = datetime.strptime(
+                        start_date, '%Y-%m-%d'
+                    ).date()
+                    end_date_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+                    delta = end_date_dt - start_date_dt
+
+                    # Compute previous period dates
+                    prev_end_date_dt = start_date_dt - timedelta(days=1)
+                    prev_start_date_dt = prev_end_date_dt - delta
+
+                    prev_start_date = prev_start_date_dt.strftime('%Y-%m-%d')
+                    prev_end_date = prev_end_date_dt.strftime('%Y-%m-%d')
+
                     # Try both 'equals' and 'contains' operators
                     data_rows = None
+                    prev_data_rows = []
                     operators = ['equals', 'contains']
 
                     for operator in operators:
@@ -468,27 +476,44 @@ def search_console_data(request):
                             'dimensionFilterGroups': [
                                 {'filters': [dimension_filter]}
                             ],
-                            'rowLimit': 25000,  # Set high to get all data
                         }
                         logger.debug(
                             f"Request body with dimension filter (operator: {operator}): {request_body}"
                         )
 
+                        # Create request body for previous period
+                        prev_request_body = request_body.copy()
+                        prev_request_body['startDate'] = prev_start_date
+                        prev_request_body['endDate'] = prev_end_date
+
+                        # Fetch the selected and previous periods in parallel
+                        results = run_concurrently({
+                            'current': lambda: search_analytics_rows(get_search_console_service, matched_site_url, request_body),
+                            'previous': lambda: search_analytics_rows(get_search_console_service, matched_site_url, prev_request_body),
+                        })
+
                         try:
-                            # Fetch Search Analytics data for the selected period
-                            response = (
-                                service.searchanalytics()
-                                .query(siteUrl=matched_site_url, body=request_body)
-                                .execute()
-                            )
+                            data_rows = results['current'].result()
                             logger.debug(
                                 f"Search Analytics data fetched successfully for the selected period with operator '{operator}'."
                             )
-                            data_rows = response.get('rows', [])
                             logger.debug(
                                 f"Number of rows returned: {len(data_rows)}"
                             )
                             if data_rows:
+                                try:
+                                    prev_data_rows = results['previous'].result()
+                                    logger.debug(
+                                        "Search Analytics data fetched successfully for the previous period."
+                                    )
+                                except HttpError as e:
+                                    logger.error(
+                                        f"HTTP Error fetching previous period data: {e}"
+                                    )
+                                except Exception as e:
+                                    logger.error(
+                                        f"Error fetching previous period data: {e}", exc_info=True
+                                    )
                                 break  # Exit the loop if data is found
                         except HttpError as e:
                             logger.error(
@@ -526,49 +551,6 @@ def search_console_data(request):
                             },
                         )
 
-                    # Proceed with data processing
-                    # Convert start_date and end_date to datetime.date objects
-                    start_date_dt = datetime.strptime(
-                        start_date, '%Y-%m-%d'
-                    ).date()
-                    end_date_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-                    delta = end_date_dt - start_date_dt
-
-                    # Compute previous period dates
-                    prev_end_date_dt = start_date_dt - timedelta(days=1)
-                    prev_start_date_dt = prev_end_date_dt - delta
-
-                    prev_start_date = prev_start_date_dt.strftime('%Y-%m-%d')
-                    prev_end_date = prev_end_date_dt.strftime('%Y-%m-%d')
-
-                    # Create request body for previous period
-                    prev_request_body = request_body.copy()
-                    prev_request_body['startDate'] = prev_start_date
-                    prev_request_body['endDate'] = prev_end_date
-
-                    # Fetch Search Analytics data for the previous period
-                    try:
-                        prev_response = (
-                            service.searchanalytics()
-                            .query(siteUrl=matched_site_url, body=prev_request_body)
-                            .execute()
-                        )
-                        logger.debug(
-                            "Search Analytics data fetched successfully for the previous period."
-                        )
-                        prev_data_rows = prev_response.get('rows', [])
-                    except HttpError as e:
-                        logger.error(
-                            f"HTTP Error fetching previous period data: {e}"
-                        )
-                        prev_data_rows = []
-                    except Exception as e:
-                        logger.error(
-                            f"Error fetching previous period data: {e}", exc_info=True
-                        )
-                        prev_data_rows = []
-
                     # Process data to aggregate metrics per page
                     page_data = {}
                     for row in data_rows:
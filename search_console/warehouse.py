@@ -0,0 +1,210 @@
+# search_console/warehouse.py
+
+import logging
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.db.models import F, FloatField, Q, Sum
+
+from .caching import cached_rows
+from .fetcher import iter_search_analytics_rows
+from .models import SearchAnalyticsDay, SearchAnalyticsRow
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ['date', 'query', 'page', 'device', 'country']  # Dimensions the warehouse can group by
+# Levels stored per day: by page with and without the query, and by property (page is NULL)
+# with and without the query; query is NULL on the levels without it
+QUERY_DIMENSIONS = ['query', 'page', 'device', 'country']
+PAGE_DIMENSIONS = ['page', 'device', 'country']
+PROPERTY_QUERY_DIMENSIONS = ['query', 'device', 'country']
+PROPERTY_DIMENSIONS = ['device', 'country']
+SYNC_LEVELS = [QUERY_DIMENSIONS, PAGE_DIMENSIONS, PROPERTY_QUERY_DIMENSIONS, PROPERTY_DIMENSIONS]
+SYNC_DAYS = 480  # Search Console keeps about 16 months of data
+REFRESH_DAYS = 3  # The most recent days are re-fetched on every sync while Google finalises them
+INSERT_BATCH_SIZE = 5000
+
+# dimensionFilterGroups operators and the lookups answering them
+FILTER_LOOKUPS = {
+    'equals': ('exact', False),
+    'notEquals': ('exact', True),
+    'contains': ('icontains', False),  # Search Console's contains is case-insensitive
+    'notContains': ('icontains', True),
+}
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def last_complete_date():
+    """Search Console has no complete data for today; syncs stop at yesterday."""
+    return date.today() - timedelta(days=1)
+
+
+def date_range(start, end):
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def synced_site_url(site_url):
+    """
+    The stored property for site_url, tolerating a missing trailing slash on URL-prefix
+    properties (client websites are often saved without one). None if never synced.
+    """
+    for candidate in dict.fromkeys([site_url, site_url.rstrip('/') + '/']):
+        if SearchAnalyticsDay.objects.filter(site_url=candidate).exists():
+            return candidate
+    return None
+
+
+def covers(site_url, start, end):
+    """True if every complete day between start and end has been synced for the site."""
+    end = min(end, last_complete_date())
+    if end < start:
+        return False
+    synced = SearchAnalyticsDay.objects.filter(site_url=site_url, date__range=(start, end)).count()
+    return synced == (end - start).days + 1
+
+
+def _filter_condition(dimension_filter):
+    dimension = dimension_filter.get('dimension')
+    if dimension not in DIMENSIONS or dimension_filter.get('operator', 'equals') not in FILTER_LOOKUPS:
+        return None
+    lookup, negate = FILTER_LOOKUPS[dimension_filter.get('operator', 'equals')]
+    if lookup == 'exact' and dimension in ('device', 'country'):
+        lookup = 'iexact'  # The API takes 'MOBILE'/'usa' in any case
+    condition = Q(**{f'{dimension}__{lookup}': dimension_filter.get('expression', '')})
+    return ~condition if negate else condition
+
+
+def _api_row(values, dimensions):
+    clicks = values['total_clicks'] or 0
+    impressions = values['total_impressions'] or 0
+    row = {
+        'clicks': clicks,
+        'impressions': impressions,
+        'ctr': clicks / impressions if impressions else 0,
+        'position': (values['weighted_position'] or 0) / impressions if impressions else 0,
+    }
+    if dimensions:
+        row['keys'] = [
+            values[dimension].isoformat() if dimension == 'date' else values[dimension] for dimension in dimensions
+        ]
+    return row
+
+
+def answer(site_url, body):
+    """
+    Answers a searchanalytics().query request body from the local tables, returning rows
+    shaped like the API's (keys, clicks, impressions, ctr, position; sorted by clicks).
+    As with iter_search_analytics_rows, rowLimit caps the total and may be left out.
+    Returns None when the warehouse cannot: the site or some day of the range is not
+    synced, or the body uses options it does not store (other search types, regex
+    filters, OR groups, searchAppearance). Callers then ask the API.
+    """
+    if body.get('type', body.get('searchType', 'web')) != 'web' or body.get('aggregationType', 'auto') != 'auto':
+        return None
+    dimensions = list(body.get('dimensions', []))
+    if any(dimension not in DIMENSIONS for dimension in dimensions):
+        return None
+    groups = body.get('dimensionFilterGroups', [])
+    if any(group.get('groupType', 'and') != 'and' for group in groups):
+        return None
+    filters = [dimension_filter for group in groups for dimension_filter in group.get('filters', [])]
+
+    site_url = synced_site_url(site_url)
+    if site_url is None:
+        return None
+    try:
+        start, end = parse_date(body['startDate']), parse_date(body['endDate'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not covers(site_url, start, end):
+        return None
+
+    # Query-level rows miss anonymized queries, so questions without the query use the
+    # levels stored without it; the API aggregates by page only when the page is grouped
+    # or filtered on, and by property otherwise
+    query_level = 'query' in dimensions or any(f.get('dimension') == 'query' for f in filters)
+    by_page = 'page' in dimensions or any(f.get('dimension') == 'page' for f in filters)
+    rows = SearchAnalyticsRow.objects.filter(
+        site_url=site_url, date__range=(start, end), query__isnull=not query_level, page__isnull=not by_page
+    )
+    for dimension_filter in filters:
+        condition = _filter_condition(dimension_filter)
+        if condition is None:
+            return None
+        rows = rows.filter(condition)
+
+    totals = {
+        'total_clicks': Sum('clicks'),
+        'total_impressions': Sum('impressions'),
+        # Average position over several rows is weighted by impressions, as Search Console does
+        'weighted_position': Sum(F('position') * F('impressions'), output_field=FloatField()),
+    }
+    if not dimensions:
+        values = rows.aggregate(**totals)
+        return [_api_row(values, dimensions)] if values['total_impressions'] else []
+
+    start_row = int(body.get('startRow', 0))
+    end_row = start_row + int(body['rowLimit']) if body.get('rowLimit') else None
+    grouped = rows.values(*dimensions).annotate(**totals).order_by('-total_clicks', *dimensions)
+    return [_api_row(values, dimensions) for values in grouped[start_row:end_row]]
+
+
+def search_analytics_rows(service_factory, site_url, body):
+    """
+    Rows for a Search Analytics query: from the result cache, else from the warehouse
+    when it holds the range, else every page from the API (rowLimit caps the total, no
+    cap when absent).
+    """
+    def fetch():
+        rows = answer(site_url, body)
+        if rows is None:
+            rows = list(iter_search_analytics_rows(service_factory, site_url, body))
+        return rows
+
+    return cached_rows(site_url, body, fetch)
+
+
+def dates_to_sync(site_url, days=SYNC_DAYS, refresh_days=REFRESH_DAYS):
+    """Days of the window not stored yet, plus the last refresh_days days in any case."""
+    end = last_complete_date()
+    start = end - timedelta(days=days - 1)
+    refresh_from = end - timedelta(days=refresh_days - 1)
+    synced = set(
+        SearchAnalyticsDay.objects.filter(site_url=site_url, date__range=(start, end)).values_list('date', flat=True)
+    )
+    return [day for day in date_range(start, end) if day not in synced or day >= refresh_from]
+
+
+def _facts(site_url, day, rows, dimensions):
+    for row in rows:
+        keys = dict(zip(dimensions, row['keys']))
+        yield SearchAnalyticsRow(
+            site_url=site_url,
+            date=day,
+            query=keys.get('query'),
+            page=keys.get('page'),
+            device=keys['device'],
+            country=keys['country'],
+            clicks=row.get('clicks', 0),
+            impressions=row.get('impressions', 0),
+            ctr=row.get('ctr', 0),
+            position=row.get('position', 0),
+        )
+
+
+def sync_day(service_factory, site_url, day):
+    """Fetches one day at every SYNC_LEVELS level and replaces its stored rows. Returns the row count."""
+    body = {'startDate': day.isoformat(), 'endDate': day.isoformat()}
+    facts = []
+    for dimensions in SYNC_LEVELS:
+        rows = iter_search_analytics_rows(service_factory, site_url, {**body, 'dimensions': dimensions})
+        facts.extend(_facts(site_url, day, rows, dimensions))
+
+    with transaction.atomic():
+        SearchAnalyticsRow.objects.filter(site_url=site_url, date=day).delete()
+        SearchAnalyticsRow.objects.bulk_create(facts, batch_size=INSERT_BATCH_SIZE)
+        SearchAnalyticsDay.objects.update_or_create(site_url=site_url, date=day, defaults={'row_count': len(facts)})
+    return len(facts)